@@ -0,0 +1,93 @@
+"""
+Benchmark for CohereBedrockEmbeddings batch dispatch against a fake Bedrock client.
+
+The fake client's invoke_model() sleeps for a fixed latency and can throttle a
+fraction of calls (raising a ThrottlingException ClientError), so the sequential,
+threaded and asyncio paths can be compared including retry behaviour. Every run
+checks that the returned embeddings are in input order.
+
+Run from the backend directory:
+    python -m scripts.bench_embedding_concurrency --texts 2000 --latency 0.2 --concurrency 8
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+
+class FakeBedrockClient:
+    """Stand-in for the bedrock-runtime client: embeds each text as [index, length]."""
+
+    def __init__(self, latency, throttle_rate=0.0, seed=0):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+
+    def invoke_model(self, body, modelId, contentType, accept):
+        texts = json.loads(body)["texts"]
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls += 1
+            throttle = self.random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "InvokeModel")
+        embeddings = [[float(text.split(":")[0]), float(len(text))] for text in texts]
+        return {"body": io.BytesIO(json.dumps({"embeddings": embeddings}).encode())}
+
+
+def make_embeddings(concurrency, latency, throttle_rate):
+    from src.ai_coach.cohere_embeddings import CohereBedrockEmbeddings
+
+    embeddings = CohereBedrockEmbeddings(region_name="us-east-1", max_concurrency=concurrency, query_cache_size=0)
+    embeddings.client = FakeBedrockClient(latency, throttle_rate)
+    return embeddings
+
+
+def check_order(texts, vectors):
+    return len(vectors) == len(texts) and all(int(vector[0]) == i for i, vector in enumerate(vectors))
+
+
+def run(label, texts, embeddings, embed):
+    start = time.perf_counter()
+    vectors = embed(texts)
+    elapsed = time.perf_counter() - start
+    client = embeddings.client
+    print(
+        f"[{label}] {len(texts)} texts in {elapsed:.2f} s -> {len(texts) / elapsed:.0f} texts/s "
+        f"(calls={client.calls}, throttled={client.throttled}, ordered={check_order(texts, vectors)})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sequential, threaded and async Cohere batch dispatch')
+    parser.add_argument('--texts', type=int, default=2000, help='Number of texts to embed')
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated invoke_model latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallel batches for the concurrent modes')
+    parser.add_argument('--throttle-rate', type=float, default=0.05, help='Fraction of calls that are throttled')
+    args = parser.parse_args()
+
+    texts = [f"{i}: chunk of methodology text" for i in range(args.texts)]
+
+    sequential = make_embeddings(1, args.latency, args.throttle_rate)
+    run("sequential", texts, sequential, sequential.embed_documents)
+
+    threaded = make_embeddings(args.concurrency, args.latency, args.throttle_rate)
+    run(f"threads x{args.concurrency}", texts, threaded, threaded.embed_documents)
+
+    async_embeddings = make_embeddings(args.concurrency, args.latency, args.throttle_rate)
+    run(f"async x{args.concurrency}", texts, async_embeddings,
+        lambda items: asyncio.run(async_embeddings.aembed_documents(items)))
+
+
+if __name__ == "__main__":
+    main()
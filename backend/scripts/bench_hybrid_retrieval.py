@@ -0,0 +1,165 @@
+"""
+Offline quality and latency benchmark: vector-only vs BM25-only vs hybrid (RRF) retrieval.
+
+Synthetic mode (default) needs no AWS access. Chunks are filler text plus one RLC
+term each ("Key Decision", "Integration Event", ...). The simulated dense embedding
+places all methodology terms close together, as a general-purpose embedding model
+tends to, and maps each filler word and its synonym to nearby vectors. Half of the
+questions name the chunk's term plus a few of its words (lexical match matters); the
+other half paraphrase the chunk with synonyms only (lexical search cannot match).
+
+Store mode runs labelled questions against a real index (Bedrock is needed for query
+embeddings). The questions file is JSONL with {"question": ..., "source": ...}, and a
+hit is any returned chunk whose metadata source ends with that file name.
+
+Run from the backend directory:
+    python -m scripts.bench_hybrid_retrieval --chunks 2000 --queries 500
+    python -m scripts.bench_hybrid_retrieval --db_dir ./chroma_db --questions eval_questions.jsonl
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+RLC_TERMS = [
+    "Key Decision", "Integration Event", "Learning Cycle Plan", "Knowledge Gap", "Learning Cycle",
+    "Program Charter", "Decision Schedule", "Status Report", "Knowledge Gap Report", "Core Team",
+    "Integration Event Plan", "Risk Register", "Kickoff", "Cycle Review", "Learning Objective",
+    "Decision Owner", "Gap Closure", "Program Leader", "Key Decision Report", "Knowledge Capture"
+]
+
+
+class SimulatedEmbeddings(Embeddings):
+    """Bag-of-words embedding; methodology words share one direction, synonyms sit near their word."""
+
+    def __init__(self, dim=256, seed=0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+        self.methodology = self.rng.normal(size=dim)
+        self.term_words = {word.lower() for term in RLC_TERMS for word in term.split()}
+        self.vectors = {}
+
+    def _word(self, word):
+        vector = self.vectors.get(word)
+        if vector is None:
+            noise = self.rng.normal(size=self.dim)
+            if word in self.term_words:
+                vector = self.methodology + 0.35 * noise
+            elif word.startswith("syn"):
+                vector = self._word("word" + word[3:]) + 0.3 * noise
+            else:
+                vector = noise
+            self.vectors[word] = vector
+        return vector
+
+    def embed_query(self, text):
+        vector = np.sum([self._word(word) for word in text.lower().split()], axis=0)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def synthetic_corpus(n_chunks, n_queries, seed):
+    rng = np.random.default_rng(seed)
+    filler = [f"word{i}" for i in range(600)]
+    documents, metadatas = [], []
+    for i in range(n_chunks):
+        words = list(rng.choice(filler, size=40))
+        words.insert(int(rng.integers(len(words))), RLC_TERMS[i % len(RLC_TERMS)])
+        documents.append(" ".join(words))
+        metadatas.append({"source": f"chunk-{i}"})
+
+    questions = []
+    for n, target in enumerate(rng.integers(n_chunks, size=n_queries)):
+        words = [w for w in documents[target].split() if w.startswith("word")]
+        if n % 2 == 0:
+            hint = " ".join(rng.choice(words, size=3, replace=False))
+            questions.append(("term", f"What is the {RLC_TERMS[target % len(RLC_TERMS)]} about {hint}", f"chunk-{target}"))
+        else:
+            hint = " ".join("syn" + w[4:] for w in rng.choice(words, size=8, replace=False))
+            questions.append(("paraphrase", f"Tell me about {hint}", f"chunk-{target}"))
+    return documents, metadatas, questions
+
+
+def evaluate(label, retriever, questions, k):
+    kinds = sorted({kind for kind, _, _ in questions})
+    for kind in kinds if len(kinds) > 1 else []:
+        evaluate(f"{label} / {kind}", retriever, [q for q in questions if q[0] == kind], k)
+
+    latencies, reciprocal_ranks = [], []
+    for _, question, source in questions:
+        start = time.perf_counter()
+        docs = retriever.invoke(question)[:k]
+        latencies.append(time.perf_counter() - start)
+        rank = next((i for i, doc in enumerate(docs, 1) if str(doc.metadata.get("source", "")).endswith(source)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    hits = np.mean([rr > 0 for rr in reciprocal_ranks])
+    print(
+        f"[{label}] hit@{k}={hits:.3f} MRR={np.mean(reciprocal_ranks):.3f} "
+        f"p50={np.percentile(latencies, 50) * 1000:.2f} ms p99={np.percentile(latencies, 99) * 1000:.2f} ms"
+    )
+
+
+def synthetic_retrievers(args):
+    from src.ai_coach.bm25_index import BM25Index
+    from src.ai_coach.numpy_retriever import NumpyRetriever, NumpyVectorIndex
+
+    documents, metadatas, questions = synthetic_corpus(args.chunks, args.queries, args.seed)
+    embeddings = SimulatedEmbeddings(seed=args.seed)
+    vector_index = NumpyVectorIndex(
+        [m["source"] for m in metadatas], embeddings.embed_documents(documents), documents, metadatas
+    )
+
+    start = time.perf_counter()
+    bm25 = BM25Index.build(documents, metadatas)
+    print(f"{args.chunks} chunks, {args.queries} questions; BM25 index built in "
+          f"{time.perf_counter() - start:.2f} s ({len(bm25.postings)} terms)")
+
+    vector = NumpyRetriever(index=vector_index, embeddings=embeddings, k=args.k)
+    wide_vector = NumpyRetriever(index=vector_index, embeddings=embeddings, k=args.fetch_k)
+    return vector, wide_vector, bm25, questions
+
+
+def store_retrievers(args):
+    from src.ai_coach.embeddings import get_bm25_index, get_retriever
+
+    with open(args.questions) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    questions = [("store", record["question"], record["source"]) for record in records]
+    vector = get_retriever(args.db_dir, hybrid=False, k=args.k)
+    wide_vector = get_retriever(args.db_dir, hybrid=False, k=args.fetch_k)
+    return vector, wide_vector, get_bm25_index(args.db_dir), questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare vector, BM25 and hybrid retrieval quality and latency')
+    parser.add_argument('--chunks', type=int, default=2000, help='Synthetic chunks')
+    parser.add_argument('--queries', type=int, default=500, help='Synthetic questions')
+    parser.add_argument('--db_dir', type=str, default=None, help='Evaluate a real Chroma store instead')
+    parser.add_argument('--questions', type=str, default=None, help='JSONL of {"question", "source"} for --db_dir')
+    parser.add_argument('--k', type=int, default=4, help='Chunks returned per question')
+    parser.add_argument('--fetch_k', type=int, default=20, help='Candidates taken from each side before fusion')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    from src.ai_coach.bm25_index import HybridRetriever
+    from langchain_core.runnables import RunnableLambda
+
+    if args.db_dir:
+        vector, wide_vector, bm25, questions = store_retrievers(args)
+    else:
+        vector, wide_vector, bm25, questions = synthetic_retrievers(args)
+
+    lexical = RunnableLambda(lambda question: bm25.to_documents(bm25.search(question, k=args.k)))
+    hybrid = HybridRetriever(vector_retriever=wide_vector, bm25_index=bm25, k=args.k, fetch_k=args.fetch_k)
+
+    evaluate("vector", vector, questions, args.k)
+    evaluate("bm25", lexical, questions, args.k)
+    evaluate("hybrid rrf", hybrid, questions, args.k)
+
+
+if __name__ == "__main__":
+    main()
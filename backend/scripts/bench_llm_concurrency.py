@@ -0,0 +1,63 @@
+"""
+Load test for the Report Writer LLM path against a stubbed Bedrock client.
+
+The stub's invoke() sleeps like a Bedrock round trip. The "blocking" mode calls it
+inline inside the coroutine (the old behaviour); the "pooled" mode goes through
+evaluate_kg_report, which now awaits the call on the bounded LLM executor.
+
+Run from the backend directory:
+    python -m scripts.bench_llm_concurrency --requests 32 --latency 1.0
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+
+class SleepingLLM:
+    """Stand-in for ChatBedrock whose invoke() blocks for a fixed time."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke(self, messages):
+        time.sleep(self.latency)
+        return SimpleNamespace(content="stubbed evaluation")
+
+
+async def blocking_evaluation(llm):
+    # Old behaviour: synchronous invoke inside an async function
+    return {"evaluation": llm.invoke([]).content, "success": True}
+
+
+async def run(mode, requests, latency):
+    from src.services import report_ai_service
+
+    llm = SleepingLLM(latency)
+    report_ai_service.get_bedrock_llm = lambda model_id=None: llm
+
+    start = time.perf_counter()
+    if mode == "blocking":
+        results = await asyncio.gather(*(blocking_evaluation(llm) for _ in range(requests)))
+    else:
+        results = await asyncio.gather(*(report_ai_service.evaluate_kg_report({}) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    ok = sum(1 for result in results if result.get("success"))
+    print(f"[{mode}] {ok}/{requests} requests in {elapsed:.2f} s -> {requests / elapsed:.2f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent throughput of report LLM calls with a sleeping Bedrock stub')
+    parser.add_argument('--requests', type=int, default=32, help='Concurrent requests to issue')
+    parser.add_argument('--latency', type=float, default=1.0, help='Simulated Bedrock latency in seconds')
+    args = parser.parse_args()
+
+    from src.utils.llm_executor import LLM_MAX_CONCURRENCY
+    print(f"LLM_MAX_CONCURRENCY={LLM_MAX_CONCURRENCY}")
+    for mode in ("blocking", "pooled"):
+        asyncio.run(run(mode, args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark for exact NumPy retrieval against Chroma's HNSW search.
+
+Builds a throwaway Chroma store of synthetic, clustered unit vectors (Cohere v3
+embeddings are 1024-dim), then runs the same queries through collection.query() and
+NumpyVectorIndex.search(), reporting p50/p99 latency and recall@k against a float64
+brute-force ground truth. Both paths return documents and metadata, as a retriever does.
+
+Run from the backend directory:
+    python -m scripts.bench_numpy_retriever --vectors 2000 --queries 500 --k 4
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+def make_corpus(n, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.6 * rng.normal(size=(n, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), rng
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def recall(results, truth):
+    return float(np.mean([len(set(got) & set(expected)) / len(expected) for got, expected in zip(results, truth)]))
+
+
+def run(label, queries, search, truth):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    print(
+        f"[{label}] p50={percentile_ms(latencies, 50):.3f} ms p99={percentile_ms(latencies, 99):.3f} ms "
+        f"recall@k={recall(results, truth):.4f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare NumPy exact search with Chroma HNSW retrieval')
+    parser.add_argument('--vectors', type=int, default=2000, help='Number of stored chunks')
+    parser.add_argument('--dim', type=int, default=1024, help='Embedding dimension')
+    parser.add_argument('--clusters', type=int, default=40, help='Topic clusters in the synthetic corpus')
+    parser.add_argument('--queries', type=int, default=500, help='Number of queries')
+    parser.add_argument('--k', type=int, default=4, help='Results per query')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    import chromadb
+    from src.ai_coach.numpy_retriever import NumpyVectorIndex
+
+    vectors, rng = make_corpus(args.vectors, args.dim, args.clusters, args.seed)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    documents = [f"methodology chunk {i}" for i in range(args.vectors)]
+    metadatas = [{"source": f"doc-{i % 25}.docx"} for i in range(args.vectors)]
+
+    # Queries are noisy copies of stored chunks, like a question close to one passage
+    picks = vectors[rng.integers(args.vectors, size=args.queries)]
+    queries = picks + 0.8 * rng.normal(size=picks.shape) / np.sqrt(args.dim)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    truth_rows = np.argsort(-(queries.astype(np.float64) @ vectors.T), axis=1)[:, :args.k]
+    truth = [[ids[i] for i in row] for row in truth_rows]
+
+    directory = tempfile.mkdtemp(prefix="bench_chroma_")
+    try:
+        client = chromadb.PersistentClient(path=directory)
+        collection = client.create_collection("bench_methodology")
+        batch = client.get_max_batch_size()
+        for start in range(0, args.vectors, batch):
+            collection.add(
+                ids=ids[start:start + batch],
+                embeddings=vectors[start:start + batch].astype(np.float32).tolist(),
+                documents=documents[start:start + batch],
+                metadatas=metadatas[start:start + batch]
+            )
+
+        start = time.perf_counter()
+        index = NumpyVectorIndex.from_collection(collection)
+        print(f"{args.vectors} x {args.dim} vectors, {args.queries} queries, k={args.k}; "
+              f"NumPy index loaded in {time.perf_counter() - start:.2f} s ({index.matrix.nbytes / 1e6:.1f} MB)")
+
+        def chroma_search(query):
+            result = collection.query(query_embeddings=[query.tolist()], n_results=args.k,
+                                      include=["documents", "metadatas", "distances"])
+            return result["ids"][0]
+
+        def numpy_search(query):
+            hits = index.search(query, k=args.k)[0]
+            index.to_documents(hits)
+            return [index.ids[i] for i, _ in hits]
+
+        # Warm both paths once before timing
+        chroma_search(queries[0])
+        numpy_search(queries[0])
+
+        run("chroma hnsw", queries, chroma_search, truth)
+        run("numpy exact", queries, numpy_search, truth)
+
+        start = time.perf_counter()
+        index.search(queries, k=args.k)
+        elapsed = time.perf_counter() - start
+        print(f"[numpy batch] {args.queries} queries in one call: {elapsed * 1000:.2f} ms "
+              f"({elapsed / args.queries * 1e6:.1f} us/query)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the per-conversation setup cost of the AI Coach RAG chain.
+
+Compares the legacy behaviour (new embeddings client, Chroma store and ChatBedrock
+per conversation) with the pooled behaviour of ai_coach_service.get_rag_chain
+(shared clients, only a memory object per conversation). No Bedrock calls are made:
+the numbers are the setup latency added to the first question of each conversation
+and the worker RSS growth per 1,000 conversations.
+
+Run from the backend directory:
+    python -m scripts.bench_rag_chain_pool --conversations 1000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from langchain_community.vectorstores import Chroma
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def legacy_chain(db_dir):
+    """Rebuild every client for a new conversation, as create_rag_chain used to."""
+    from langchain.chains import ConversationalRetrievalChain
+    from src.ai_coach.bedrock_llm import _create_bedrock_llm
+    from src.ai_coach.cohere_embeddings import CohereBedrockEmbeddings
+    from src.ai_coach.rag_chain import CONDENSE_QUESTION_PROMPT, QA_PROMPT, create_conversation_memory
+    from src.config.model_constants import EMBEDDING_MODEL
+
+    embeddings = CohereBedrockEmbeddings(model_id=EMBEDDING_MODEL, region_name=os.getenv("AWS_REGION", "us-east-1"))
+    vectordb = Chroma(persist_directory=db_dir, embedding_function=embeddings)
+    return ConversationalRetrievalChain.from_llm(
+        llm=_create_bedrock_llm(),
+        retriever=vectordb.as_retriever(search_kwargs={"k": 4}),
+        memory=create_conversation_memory(),
+        condense_question_prompt=CONDENSE_QUESTION_PROMPT,
+        combine_docs_chain_kwargs={"prompt": QA_PROMPT}
+    )
+
+
+def pooled_chain(db_dir):
+    """Build a chain the way ai_coach_service does now (shared clients)."""
+    from src.ai_coach.rag_chain import create_rag_chain, create_conversation_memory
+
+    return create_rag_chain(persist_directory=db_dir, memory=create_conversation_memory())
+
+
+def run(mode, conversations, db_dir):
+    chains = []  # Keep chains alive, like the conversation store does
+    timings = []
+    rss_before = current_rss_mb()
+    for _ in range(conversations):
+        start = time.perf_counter()
+        if mode == "legacy":
+            chains.append(legacy_chain(db_dir))
+        else:
+            chains.append(pooled_chain(db_dir))
+        timings.append((time.perf_counter() - start) * 1000)
+    rss_growth = current_rss_mb() - rss_before
+
+    timings.sort()
+    print(f"[{mode}] {conversations} conversations")
+    print(f"  first-question setup latency: mean {statistics.mean(timings):.2f} ms, "
+          f"p50 {timings[len(timings) // 2]:.2f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms")
+    print(f"  RSS growth: {rss_growth:.1f} MB total, {rss_growth * 1000 / conversations:.1f} MB per 1,000 conversations")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AI Coach RAG chain setup (legacy vs pooled)')
+    parser.add_argument('--conversations', type=int, default=1000, help='Number of new conversations to simulate')
+    parser.add_argument('--mode', choices=['legacy', 'pooled', 'both'], default='both')
+    parser.add_argument('--db_dir', type=str, default=None, help='Chroma directory (defaults to a temporary one)')
+    args = parser.parse_args()
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix="bench_chroma_")
+    modes = ["legacy", "pooled"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        run(mode, args.conversations, db_dir)
+
+
+if __name__ == "__main__":
+    main()
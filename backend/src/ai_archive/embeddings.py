@@ -4,6 +4,7 @@ from langchain_aws import BedrockEmbeddings
 from langchain_community.vectorstores import Chroma
 import chromadb
 from src.config.model_constants import EMBEDDING_MODEL
+from src.utils.vector_upsert import upsert_texts
 
 def initialize_archive_vector_db(persist_directory="./archive_chroma_db"):
     """Initialize a separate vector database for archive documents."""
@@ -79,13 +80,16 @@ def add_document_to_vectordb(docs, persist_directory="./archive_chroma_db"):
         # Format documents for Chroma
         texts = [doc["text"] for doc in docs]
         metadatas = [doc["metadata"] for doc in docs]
-        ids = [f"{doc['metadata']['source']}_{doc['metadata']['chunk']}" for doc in docs]
         
-        # Add documents to Chroma
-        vectordb.add_texts(texts=texts, metadatas=metadatas, ids=ids)
-        
-        # Persist the changes
-        vectordb.persist()
+        # Embed only chunks not already stored, then write them in bulk upserts.
+        # Ids are content hashes scoped to the source file.
+        upsert_texts(
+            vectordb._collection,
+            embeddings,
+            texts=texts,
+            metadatas=metadatas,
+            namespace=docs[0]["metadata"]["source"] if docs else ""
+        )
         
         return True
     except Exception as e:
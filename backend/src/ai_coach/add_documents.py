@@ -1,13 +1,13 @@
 # add_documents.py
 import os
 import argparse
-from src.ai_coach.embeddings import load_and_split_documents, add_to_vector_db
-#from backend.src.ai_coach.embeddings import load_and_split_documents, add_to_vector_db
+from src.ai_coach.incremental_index import sync_documents
 
 def main():
     parser = argparse.ArgumentParser(description='Add new documents to the RLC methodology vector database')
     parser.add_argument('--docs_dir', type=str, required=True, help='Directory containing new RLC documents')
     parser.add_argument('--db_dir', type=str, default='./chroma_db', help='Directory of the existing vector database')
+    parser.add_argument('--root_name', type=str, default=None, help='Name of docs_dir in the index manifest (default: the directory name)')
     args = parser.parse_args()
     
     # Check if the documents directory exists
@@ -20,16 +20,13 @@ def main():
         print(f"Error: Database directory '{args.db_dir}' does not exist")
         return
     
-    print(f"Loading new documents from {args.docs_dir}...")
-    chunks = load_and_split_documents(args.docs_dir)
-    print(f"Loaded {len(chunks)} document chunks")
-    
-    print(f"Adding to existing vector database in {args.db_dir}...")
-    success = add_to_vector_db(chunks, args.db_dir)
-    if success:
-        print("Documents added successfully to the vector database")
-    else:
-        print("Error adding documents to the vector database")
+    # Files already in the manifest are skipped, so re-running never inserts duplicates.
+    # Nothing is removed: previously indexed files outside this run stay in the database.
+    # Files are keyed by docs root, so a file sharing a relative path with one indexed
+    # from another folder is added next to it rather than replacing it.
+    print(f"Adding documents from {args.docs_dir} to the vector database in {args.db_dir}...")
+    sync_documents(args.docs_dir, args.db_dir, remove_missing=False, root_name=args.root_name)
+    print("Documents added successfully to the vector database")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,16 +1,52 @@
 import os
+import threading
 from langchain_aws import ChatBedrock
 from dotenv import load_dotenv
-from src.config.model_constants import LLM_MODEL, LLAMA_MODEL_KWARGS
+from src.config.model_constants import CONDENSE_MODEL_KWARGS, LLM_MODEL, LLAMA_MODEL_KWARGS
 
 load_dotenv()
 
+# One ChatBedrock (and underlying bedrock-runtime client) per worker; boto3 clients are thread-safe
+_shared_llm = None
+_condense_llm = None
+_llm_lock = threading.Lock()
+
 def get_bedrock_llm(model_id=None):
     """
-    Initialize AWS Bedrock LLM client with standardized Llama 3.3 70B model.
+    Get the shared AWS Bedrock LLM client with standardized Llama 3.3 70B model.
+    The client is created on first use and reused by every chain and report call in this worker.
     Args:
         model_id (str, optional): Requested model (ignored - always uses Llama 3.3)
     """
+    global _shared_llm
+    if _shared_llm is None:
+        with _llm_lock:
+            if _shared_llm is None:
+                _shared_llm = _create_bedrock_llm()
+    return _shared_llm
+
+def get_condense_llm():
+    """
+    Get the LLM used to rewrite follow-ups into standalone questions.
+    AI_COACH_CONDENSE_MODEL_ID routes this step to a smaller, faster Bedrock model;
+    unset, the shared Llama 3.3 client is used.
+    """
+    global _condense_llm
+    condense_model_id = os.getenv("AI_COACH_CONDENSE_MODEL_ID")
+    if not condense_model_id:
+        return get_bedrock_llm()
+    if _condense_llm is None:
+        with _llm_lock:
+            if _condense_llm is None:
+                _condense_llm = ChatBedrock(
+                    model_id=condense_model_id,
+                    region_name=os.getenv("AWS_REGION", "us-east-1"),
+                    model_kwargs=CONDENSE_MODEL_KWARGS.copy()
+                )
+    return _condense_llm
+
+def _create_bedrock_llm():
+    """Initialize a new ChatBedrock client for the standardized model."""
     # Always use standardized model, ignore any requested model_id
     standardized_model_id = LLM_MODEL  # "us.meta.llama3-3-70b-instruct-v1:0"
     
@@ -0,0 +1,173 @@
+"""
+Lexical (BM25) index over the chunks of a Chroma store, and hybrid retrieval.
+
+Methodology questions lean on exact terms ("Key Decision", "Integration Event",
+"Learning Cycle Plan") that dense retrieval alone can rank too low. The BM25 index is
+an inverted index whose postings already hold each chunk's BM25 term weight, so a
+query only sums the postings of its terms. It is built when the store is indexed,
+saved as bm25_index.json next to the Chroma files, and tagged with the store's index
+version so a stale file is rebuilt rather than used.
+
+HybridRetriever merges the lexical and vector rankings with reciprocal rank fusion.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+BM25_INDEX_FILE = "bm25_index.json"
+BM25_INDEX_FORMAT = 1
+
+# Standard BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "of", "on", "or", "should", "that", "the", "this", "to", "we", "what", "when",
+    "where", "which", "who", "why", "with", "you"
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without common English stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+class BM25Index:
+    """Inverted index: term -> (chunk rows, precomputed BM25 weights)."""
+
+    def __init__(self, documents: List[str], metadatas: List[Optional[Dict]], postings: Dict[str, Tuple[List[int], List[float]]], version=None):
+        self.documents = documents
+        self.metadatas = metadatas
+        self.version = version
+        self.postings = {
+            term: (np.asarray(rows, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+            for term, (rows, weights) in postings.items()
+        }
+
+    @classmethod
+    def build(cls, documents: List[str], metadatas: List[Optional[Dict]], version=None) -> "BM25Index":
+        term_counts = [Counter(tokenize(text)) for text in documents]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        n_docs = len(documents)
+
+        rows_by_term: Dict[str, List[int]] = {}
+        tfs_by_term: Dict[str, List[int]] = {}
+        for row, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                rows_by_term.setdefault(term, []).append(row)
+                tfs_by_term.setdefault(term, []).append(tf)
+
+        postings = {}
+        for term, rows in rows_by_term.items():
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            weights = []
+            for row, tf in zip(rows, tfs_by_term[term]):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / avg_length) if avg_length else BM25_K1
+                weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+            postings[term] = (rows, weights)
+        return cls(documents, metadatas, postings, version)
+
+    @classmethod
+    def build_from_collection(cls, collection, version=None) -> "BM25Index":
+        data = collection.get(include=["documents", "metadatas"])
+        return cls.build(data["documents"], data["metadatas"], version)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def save(self, persist_directory: str):
+        """Write the index atomically (temp file + rename)."""
+        path = os.path.join(persist_directory, BM25_INDEX_FILE)
+        payload = {
+            "format": BM25_INDEX_FORMAT,
+            "version": self.version,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+            "postings": {
+                term: [rows.tolist(), [round(float(w), 5) for w in weights]]
+                for term, (rows, weights) in self.postings.items()
+            }
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["BM25Index"]:
+        """Load a saved index, or None if there is none (or it has an older format)."""
+        path = os.path.join(persist_directory, BM25_INDEX_FILE)
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if payload.get("format") != BM25_INDEX_FORMAT:
+            return None
+        return cls(payload["documents"], payload["metadatas"], payload["postings"], payload.get("version"))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """Top-k (row, BM25 score) pairs for a query, best first."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+                matched = True
+        k = min(k, int(np.count_nonzero(scores))) if matched else 0
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def to_documents(self, hits: List[Tuple[int, float]]) -> List[Document]:
+        return [Document(page_content=self.documents[i], metadata=self.metadatas[i] or {}) for i, _ in hits]
+
+def _doc_key(doc: Document) -> str:
+    return doc.page_content + json.dumps(doc.metadata, sort_keys=True, default=str)
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], weights: Optional[List[float]] = None, k: int = 4, rrf_k: int = 60) -> List[Document]:
+    """Merge ranked lists: each document scores sum(weight / (rrf_k + rank)) over the lists it appears in."""
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered[:k]]
+
+class HybridRetriever(BaseRetriever):
+    """Vector retriever + BM25, fused with reciprocal rank fusion."""
+
+    vector_retriever: BaseRetriever
+    bm25_index: Any
+    k: int = 4
+    fetch_k: int = 20
+    lexical_weight: float = 1.0
+    vector_weight: float = 1.0
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_docs = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        lexical_docs = self.bm25_index.to_documents(self.bm25_index.search(query, k=self.fetch_k))
+        return reciprocal_rank_fusion(
+            [vector_docs, lexical_docs],
+            weights=[self.vector_weight, self.lexical_weight],
+            k=self.k,
+            rrf_k=self.rrf_k
+        )
@@ -1,55 +1,306 @@
+import asyncio
 import json
+import random
+import threading
+import time
 import boto3
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
 from langchain_core.embeddings import Embeddings
+from src.ai_coach.embedding_cache import EmbeddingVectorCache, QueryEmbeddingCache
+
+# Cohere accepts at most 96 texts per request
+BATCH_SIZE = 96
+
+# Bedrock error codes worth retrying with backoff
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "InternalServerException"
+}
 
 class CohereBedrockEmbeddings(Embeddings):
     """Custom Cohere embeddings for Bedrock that properly formats parameters"""
     
-    def __init__(self, model_id: str = "cohere.embed-multilingual-v3", region_name: str = "us-east-1"):
+    def __init__(
+        self,
+        model_id: str = "cohere.embed-multilingual-v3",
+        region_name: str = "us-east-1",
+        query_cache_size: Optional[int] = None,
+        query_cache_path: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        vector_cache_dir: Optional[str] = None
+    ):
         self.model_id = model_id
         self.region_name = region_name
-        self.client = boto3.client('bedrock-runtime', region_name=region_name)
+        
+        # Batches of a large embed_documents call are sent in parallel (EMBEDDING_MAX_CONCURRENCY).
+        # A throttled or failed batch is retried on its own with backoff (EMBEDDING_MAX_RETRIES).
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+        # Retries happen per batch below; boto's own retries are off so the two layers don't multiply
+        self.client = boto3.client(
+            'bedrock-runtime',
+            region_name=region_name,
+            config=Config(
+                max_pool_connections=max(10, self.max_concurrency),
+                retries={"total_max_attempts": 1, "mode": "standard"}
+            )
+        )
+        
+        # Worker threads for batch calls, shared by the sync and async paths (created lazily by the pool)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="cohere-embed")
+        
+        # Shared backoff delay: grows when Bedrock throttles, shrinks again on success
+        self._throttle_delay = 0.0
+        self._throttle_lock = threading.Lock()
+        
+        # Repeated queries (e.g. identical condensed questions) skip the Bedrock round trip.
+        # EMBEDDING_QUERY_CACHE_SIZE=0 disables the cache; EMBEDDING_QUERY_CACHE_PATH persists it.
+        if query_cache_size is None:
+            query_cache_size = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "2048"))
+        if query_cache_path is None:
+            query_cache_path = os.getenv("EMBEDDING_QUERY_CACHE_PATH") or None
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_path) if query_cache_size > 0 else None
+        
+        # Document vectors cached on disk (EMBEDDING_VECTOR_CACHE_DIR): re-indexing unchanged
+        # chunk text, e.g. after a chunking change or a Chroma upgrade, makes no Bedrock calls
+        if vector_cache_dir is None:
+            vector_cache_dir = os.getenv("EMBEDDING_VECTOR_CACHE_DIR") or None
+        self.vector_cache = EmbeddingVectorCache(vector_cache_dir, model_id, "search_document") if vector_cache_dir else None
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed documents using Cohere via Bedrock"""
-        return self._embed_texts(texts, "search_document")
+        """Embed documents using Cohere via Bedrock (cached vectors are reused when configured)"""
+        if self.vector_cache is None:
+            return self._embed_texts(texts, "search_document")
+        
+        vectors = self.vector_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Each batch is cached as soon as it is embedded, so a failed run keeps its work
+            new_vectors = self._embed_texts([texts[i] for i in missing], "search_document", on_batch=self.vector_cache.add_many)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return [vector if isinstance(vector, list) else vector.tolist() for vector in vectors]
     
     def embed_query(self, text: str) -> List[float]:
-        """Embed query using Cohere via Bedrock"""
-        return self._embed_texts([text], "search_query")[0]
-    
-    def _embed_texts(self, texts: List[str], input_type: str) -> List[List[float]]:
-        """Internal method to embed texts"""
-        # Process in batches of 96 (Cohere limit)
-        batch_size = 96
-        all_embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            # Prepare request body according to AWS docs
-            body = json.dumps({
-                "texts": batch,
-                "input_type": input_type,
-                "truncate": "END"  # Handle long texts
-            })
-            
+        """Embed query using Cohere via Bedrock (served from the query cache when possible)"""
+        if self.query_cache is None:
+            return self._embed_texts([text], "search_query")[0]
+        
+        key = QueryEmbeddingCache.make_key(self.model_id, "search_query", text)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self._embed_texts([text], "search_query")[0]
+            self.query_cache.put(key, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries with batched Cohere calls (96 per request); cached queries are not re-sent"""
+        if self.query_cache is None:
+            return self._embed_texts(texts, "search_query")
+
+        keys = [QueryEmbeddingCache.make_key(self.model_id, "search_query", text) for text in texts]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            def cache_batch(batch, batch_embeddings):
+                for text, embedding in zip(batch, batch_embeddings):
+                    self.query_cache.put(QueryEmbeddingCache.make_key(self.model_id, "search_query", text), embedding)
+
+            new_embeddings = self._embed_texts([texts[i] for i in missing], "search_query", on_batch=cache_batch)
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+        return embeddings
+
+    def query_cache_stats(self) -> dict:
+        """Hit/miss counters of the query embedding cache"""
+        if self.query_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.query_cache.stats()}
+    
+    def vector_cache_stats(self) -> dict:
+        """Hit/miss counters of the on-disk document vector cache"""
+        if self.vector_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.vector_cache.stats()}
+    
+    def _embed_texts(self, texts: List[str], input_type: str, on_batch: Optional[Callable] = None) -> List[List[float]]:
+        """
+        Internal method to embed texts: batches run concurrently, results keep input order.
+        A batch that runs out of retries does not discard the others: completed batches are
+        kept (and passed to on_batch(texts, embeddings) as they finish), the failed ones get
+        another pass once the rest are done, and only then is the error raised.
+        """
+        def run(batch):
+            embeddings = self._embed_batch_with_retry(batch, input_type)
+            if on_batch is not None:
+                on_batch(batch, embeddings)
+            return embeddings
+        
+        batches = self._split_batches(texts)
+        results, failed = [None] * len(batches), {}
+        if len(batches) <= 1 or self.max_concurrency == 1:
+            for i, batch in enumerate(batches):
+                try:
+                    results[i] = run(batch)
+                except Exception as e:
+                    failed[i] = e
+                    if not self._is_retryable(e):
+                        break
+        else:
+            futures = [self._executor.submit(run, batch) for batch in batches]
+            for i, future in enumerate(futures):
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    failed[i] = e
+        
+        if failed:
+            self._check_failed_batches(failed, len(batches))
+            for i in sorted(failed):
+                try:
+                    results[i] = run(batches[i])
+                    del failed[i]
+                except Exception as e:
+                    failed[i] = e
+            if failed:
+                raise failed[min(failed)]
+        
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    def _check_failed_batches(self, failed: dict, total: int):
+        """Raise at once if a batch failed for a reason retrying cannot fix; otherwise report the retry pass"""
+        for error in failed.values():
+            if not self._is_retryable(error):
+                print(f"Error in Cohere embedding batch: {error}")
+                raise error
+        print(f"⏳ Retrying {len(failed)} failed Cohere embedding batches; {total - len(failed)} completed batches kept")
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents without blocking the event loop, up to max_concurrency batches in flight"""
+        if self.vector_cache is None:
+            return await self._aembed_texts(texts)
+        
+        vectors = self.vector_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_vectors = await self._aembed_texts([texts[i] for i in missing], on_batch=self.vector_cache.add_many)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return [vector if isinstance(vector, list) else vector.tolist() for vector in vectors]
+    
+    async def _aembed_texts(self, texts: List[str], on_batch: Optional[Callable] = None) -> List[List[float]]:
+        batches = self._split_batches(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        
+        async def embed_batch(batch):
+            async with semaphore:
+                attempt = 0
+                while True:
+                    await asyncio.sleep(self._current_throttle_delay())
+                    try:
+                        embeddings = await loop.run_in_executor(self._executor, self._invoke_batch, batch, "search_document")
+                    except Exception as e:
+                        delay = self._retry_delay(e, attempt)
+                        if delay is None:
+                            print(f"Error in Cohere embedding batch: {e}")
+                            raise e
+                        attempt += 1
+                        print(f"⏳ Cohere embedding batch retry {attempt}/{self.max_retries} in {delay:.2f}s: {e}")
+                        await asyncio.sleep(delay)
+                        continue
+                    self._record_success()
+                    if on_batch is not None:
+                        on_batch(batch, embeddings)
+                    return embeddings
+        
+        # As in _embed_texts: keep completed batches and retry the failed ones before raising
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches), return_exceptions=True)
+        failed = {i: result for i, result in enumerate(results) if isinstance(result, Exception)}
+        if failed:
+            self._check_failed_batches(failed, len(batches))
+            retried = await asyncio.gather(*(embed_batch(batches[i]) for i in sorted(failed)), return_exceptions=True)
+            for i, result in zip(sorted(failed), retried):
+                if isinstance(result, Exception):
+                    raise result
+                results[i] = result
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    def _split_batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+    
+    def _embed_batch_with_retry(self, batch: List[str], input_type: str) -> List[List[float]]:
+        """Embed one batch, retrying only this batch on throttling or transient errors"""
+        attempt = 0
+        while True:
+            time.sleep(self._current_throttle_delay())
             try:
-                response = self.client.invoke_model(
-                    body=body,
-                    modelId=self.model_id,
-                    contentType="application/json",
-                    accept="*/*"
-                )
-                
-                response_body = json.loads(response['body'].read())
-                embeddings = response_body['embeddings']
-                all_embeddings.extend(embeddings)
-                
+                embeddings = self._invoke_batch(batch, input_type)
             except Exception as e:
-                print(f"Error in Cohere embedding batch: {e}")
-                raise e
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    print(f"Error in Cohere embedding batch: {e}")
+                    raise e
+                attempt += 1
+                print(f"⏳ Cohere embedding batch retry {attempt}/{self.max_retries} in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                continue
+            self._record_success()
+            return embeddings
+    
+    def _invoke_batch(self, batch: List[str], input_type: str) -> List[List[float]]:
+        """Single invoke_model call for up to BATCH_SIZE texts"""
+        # Prepare request body according to AWS docs
+        body = json.dumps({
+            "texts": batch,
+            "input_type": input_type,
+            "truncate": "END"  # Handle long texts
+        })
+        
+        response = self.client.invoke_model(
+            body=body,
+            modelId=self.model_id,
+            contentType="application/json",
+            accept="*/*"
+        )
+        
+        response_body = json.loads(response['body'].read())
+        return response_body['embeddings']
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Backoff before the next attempt, or None if the error is not retryable or retries are exhausted"""
+        if attempt >= self.max_retries:
+            return None
         
-        return all_embeddings
\ No newline at end of file
+        if not self._is_retryable(error):
+            return None
+        if isinstance(error, ClientError):
+            # Throttling slows every worker down, not just this batch
+            with self._throttle_lock:
+                self._throttle_delay = min(10.0, max(0.25, self._throttle_delay * 2))
+        
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(20.0, 0.5 * (2 ** attempt)))
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, ClientError):
+            return error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+        return isinstance(error, (ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError))
+    
+    def _current_throttle_delay(self) -> float:
+        with self._throttle_lock:
+            return self._throttle_delay
+    
+    def _record_success(self):
+        with self._throttle_lock:
+            if self._throttle_delay:
+                self._throttle_delay = self._throttle_delay / 2 if self._throttle_delay > 0.05 else 0.0
@@ -0,0 +1,90 @@
+"""
+When to rewrite a follow-up into a standalone question.
+
+ConversationalRetrievalChain sends every follow-up through an extra LLM call with
+CONDENSE_QUESTION_PROMPT before retrieval. Many follow-ups are already standalone
+("How do I run a Key Decision review with a distributed team?"), and for those the
+extra call only adds latency and tokens. AI_COACH_CONDENSE_POLICY selects:
+    always    - condense every follow-up (LangChain's behaviour)
+    heuristic - condense only follow-ups that look like they depend on the history (default)
+    never     - never condense; retrieve with the question as asked
+
+Each branch is counted in the metrics registry; skipped calls add the current average
+condense latency to ai_coach.condense.estimated_ms_saved.
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain.chains.base import Chain
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain_core.callbacks import CallbackManagerForChainRun
+from src.utils.metrics import metrics
+
+CONDENSE_POLICIES = ("always", "heuristic", "never")
+
+# Words that usually point back at something said earlier in the conversation
+_REFERENCE_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "him", "her",
+    "above", "previous", "previously", "earlier", "last", "same", "again", "also", "else", "more",
+    "another", "former", "latter", "one", "ones", "example", "elaborate", "expand", "continue", "instead"
+}
+# Openings that continue the previous turn ("And for hardware?", "What about the schedule?")
+_FOLLOW_UP_OPENINGS = re.compile(r"^\s*(and|but|so|or|then|also|what about|how about|why not|ok|okay)\b", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"[a-zA-Z']+")
+
+def get_condense_policy() -> str:
+    policy = os.getenv("AI_COACH_CONDENSE_POLICY", "heuristic").lower()
+    return policy if policy in CONDENSE_POLICIES else "heuristic"
+
+def is_self_contained(question: str, min_words: int = 5) -> bool:
+    """Cheap check: long enough, no follow-up opening and no word that refers back to the history."""
+    words = [word.lower() for word in _WORD_PATTERN.findall(question)]
+    if len(words) < min_words or _FOLLOW_UP_OPENINGS.match(question):
+        return False
+    return not any(word in _REFERENCE_WORDS for word in words)
+
+def _record_skip(branch: str):
+    metrics.increment(f"ai_coach.condense.{branch}")
+    average_ms = metrics.average("ai_coach.condense.latency_ms")
+    if average_ms is not None:
+        metrics.increment("ai_coach.condense.estimated_ms_saved", int(average_ms))
+
+def get_chat_history_with_metrics(chat_history: List) -> str:
+    """_get_chat_history that also counts turns where condensing is skipped because there is no history."""
+    chat_history_str = _get_chat_history(chat_history)
+    if not chat_history_str:
+        _record_skip("skipped_empty_history")
+    return chat_history_str
+
+class CondenseQuestionChain(Chain):
+    """Drop-in question_generator: applies the condense policy before calling the condense LLMChain."""
+
+    llm_chain: Chain
+    policy: str = "heuristic"
+
+    @property
+    def input_keys(self) -> List[str]:
+        return ["question", "chat_history"]
+
+    @property
+    def output_keys(self) -> List[str]:
+        return ["text"]
+
+    def _call(self, inputs: Dict[str, Any], run_manager: Optional[CallbackManagerForChainRun] = None) -> Dict[str, Any]:
+        question = inputs["question"]
+        if self.policy == "never":
+            _record_skip("skipped_policy")
+            return {"text": question}
+        if self.policy == "heuristic" and is_self_contained(question):
+            _record_skip("skipped_self_contained")
+            return {"text": question}
+
+        started = time.perf_counter()
+        callbacks = run_manager.get_child() if run_manager else None
+        text = self.llm_chain.run(question=question, chat_history=inputs["chat_history"], callbacks=callbacks)
+        metrics.observe("ai_coach.condense.latency_ms", (time.perf_counter() - started) * 1000)
+        metrics.increment("ai_coach.condense.condensed")
+        return {"text": text}
@@ -0,0 +1,162 @@
+"""
+Context assembly between retrieval and the QA prompt.
+
+Retrieved chunks often overlap (chunk_overlap) or sit next to each other in the same
+file, and near-identical passages appear in more than one document. Before the
+chunks are stuffed into {context} they are:
+  1. merged when they are adjacent pieces of the same text, i.e. same source and page
+     (by start_index when the chunk has one, otherwise by the overlapping text the
+     splitter repeats),
+  2. dropped when they are near-duplicates of a higher-ranked chunk,
+  3. packed in rank order into a token budget.
+"""
+
+import os
+import re
+from typing import Any, Callable, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from src.utils.metrics import metrics
+
+# Shortest shared text treated as splitter overlap when chunks have no start_index
+MIN_TEXT_OVERLAP = 15
+# Characters the splitter may strip between two adjacent chunks
+MAX_POSITION_GAP = 3
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+def _text_overlap(first: str, second: str, max_overlap: int = 200) -> int:
+    """Length of the longest suffix of first that is a prefix of second (0 if shorter than MIN_TEXT_OVERLAP)."""
+    for size in range(min(len(first), len(second), max_overlap), MIN_TEXT_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+# Metadata that differs between pieces of one contiguous text
+_POSITION_KEYS = ("start_index", "merged_chunks")
+
+def _same_origin(first: Document, second: Document) -> bool:
+    """Chunks come from the same text (same source, page, ...) when all other metadata matches."""
+    strip = lambda metadata: {k: v for k, v in metadata.items() if k not in _POSITION_KEYS}
+    return strip(first.metadata) == strip(second.metadata)
+
+def _join_adjacent(first: Document, second: Document) -> Optional[Document]:
+    """first + second as one document if second directly continues first, else None."""
+    start_a, start_b = first.metadata.get("start_index"), second.metadata.get("start_index")
+    if isinstance(start_a, int) and isinstance(start_b, int):
+        end_a = start_a + len(first.page_content)
+        if not start_a <= start_b <= end_a + MAX_POSITION_GAP:
+            return None
+        overlap = max(0, end_a - start_b)
+        separator = "" if start_b <= end_a else " "  # the splitter stripped whitespace in between
+        text = first.page_content + separator + second.page_content[overlap:]
+    else:
+        overlap = _text_overlap(first.page_content, second.page_content)
+        if not overlap:
+            return None
+        text = first.page_content + second.page_content[overlap:]
+
+    metadata = dict(first.metadata)
+    metadata["merged_chunks"] = first.metadata.get("merged_chunks", 1) + second.metadata.get("merged_chunks", 1)
+    return Document(page_content=text, metadata=metadata)
+
+def merge_adjacent_chunks(docs: List[Document]) -> List[Document]:
+    """
+    Merge chunks that continue each other within the same source and page (all metadata
+    but the position equal). A merged chunk takes the rank of its best-ranked piece.
+    """
+    merged: List[Document] = []
+    for doc in docs:
+        for i, kept in enumerate(merged):
+            if not _same_origin(kept, doc):
+                continue
+            joined = _join_adjacent(kept, doc) or _join_adjacent(doc, kept)
+            if joined is not None:
+                merged[i] = joined
+                break
+        else:
+            merged.append(doc)
+
+    # A merge can make two kept chunks adjacent; repeat until nothing changes
+    if len(merged) < len(docs):
+        return merge_adjacent_chunks(merged)
+    return merged
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def drop_near_duplicates(docs: List[Document], threshold: float = 0.8) -> List[Document]:
+    """
+    Keep chunks in rank order, skipping any whose word shingles are mostly (threshold)
+    already present in a higher-ranked kept chunk.
+    """
+    kept, kept_shingles = [], []
+    for doc in docs:
+        shingles = _shingles(doc.page_content)
+        duplicate = any(len(shingles & other) / len(shingles) >= threshold for other in kept_shingles)
+        if not duplicate:
+            kept.append(doc)
+            kept_shingles.append(shingles)
+    return kept
+
+def pack_to_budget(docs: List[Document], max_tokens: int, count_tokens: Callable[[str], int]) -> List[Document]:
+    """Take chunks in rank order while they fit the token budget (the best chunk is always kept)."""
+    packed, used = [], 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if packed and used + tokens > max_tokens:
+            continue
+        packed.append(doc)
+        used += tokens
+    return packed
+
+def _default_token_counter(text: str) -> int:
+    from src.services.token_usage_service import token_logger
+    return token_logger.estimate_tokens(text)
+
+def assemble_context(docs: List[Document], max_tokens: int = 2000, duplicate_threshold: float = 0.8,
+                     count_tokens: Optional[Callable[[str], int]] = None) -> List[Document]:
+    """Merge adjacent chunks, drop near-duplicates and pack the rest into max_tokens."""
+    count_tokens = count_tokens or _default_token_counter
+    before = sum(count_tokens(doc.page_content) for doc in docs)
+
+    packed = pack_to_budget(
+        drop_near_duplicates(merge_adjacent_chunks(docs), duplicate_threshold),
+        max_tokens,
+        count_tokens
+    )
+
+    after = sum(count_tokens(doc.page_content) for doc in packed)
+    metrics.increment("ai_coach.context.tokens_retrieved", before)
+    metrics.increment("ai_coach.context.tokens_packed", after)
+    return packed
+
+class PackedContextRetriever(BaseRetriever):
+    """Wraps a retriever and returns its chunks merged, de-duplicated and packed to a token budget."""
+
+    retriever: BaseRetriever
+    max_tokens: int = 2000
+    duplicate_threshold: float = 0.8
+    count_tokens: Optional[Any] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        docs = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return assemble_context(docs, self.max_tokens, self.duplicate_threshold, self.count_tokens)
+
+def wrap_with_context_packing(retriever: BaseRetriever) -> BaseRetriever:
+    """
+    Apply context packing unless AI_COACH_CONTEXT_PACKING=false.
+    AI_COACH_CONTEXT_MAX_TOKENS sets the budget, AI_COACH_CONTEXT_DUPLICATE_THRESHOLD the overlap ratio.
+    """
+    if os.getenv("AI_COACH_CONTEXT_PACKING", "true").lower() != "true":
+        return retriever
+    return PackedContextRetriever(
+        retriever=retriever,
+        max_tokens=int(os.getenv("AI_COACH_CONTEXT_MAX_TOKENS", "2000")),
+        duplicate_threshold=float(os.getenv("AI_COACH_CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+    )
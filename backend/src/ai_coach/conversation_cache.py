@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+class ConversationCache:
+    """
+    Bounded in-memory store for per-conversation state.
+
+    Entries are evicted least-recently-used first when the entry count or the
+    approximate byte budget is exceeded, and expire after an idle TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[float] = 7200,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        size_of: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size_of = size_of or (lambda value: 0)
+
+        # key -> {"value", "last_access", "size"}, ordered from least to most recently used
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any:
+        """Return the value for key (refreshing its recency), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+
+            if entry is not None:
+                self._hits += 1
+                entry["last_access"] = time.monotonic()
+                self._entries.move_to_end(key)
+                return entry["value"]
+
+            self._misses += 1
+            return None
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, creating it with factory if absent."""
+        value = self.get(key)
+        if value is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return entry["value"]
+                value = factory()
+                self._store(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Insert or replace a value and enforce the cache limits."""
+        with self._lock:
+            self._store(key, value)
+
+    def refresh_size(self, key: str):
+        """Re-measure an entry after it has grown (e.g. a new turn was added to its memory)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            new_size = self.size_of(entry["value"])
+            self._current_bytes += new_size - entry["size"]
+            entry["size"] = new_size
+            self._enforce_limits(protected_key=key)
+
+    def pop(self, key: str) -> bool:
+        """Remove key from the cache. Returns True if it was present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def keys(self) -> List[str]:
+        """Live (non-expired) keys, least recently used first."""
+        with self._lock:
+            self._purge_expired()
+            return list(self._entries.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current occupancy for monitoring."""
+        with self._lock:
+            self._purge_expired()
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # Internal helpers (caller holds the lock)
+
+    def _store(self, key: str, value: Any):
+        if key in self._entries:
+            self._remove(key)
+        size = self.size_of(value)
+        self._entries[key] = {"value": value, "last_access": time.monotonic(), "size": size}
+        self._current_bytes += size
+        self._enforce_limits(protected_key=key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._current_bytes -= entry["size"]
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry["last_access"] > self.ttl_seconds
+
+    def _purge_expired(self):
+        if self.ttl_seconds is None:
+            return
+        # Entries are ordered by last access, so stop at the first live one
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry):
+                break
+            self._remove(key)
+            self._expirations += 1
+
+    def _enforce_limits(self, protected_key: Optional[str] = None):
+        self._purge_expired()
+        while self._entries and self._over_limits():
+            key = next(iter(self._entries))
+            if key == protected_key:
+                # Never evict the entry being written; it alone may exceed the byte budget
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+    def _over_limits(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._current_bytes > self.max_bytes
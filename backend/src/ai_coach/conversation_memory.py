@@ -0,0 +1,126 @@
+"""
+Token-budgeted chat history with a rolling summary for long AI Coach sessions.
+
+The chain's chat history is the summary of older turns followed by the most recent
+turns verbatim: at most AI_COACH_MEMORY_TURNS of them, and only as many as fit in
+AI_COACH_MEMORY_MAX_TOKENS together with the summary. After each answer, turns that
+no longer fit are folded into the summary by an LLM call that runs in the background,
+so the answer is not delayed. Summaries live in the conversation store next to the
+turns, so every worker sees the same history.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import PromptTemplate
+
+from src.ai_coach.conversation_store import DEFAULT_MEMORY_TURNS, ConversationStore, StoredChatMessageHistory
+from src.utils.metrics import metrics
+
+DEFAULT_MEMORY_MAX_TOKENS = int(os.getenv("AI_COACH_MEMORY_MAX_TOKENS", "1500"))
+
+SUMMARY_PROMPT = PromptTemplate.from_template("""
+Progressively summarize a coaching conversation about the Rapid Learning Cycles methodology.
+Extend the current summary with the new lines of conversation. Keep the user's goals,
+project context, decisions and open questions; drop pleasantries. Use at most 150 words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:
+""")
+
+# Summaries are written off the request path; one fold per conversation at a time
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+_folds_in_flight = set()
+_folds_lock = threading.Lock()
+
+def _count_tokens(text: str) -> int:
+    from src.services.token_usage_service import token_logger
+    return token_logger.estimate_tokens(text)
+
+def _turn_tokens(turn: Dict) -> int:
+    return _count_tokens(turn["question"]) + _count_tokens(turn["answer"])
+
+def recent_turns_within_budget(turns: List[Dict], budget: int, max_turns: int) -> int:
+    """How many of the newest turns fit in budget tokens (capped at max_turns)."""
+    kept, used = 0, 0
+    for turn in reversed(turns[-max_turns:] if max_turns else turns):
+        used += _turn_tokens(turn)
+        if used > budget:
+            break
+        kept += 1
+    return kept
+
+class SummaryBufferChatMessageHistory(StoredChatMessageHistory):
+    """StoredChatMessageHistory whose messages are a rolling summary plus the recent turns that fit the token budget."""
+
+    def __init__(self, store: ConversationStore, key: str, llm=None, max_turns: Optional[int] = DEFAULT_MEMORY_TURNS,
+                 max_tokens: int = DEFAULT_MEMORY_MAX_TOKENS):
+        super().__init__(store, key, max_turns)
+        self.llm = llm
+        self.max_tokens = max_tokens
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        record = self.store.load_summary(self.key) or {}
+        summary = record.get("summary", "")
+        turns = self.store.load_turns(self.key, self.max_turns)
+        if record.get("turns_summarized"):
+            # Turns already folded into the summary are never replayed verbatim
+            unsummarized = self.store.count_turns(self.key) - record["turns_summarized"]
+            turns = turns[len(turns) - max(0, unsummarized):] if unsummarized < len(turns) else turns
+
+        summary_tokens = _count_tokens(summary)
+        keep = recent_turns_within_budget(turns, self.max_tokens - summary_tokens, self.max_turns)
+        recent = turns[len(turns) - keep:] if keep else []
+        metrics.observe("ai_coach.memory.history_tokens", summary_tokens + sum(_turn_tokens(turn) for turn in recent))
+
+        messages: List[BaseMessage] = []
+        if summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        for turn in recent:
+            messages.append(HumanMessage(content=turn["question"]))
+            messages.append(AIMessage(content=turn["answer"]))
+        return messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        super().add_messages(messages)
+        if self.llm is None:
+            return
+        with _folds_lock:
+            if self.key in _folds_in_flight:
+                return
+            _folds_in_flight.add(self.key)
+        _summary_executor.submit(self._fold_old_turns)
+
+    def _fold_old_turns(self):
+        """Fold the turns that no longer fit verbatim into the rolling summary."""
+        try:
+            record = self.store.load_summary(self.key) or {"summary": "", "turns_summarized": 0}
+            unsummarized = self.store.count_turns(self.key) - record["turns_summarized"]
+            if unsummarized <= 0:
+                return
+            turns = self.store.load_turns(self.key, unsummarized)
+            budget = self.max_tokens - _count_tokens(record["summary"])
+            keep = recent_turns_within_budget(turns, budget, self.max_turns)
+            to_fold = turns[:len(turns) - keep]
+            if not to_fold:
+                return
+
+            new_lines = "\n".join(f"Human: {turn['question']}\nAssistant: {turn['answer']}" for turn in to_fold)
+            result = self.llm.invoke(SUMMARY_PROMPT.format(summary=record["summary"] or "(none)", new_lines=new_lines))
+            summary = getattr(result, "content", result).strip()
+            self.store.save_summary(self.key, summary, record["turns_summarized"] + len(to_fold))
+            metrics.increment("ai_coach.memory.turns_summarized", len(to_fold))
+        except Exception as e:
+            print(f"⚠️ Could not update conversation summary for {self.key}: {e}")
+        finally:
+            with _folds_lock:
+                _folds_in_flight.discard(self.key)
@@ -0,0 +1,289 @@
+"""
+Conversation history storage for the AI Coach.
+
+Turns are kept outside the RAG chain so any worker (or container) can continue any
+conversation: MongoDB stores one document per turn, and an in-process bounded cache
+is used as a fallback when MongoDB is not selected or cannot be initialised.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.ai_coach.conversation_cache import ConversationCache
+
+# Default number of turns replayed into the chain's chat history
+DEFAULT_MEMORY_TURNS = int(os.getenv("AI_COACH_MEMORY_TURNS", "10"))
+
+# MongoDB deletes stored turns and summaries this long after they were written. Keep it
+# far above the active window: a summary counts the turns it folded, so turns expiring
+# under a still-active conversation would shift that count.
+HISTORY_RETENTION_SECONDS = int(float(os.getenv("AI_COACH_HISTORY_RETENTION_DAYS", "30")) * 86400)
+
+class ConversationStore:
+    """Interface for conversation history backends. Keys are the scoped chain keys."""
+
+    backend = "base"
+
+    def load_turns(self, key: str, max_turns: Optional[int] = None) -> List[Dict]:
+        """Return the last max_turns turns (all if None), oldest first."""
+        raise NotImplementedError
+
+    def append_turn(self, key: str, question: str, answer: str):
+        """Persist one question/answer turn with a single write."""
+        raise NotImplementedError
+
+    def count_turns(self, key: str) -> int:
+        """Number of turns stored for a conversation."""
+        return len(self.load_turns(key))
+
+    def load_summary(self, key: str) -> Optional[Dict]:
+        """Rolling summary of the oldest turns: {"summary", "turns_summarized"}, or None."""
+        return None
+
+    def save_summary(self, key: str, summary: str, turns_summarized: int):
+        """Replace the rolling summary of a conversation."""
+        pass
+
+    def clear(self, key: str) -> bool:
+        """Delete a conversation. Returns True if anything was removed."""
+        raise NotImplementedError
+
+    def clear_prefix(self, prefix: str) -> int:
+        """Delete every conversation whose key starts with prefix. Returns the number removed."""
+        raise NotImplementedError
+
+    def list_keys(self) -> List[str]:
+        """Keys of the conversations that are currently active."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Backend statistics for monitoring."""
+        return {"backend": self.backend}
+
+def _estimate_turns_bytes(turns: List[Dict]) -> int:
+    """Approximate footprint of a list of turns (text plus per-turn overhead)."""
+    return 1024 + sum(len(turn["question"].encode("utf-8")) + len(turn["answer"].encode("utf-8")) + 512 for turn in turns)
+
+class InMemoryConversationStore(ConversationStore):
+    """Per-worker fallback backed by a bounded LRU/TTL cache. History does not survive restarts."""
+
+    backend = "memory"
+
+    def __init__(self, cache: Optional[ConversationCache] = None):
+        self.cache = cache or ConversationCache(
+            max_entries=int(os.getenv("AI_COACH_MAX_CONVERSATIONS", "1000")),
+            ttl_seconds=float(os.getenv("AI_COACH_CONVERSATION_TTL_SECONDS", "7200")),
+            max_bytes=int(float(os.getenv("AI_COACH_CONVERSATION_MAX_MB", "64")) * 1024 * 1024),
+            size_of=_estimate_turns_bytes
+        )
+        self.summaries = ConversationCache(
+            max_entries=self.cache.max_entries,
+            ttl_seconds=self.cache.ttl_seconds,
+            max_bytes=None
+        )
+
+    def load_turns(self, key: str, max_turns: Optional[int] = None) -> List[Dict]:
+        turns = self.cache.get(key) or []
+        return list(turns[-max_turns:]) if max_turns else list(turns)
+
+    def append_turn(self, key: str, question: str, answer: str):
+        turns = self.cache.get_or_create(key, list)
+        turns.append({"question": question, "answer": answer, "timestamp": datetime.utcnow()})
+        self.cache.refresh_size(key)
+
+    def count_turns(self, key: str) -> int:
+        return len(self.cache.get(key) or [])
+
+    def load_summary(self, key: str) -> Optional[Dict]:
+        return self.summaries.get(key)
+
+    def save_summary(self, key: str, summary: str, turns_summarized: int):
+        self.summaries.put(key, {"summary": summary, "turns_summarized": turns_summarized})
+
+    def clear(self, key: str) -> bool:
+        self.summaries.pop(key)
+        return self.cache.pop(key)
+
+    def clear_prefix(self, prefix: str) -> int:
+        keys = [key for key in self.cache.keys() if key.startswith(prefix)]
+        for key in keys:
+            self.cache.pop(key)
+            self.summaries.pop(key)
+        return len(keys)
+
+    def list_keys(self) -> List[str]:
+        return self.cache.keys()
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend, **self.cache.stats()}
+
+class MongoConversationStore(ConversationStore):
+    """
+    Shared store: one document per turn in MongoDB, indexed by conversation key and time.
+    TTL indexes expire turns and summaries retention_seconds after they were written.
+    """
+
+    backend = "mongo"
+
+    def __init__(self, collection, active_window_seconds: Optional[float] = None, summaries_collection=None,
+                 retention_seconds: int = HISTORY_RETENTION_SECONDS):
+        self.collection = collection
+        self.summaries_collection = summaries_collection
+        self.active_window_seconds = active_window_seconds or float(os.getenv("AI_COACH_CONVERSATION_TTL_SECONDS", "7200"))
+        self.retention_seconds = retention_seconds
+        self._index_ready = False
+
+    def _ensure_index(self):
+        if self._index_ready:
+            return
+        try:
+            self.collection.create_index([("conversation_key", 1), ("created_at", -1)])
+            # TTL index; also serves list_keys, which filters on created_at alone
+            self.collection.create_index("created_at", expireAfterSeconds=self.retention_seconds)
+            if self.summaries_collection is not None:
+                self.summaries_collection.create_index("conversation_key", unique=True)
+                self.summaries_collection.create_index("updated_at", expireAfterSeconds=self.retention_seconds)
+            self._index_ready = True
+        except Exception as e:
+            print(f"⚠️ Could not create conversation history index: {e}")
+
+    def load_turns(self, key: str, max_turns: Optional[int] = None) -> List[Dict]:
+        cursor = self.collection.find(
+            {"conversation_key": key},
+            {"_id": 0, "question": 1, "answer": 1, "created_at": 1}
+        ).sort([("created_at", -1), ("_id", -1)])  # _id breaks same-millisecond ties
+        if max_turns:
+            cursor = cursor.limit(max_turns)
+        turns = [
+            {"question": doc["question"], "answer": doc["answer"], "timestamp": doc.get("created_at")}
+            for doc in cursor
+        ]
+        turns.reverse()
+        return turns
+
+    def append_turn(self, key: str, question: str, answer: str):
+        self._ensure_index()
+        self.collection.insert_one({
+            "conversation_key": key,
+            "question": question,
+            "answer": answer,
+            "created_at": datetime.utcnow()
+        })
+
+    def count_turns(self, key: str) -> int:
+        return self.collection.count_documents({"conversation_key": key})
+
+    def load_summary(self, key: str) -> Optional[Dict]:
+        if self.summaries_collection is None:
+            return None
+        return self.summaries_collection.find_one(
+            {"conversation_key": key},
+            {"_id": 0, "summary": 1, "turns_summarized": 1}
+        )
+
+    def save_summary(self, key: str, summary: str, turns_summarized: int):
+        if self.summaries_collection is None:
+            return
+        self._ensure_index()
+        self.summaries_collection.update_one(
+            {"conversation_key": key},
+            {"$set": {"summary": summary, "turns_summarized": turns_summarized, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    def clear(self, key: str) -> bool:
+        if self.summaries_collection is not None:
+            self.summaries_collection.delete_one({"conversation_key": key})
+        return self.collection.delete_many({"conversation_key": key}).deleted_count > 0
+
+    def clear_prefix(self, prefix: str) -> int:
+        keys = self._keys({"conversation_key": {"$regex": f"^{re.escape(prefix)}"}})
+        if keys:
+            self.collection.delete_many({"conversation_key": {"$in": keys}})
+            if self.summaries_collection is not None:
+                self.summaries_collection.delete_many({"conversation_key": {"$in": keys}})
+        return len(keys)
+
+    def list_keys(self) -> List[str]:
+        since = datetime.utcnow() - timedelta(seconds=self.active_window_seconds)
+        return self._keys({"created_at": {"$gte": since}})
+
+    def _keys(self, query: Dict) -> List[str]:
+        return sorted(self.collection.distinct("conversation_key", query))
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "collection": self.collection.name,
+            "active_window_seconds": self.active_window_seconds,
+            "retention_seconds": self.retention_seconds
+        }
+
+class StoredChatMessageHistory(BaseChatMessageHistory):
+    """
+    LangChain chat history view over a ConversationStore.
+
+    Reading loads only the last max_turns turns; saving a turn (one human and one AI
+    message, as the chain's memory does) is a single append to the store.
+    """
+
+    def __init__(self, store: ConversationStore, key: str, max_turns: Optional[int] = DEFAULT_MEMORY_TURNS):
+        self.store = store
+        self.key = key
+        self.max_turns = max_turns
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        messages = []
+        for turn in self.store.load_turns(self.key, self.max_turns):
+            messages.append(HumanMessage(content=turn["question"]))
+            messages.append(AIMessage(content=turn["answer"]))
+        return messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        question = None
+        for message in messages:
+            if isinstance(message, HumanMessage):
+                question = message.content
+            elif isinstance(message, AIMessage) and question is not None:
+                self.store.append_turn(self.key, question, message.content)
+                question = None
+
+    def clear(self) -> None:
+        self.store.clear(self.key)
+
+def _mongo_reachable(timeout_ms: int) -> bool:
+    """Ping MongoDB; pymongo connects lazily, so constructing a client proves nothing."""
+    from pymongo import MongoClient
+    client = MongoClient(os.getenv("MONGODB_URI"), serverSelectionTimeoutMS=timeout_ms)
+    try:
+        client.admin.command("ping")
+        return True
+    finally:
+        client.close()
+
+def get_conversation_store() -> ConversationStore:
+    """
+    Select the history backend from AI_COACH_MEMORY_BACKEND ("mongo" by default, or "memory").
+    Falls back to the in-process store if MongoDB does not answer a ping within
+    AI_COACH_MONGO_PING_TIMEOUT_MS or cannot be used.
+    """
+    backend = os.getenv("AI_COACH_MEMORY_BACKEND", "mongo").lower()
+    if backend == "mongo":
+        try:
+            _mongo_reachable(int(os.getenv("AI_COACH_MONGO_PING_TIMEOUT_MS", "2000")))
+            from src.utils.db import db
+            store = MongoConversationStore(
+                db["ai_coach_conversation_turns"],
+                summaries_collection=db["ai_coach_conversation_summaries"]
+            )
+            store._ensure_index()
+            return store
+        except Exception as e:
+            print(f"⚠️ MongoDB conversation store unavailable, using in-memory fallback: {e}")
+    return InMemoryConversationStore()
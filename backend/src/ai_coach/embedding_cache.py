@@ -0,0 +1,238 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, keyed by model id + input type + text hash.
+
+    Optionally backed by a SQLite file so embeddings survive restarts and can be shared
+    by workers on the same host; memory misses fall through to the file before Bedrock.
+    """
+
+    def __init__(self, max_entries: int = 2048, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._db = None
+
+        if persist_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(persist_path)), exist_ok=True)
+                self._db = sqlite3.connect(persist_path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+                self._db.commit()
+            except Exception as e:
+                print(f"⚠️ Query embedding cache file unavailable, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(model_id: str, input_type: str, text: str) -> str:
+        """Cache key for one text; the text itself is hashed, not stored."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model_id}:{input_type}:{digest}"
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached embedding (memory first, then the file), or None on a miss."""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return list(vector)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    # e.g. "database is locked" while another worker writes: treat as a miss
+                    print(f"⚠️ Could not read query embedding cache: {e}")
+                    row = None
+                if row is not None:
+                    vector = array("d", row[0]).tolist()
+                    self._store(key, vector)
+                    self._disk_hits += 1
+                    return list(vector)
+
+            self._misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float]):
+        """Cache an embedding in memory and, if configured, in the file."""
+        with self._lock:
+            self._store(key, list(vector))
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                        (key, array("d", vector).tobytes())
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    print(f"⚠️ Could not persist query embedding: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and occupancy for monitoring."""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persist_path": self.persist_path if self._db is not None else None,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def _store(self, key: str, vector: List[float]):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class EmbeddingVectorCache:
+    """
+    On-disk cache of document embeddings for one model and input type.
+
+    Vectors are appended to a raw float32 matrix file and read back through a read-only
+    memory map, so a large cache is not loaded into RAM up front; a parallel file of
+    32-byte SHA-256 digests gives each row's text hash. Appends are guarded by a file
+    lock so several indexing processes can share the same cache directory.
+    """
+
+    DIGEST_SIZE = 32
+
+    def __init__(self, directory: str, model_id: str, input_type: str = "search_document"):
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{model_id}.{input_type}")
+        self.vectors_path = os.path.join(directory, f"{name}.f32")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self.model_id = model_id
+        self.input_type = input_type
+
+        self._lock = threading.Lock()
+        self._dim = None
+        self._rows = {}
+        self._matrix = None
+        self._loaded_rows = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors (read-only views into the memory map) for texts, None where missing."""
+        with self._lock:
+            self._refresh()
+            results = []
+            for text in texts:
+                row = self._rows.get(self._digest(text))
+                if row is None:
+                    self._misses += 1
+                    results.append(None)
+                else:
+                    self._hits += 1
+                    results.append(self._matrix[row])
+            return results
+
+    def add_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Append vectors for texts not cached yet."""
+        if not texts:
+            return
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                digests, rows = [], []
+                for text, vector in zip(texts, vectors):
+                    digest = self._digest(text)
+                    if digest in self._rows or digest in digests:
+                        continue
+                    digests.append(digest)
+                    rows.append(vector)
+                if not rows:
+                    return
+
+                matrix = np.asarray(rows, dtype=np.float32)
+                if self._dim is None:
+                    self._dim = matrix.shape[1]
+                    with open(self.meta_path, "w") as f:
+                        json.dump({"model_id": self.model_id, "input_type": self.input_type, "dim": self._dim}, f)
+                elif matrix.shape[1] != self._dim:
+                    raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match cache dimension {self._dim}")
+
+                # Cut off the tail of an append that was interrupted between the two writes,
+                # so the new digests line up with the new vector rows
+                self._truncate_partial_tail()
+
+                # Vectors first, then digests: a row only becomes visible once both are written
+                with open(self.vectors_path, "ab") as f:
+                    f.write(matrix.tobytes())
+                with open(self.index_path, "ab") as f:
+                    f.write(b"".join(digests))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and size for monitoring."""
+        with self._lock:
+            self._refresh()
+            lookups = self._hits + self._misses
+            return {
+                "rows": self._loaded_rows,
+                "dim": self._dim,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _truncate_partial_tail(self):
+        """Shorten both files to the rows present in both. Caller holds the file lock."""
+        row_bytes = {self.vectors_path: 4 * self._dim, self.index_path: self.DIGEST_SIZE}
+        sizes = {path: os.path.getsize(path) if os.path.exists(path) else 0 for path in row_bytes}
+        rows = min(sizes[path] // size for path, size in row_bytes.items())
+        for path, size in row_bytes.items():
+            if sizes[path] > rows * size:
+                os.truncate(path, rows * size)
+
+    def _refresh(self):
+        """Map rows appended since the last look (by this or another process). Caller holds the lock."""
+        if self._dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path) as f:
+                self._dim = json.load(f)["dim"]
+
+        index_rows = os.path.getsize(self.index_path) // self.DIGEST_SIZE if os.path.exists(self.index_path) else 0
+        vector_rows = os.path.getsize(self.vectors_path) // (4 * self._dim) if os.path.exists(self.vectors_path) else 0
+        rows = min(index_rows, vector_rows)  # ignore a partially written tail
+        if rows == self._loaded_rows:
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._loaded_rows * self.DIGEST_SIZE)
+            data = f.read((rows - self._loaded_rows) * self.DIGEST_SIZE)
+        for offset in range(0, len(data), self.DIGEST_SIZE):
+            self._rows.setdefault(data[offset:offset + self.DIGEST_SIZE], self._loaded_rows + offset // self.DIGEST_SIZE)
+
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+        self._loaded_rows = rows
@@ -1,62 +1,161 @@
 import os
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, PyPDFLoader
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_aws import BedrockEmbeddings
 from langchain_community.vectorstores import Chroma
 import chromadb
 from src.config.model_constants import EMBEDDING_MODEL
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, Docx2txtLoader
+from langchain_community.document_loaders import TextLoader, Docx2txtLoader
 from src.ai_coach.cohere_embeddings import CohereBedrockEmbeddings
-from typing import List
+from src.utils.vector_upsert import upsert_texts
+from src.ai_coach.numpy_retriever import NumpyRetriever, NumpyVectorIndex
+from src.ai_coach.bm25_index import BM25Index, HybridRetriever
+from typing import Iterable, Iterator, List, Tuple
 from langchain_core.documents import Document
 
-def load_and_split_documents(docs_directory):
-    """Load documents from a directory and split them into chunks."""
-    # Create loaders for different file types
-    txt_loader = DirectoryLoader(
-        docs_directory,
-        glob="*.txt",
-        loader_cls=TextLoader
-    )
-    docx_loader = DirectoryLoader(
-        docs_directory,
-        glob="*.docx",
-        loader_cls=Docx2txtLoader
-    )
-    # Add PDF loader
-    pdf_loader = DirectoryLoader(
-        docs_directory,
-        glob="*.pdf",
-        loader_cls=PyPDFLoader
-    )
-    # Load all documents
-    txt_documents = txt_loader.load()
-    docx_documents = docx_loader.load()
-    pdf_documents = pdf_loader.load()  # Load PDF documents
-    documents = txt_documents + docx_documents + pdf_documents  # Add PDFs to the document list
-    print(f"Loaded {len(documents)} files: {len(txt_documents)} .txt, {len(docx_documents)} .docx, and {len(pdf_documents)} .pdf")
-    text_splitter = RecursiveCharacterTextSplitter(
+# Process-wide embedding client and vector stores, shared by every RAG chain in this worker
+_shared_embeddings = None
+_vector_stores = {}
+_numpy_indexes = {}
+_bm25_indexes = {}
+_resource_lock = threading.RLock()
+
+def get_embeddings():
+    """Return the shared Cohere embeddings client, creating it on first use."""
+    global _shared_embeddings
+    if _shared_embeddings is None:
+        with _resource_lock:
+            if _shared_embeddings is None:
+                _shared_embeddings = CohereBedrockEmbeddings(
+                    model_id=EMBEDDING_MODEL,  # "cohere.embed-multilingual-v3"
+                    region_name=os.getenv("AWS_REGION", "us-east-1")
+                )
+    return _shared_embeddings
+
+def get_vector_store(persist_directory="./chroma_db"):
+    """Return the shared Chroma store for a persist directory, opening it only once per worker."""
+    store_key = os.path.abspath(persist_directory)
+    vectordb = _vector_stores.get(store_key)
+    if vectordb is None:
+        with _resource_lock:
+            vectordb = _vector_stores.get(store_key)
+            if vectordb is None:
+                vectordb = Chroma(
+                    persist_directory=persist_directory,
+                    embedding_function=get_embeddings()
+                )
+                _vector_stores[store_key] = vectordb
+    return vectordb
+
+# Marker file touched whenever the index in a persist directory changes
+INDEX_VERSION_FILE = "index_version"
+
+def mark_index_updated(persist_directory="./chroma_db"):
+    """Record that the vector index changed, so caches derived from it can be invalidated."""
+    with open(os.path.join(persist_directory, INDEX_VERSION_FILE), "w") as f:
+        f.write(str(time.time_ns()))
+
+def get_index_version(persist_directory="./chroma_db"):
+    """Current index version of a persist directory (None if it was never marked)."""
+    try:
+        with open(os.path.join(persist_directory, INDEX_VERSION_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+# Supported methodology file types and their loaders
+LOADERS_BY_EXTENSION = {
+    ".txt": TextLoader,
+    ".docx": Docx2txtLoader,
+    ".pdf": PyPDFLoader
+}
+
+def get_text_splitter():
+    """Text splitter shared by every indexing path, so chunk boundaries stay stable."""
+    return RecursiveCharacterTextSplitter(
         chunk_size=400,        # Reduced to stay under 2048 char limit
         chunk_overlap=40,      # Proportionally reduced
-        separators=["\n\n", "\n", ".", " ", ""]
+        separators=["\n\n", "\n", ".", " ", ""],
+        add_start_index=True   # Lets the QA context merge adjacent chunks
     )
-    chunks = text_splitter.split_documents(documents)
+
+def load_and_split_file(file_path):
+    """Load a single supported file and split it into chunks."""
+    loader_cls = LOADERS_BY_EXTENSION[os.path.splitext(file_path)[1].lower()]
+    return get_text_splitter().split_documents(loader_cls(file_path).load())
+
+def iter_source_files(docs_directory) -> Iterator[str]:
+    """Walk docs_directory recursively and yield supported files in a stable order."""
+    for root, dirs, files in os.walk(docs_directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in LOADERS_BY_EXTENSION:
+                yield os.path.abspath(os.path.join(root, name))
+
+def iter_split_files(file_paths: Iterable[str], max_workers=None, max_in_flight=None) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Parse and split files on a process pool, yielding (path, chunks) as each file finishes.
+    At most max_in_flight files are queued or parsing at once, so memory stays bounded by
+    the files in flight rather than the whole corpus. Files that fail to load are skipped.
+    """
+    max_workers = max_workers or int(os.getenv("INDEX_LOADER_WORKERS", "0")) or os.cpu_count() or 1
+    max_in_flight = max_in_flight or max_workers * 2
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        paths = iter(file_paths)
+        exhausted = False
+        
+        while in_flight or not exhausted:
+            # Keep the pool fed without reading ahead more than max_in_flight files
+            while not exhausted and len(in_flight) < max_in_flight:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(load_and_split_file, path)] = path
+            
+            if not in_flight:
+                break
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    chunks = future.result()
+                except Exception as e:
+                    print(f"❌ Could not load {os.path.basename(path)}: {e}")
+                    continue
+                yield path, chunks
+
+def iter_split_documents(docs_directory, max_workers=None, max_in_flight=None) -> Iterator[Document]:
+    """Stream the chunks of every supported file under docs_directory (recursive, parallel parsing)."""
+    for _, chunks in iter_split_files(iter_source_files(docs_directory), max_workers, max_in_flight):
+        yield from chunks
+
+def load_and_split_documents(docs_directory):
+    """Load documents from a directory (recursively) and split them into chunks."""
+    chunks = list(iter_split_documents(docs_directory))
+    print(f"Loaded {len(chunks)} chunks from {docs_directory}")
     return chunks
 
 def initialize_vector_db(chunks, persist_directory="./chroma_db"):
     """Initialize the vector database with document chunks."""
-    # Initialize Bedrock embeddings with Cohere
-    embeddings = CohereBedrockEmbeddings(
-        model_id=EMBEDDING_MODEL,  # "cohere.embed-multilingual-v3"
-        region_name=os.getenv("AWS_REGION", "us-east-1")
-        #model_kwargs={"input_type": "search_document"}  # ADD THIS LINE
+    # Content-hash ids: chunks already in the store are not embedded again
+    vectordb = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=get_embeddings()
     )
-    # Create and persist the vector store
-    vectordb = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=persist_directory
+    upsert_texts(
+        vectordb._collection,
+        get_embeddings(),
+        texts=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks]
     )
+    mark_index_updated(persist_directory)
     return vectordb
 
 ###### DEBUG ######
@@ -64,45 +163,109 @@ def initialize_vector_db(chunks, persist_directory="./chroma_db"):
     
 ################
 
-def get_retriever(persist_directory="./chroma_db"):
-    """Get a retriever from an existing vector database."""
-    # Initialize Bedrock embeddings with Cohere
-    embeddings = CohereBedrockEmbeddings(
-        model_id=EMBEDDING_MODEL,  # "cohere.embed-multilingual-v3"
-        region_name=os.getenv("AWS_REGION", "us-east-1")
-        #model_kwargs={"input_type": "search_document"}  # ADD THIS LINE
+def get_numpy_index(persist_directory="./chroma_db"):
+    """
+    Return the shared in-memory matrix of a persist directory's vectors, loading it once
+    and reloading whenever the index version marker changes.
+    """
+    store_key = os.path.abspath(persist_directory)
+    version = get_index_version(persist_directory)
+    index = _numpy_indexes.get(store_key)
+    if index is None or index.version != version:
+        with _resource_lock:
+            index = _numpy_indexes.get(store_key)
+            if index is None or index.version != version:
+                start = time.perf_counter()
+                index = NumpyVectorIndex.from_collection(get_vector_store(persist_directory)._collection, version)
+                _numpy_indexes[store_key] = index
+                print(f"🧮 Loaded {len(index)} vectors into the NumPy index in {time.perf_counter() - start:.2f}s")
+    return index
+
+def build_bm25_index(persist_directory="./chroma_db"):
+    """Build the BM25 index of a persist directory's chunks from Chroma and save it next to the store."""
+    start = time.perf_counter()
+    index = BM25Index.build_from_collection(
+        get_vector_store(persist_directory)._collection,
+        version=get_index_version(persist_directory)
     )
+    index.save(persist_directory)
+    print(f"🔤 Built BM25 index over {len(index)} chunks ({len(index.postings)} terms) in {time.perf_counter() - start:.2f}s")
+    return index
+
+def get_bm25_index(persist_directory="./chroma_db"):
+    """
+    Return the shared BM25 index of a persist directory: the saved file when it matches the
+    current index version, otherwise rebuilt from the store (and saved again).
+    """
+    store_key = os.path.abspath(persist_directory)
+    version = get_index_version(persist_directory)
+    index = _bm25_indexes.get(store_key)
+    if index is None or index.version != version:
+        with _resource_lock:
+            index = _bm25_indexes.get(store_key)
+            if index is None or index.version != version:
+                index = BM25Index.load(persist_directory)
+                if index is None or index.version != version:
+                    index = build_bm25_index(persist_directory)
+                _bm25_indexes[store_key] = index
+    return index
+
+def get_retriever(persist_directory="./chroma_db", backend=None, hybrid=None, k=4):
+    """
+    Get a retriever from an existing vector database (shared store, per-call retriever wrapper).
+    backend is "chroma" (HNSW search) or "numpy" (exact in-process search); defaults to AI_COACH_RETRIEVER.
+    hybrid fuses the vector results with BM25 keyword search; defaults to AI_COACH_HYBRID_SEARCH.
+    """
+    backend = (backend or os.getenv("AI_COACH_RETRIEVER", "chroma")).lower()
+    if hybrid is None:
+        hybrid = os.getenv("AI_COACH_HYBRID_SEARCH", "false").lower() == "true"
+    fetch_k = int(os.getenv("AI_COACH_HYBRID_FETCH_K", "20")) if hybrid else k
     # Load the existing vector store
     try:
-        vectordb = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=embeddings
-        )
-        return vectordb.as_retriever(search_kwargs={"k": 4})
+        if backend == "numpy":
+            retriever = NumpyRetriever(index=get_numpy_index(persist_directory), embeddings=get_embeddings(), k=fetch_k)
+        else:
+            vectordb = get_vector_store(persist_directory)
+            retriever = vectordb.as_retriever(search_kwargs={"k": fetch_k})
+        if hybrid:
+            retriever = HybridRetriever(
+                vector_retriever=retriever,
+                bm25_index=get_bm25_index(persist_directory),
+                k=k,
+                fetch_k=fetch_k
+            )
+        return retriever
     except Exception as e:
         print(f"Error loading vector database: {e}")
         return None
 
+def batch_retrieve(questions: List[str], k=4, persist_directory="./chroma_db", filter=None, chunk_size=1024) -> List[List[Document]]:
+    """
+    Retrieve the top-k chunks for many questions at once (evaluation runs, cache warmers).
+    Questions are embedded in batched Cohere calls and scored with one matrix product per
+    chunk_size questions against the shared NumPy index, so results are exact.
+    """
+    retriever = NumpyRetriever(index=get_numpy_index(persist_directory), embeddings=get_embeddings(), k=k, filter=filter)
+    results = []
+    for start in range(0, len(questions), chunk_size):
+        results.extend(retriever.retrieve_many(questions[start:start + chunk_size]))
+    return results
+
 def add_to_vector_db(chunks, persist_directory="./chroma_db"):
     """Add document chunks to an existing vector database."""
     try:
-        # Initialize Bedrock embeddings with Cohere
-        embeddings = CohereBedrockEmbeddings(
-            model_id=EMBEDDING_MODEL,  # "cohere.embed-multilingual-v3"
-            region_name=os.getenv("AWS_REGION", "us-east-1")
-            #model_kwargs={"input_type": "search_document"}  # ADD THIS LINE
-        )
         # Load the existing vector store
         try:
-            vectordb = Chroma(
-                persist_directory=persist_directory,
-                embedding_function=embeddings
+            vectordb = get_vector_store(persist_directory)
+            # Add the new chunks to the vector database (content-hash ids, so no duplicates)
+            result = upsert_texts(
+                vectordb._collection,
+                get_embeddings(),
+                texts=[chunk.page_content for chunk in chunks],
+                metadatas=[chunk.metadata for chunk in chunks]
             )
-            # Add the new chunks to the vector database
-            vectordb.add_documents(chunks)
-            # Persist the changes
-            vectordb.persist()
-            print(f"Successfully added {len(chunks)} chunks to the database")
+            mark_index_updated(persist_directory)
+            print(f"Successfully added {result['embedded']} chunks to the database ({result['skipped']} already present)")
             return True
         except Exception as e:
             print(f"Error accessing vector database: {e}")
@@ -0,0 +1,391 @@
+"""
+Incremental indexing of the methodology documents into Chroma.
+
+Indexing runs as a three-stage pipeline with bounded queues between stages: parse
+workers (process pool) -> embedding workers (threads calling Bedrock) -> a single
+Chroma writer, so CPU-bound parsing, network-bound embedding and disk-bound inserts
+overlap.
+
+A manifest stored next to the Chroma files records, for every indexed file, the
+SHA-256 of its bytes and the ids of its chunks. Files are keyed by a docs-root name
+(the docs directory's name unless given) plus their path relative to that directory,
+so moving the directory or indexing from another container does not re-embed
+anything, and two docs directories holding the same relative path never overwrite
+each other's entries. Chunk ids are derived from that key and the chunk content, so
+a sync run:
+  - skips files whose hash is unchanged (no loading, no embedding calls),
+  - embeds only the chunks of new or changed files that are not already stored,
+  - deletes the chunks of changed files that no longer exist, and of removed files.
+
+The manifest is rewritten atomically after each batch of files, and chunks already
+present in Chroma are never re-embedded, so an interrupted run can simply be re-run.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.ai_coach.embeddings import (
+    build_bm25_index,
+    get_embeddings,
+    iter_source_files,
+    iter_split_files,
+    mark_index_updated
+)
+from src.ai_coach.bm25_index import BM25_INDEX_FILE
+from src.utils.vector_upsert import existing_ids, upsert_embeddings
+
+MANIFEST_FILE = "index_manifest.json"
+MANIFEST_VERSION = 3
+
+class IndexManifest:
+    """Per-file content hashes and chunk ids of a Chroma persist directory."""
+
+    def __init__(self, persist_directory: str):
+        self.path = os.path.join(persist_directory, MANIFEST_FILE)
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.files = json.load(f).get("files", {})
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def docs_root_name(docs_dir: str) -> str:
+    """Default docs-root name: the name of the docs directory."""
+    return os.path.basename(os.path.normpath(os.path.abspath(docs_dir)))
+
+def relative_key(path: str, docs_dir: str) -> str:
+    """Path of a file relative to the docs directory, with forward slashes."""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(docs_dir)).replace(os.sep, "/")
+
+def file_key(path: str, docs_dir: str, root: Optional[str] = None) -> str:
+    """Manifest key of a file: "<docs root name>:<path relative to the docs directory>"."""
+    return f"{root or docs_root_name(docs_dir)}:{relative_key(path, docs_dir)}"
+
+def chunk_ids(file_key: str, chunks) -> List[str]:
+    """
+    Deterministic ids: file key + hash of the chunk text and metadata (+ occurrence for repeats).
+    The absolute "source" path is left out of the hash; the file key already identifies the file.
+    """
+    ids = []
+    seen = {}
+    for chunk in chunks:
+        metadata = {k: v for k, v in chunk.metadata.items() if k != "source"}
+        content = chunk.page_content + json.dumps(metadata, sort_keys=True, default=str)
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        occurrence = seen.get(content_hash, 0)
+        seen[content_hash] = occurrence + 1
+        ids.append(hashlib.sha256(f"{file_key}|{content_hash}|{occurrence}".encode("utf-8")).hexdigest()[:40])
+    return ids
+
+def _migrate_legacy_keys(manifest: IndexManifest, docs_dir: str, root: str, paths: Dict[str, str],
+                         hashes: Dict[str, str]) -> int:
+    """
+    Re-key entries of older manifests to "<root>:<relative path>"; their chunks are kept.
+    Version 1 keys (absolute paths) are migrated when they lie under docs_dir. Version 2 keys
+    (relative paths, no root) may come from any docs directory, so they are migrated only when
+    the file under docs_dir has the same content; otherwise they are left alone and never deleted
+    as stale chunks of this directory's file.
+    """
+    docs_root = os.path.abspath(docs_dir) + os.sep
+    migrated = 0
+    for legacy_key in list(manifest.files):
+        if os.path.isabs(legacy_key):
+            if not legacy_key.startswith(docs_root):
+                continue
+            key = file_key(legacy_key, docs_dir, root)
+        elif ":" not in legacy_key:
+            key = f"{root}:{legacy_key}"
+            if key not in paths or hashes.get(key) != manifest.files[legacy_key]["hash"]:
+                continue
+        else:
+            continue
+        manifest.files.setdefault(key, manifest.files[legacy_key])
+        del manifest.files[legacy_key]
+        migrated += 1
+    return migrated
+
+def plan_sync(manifest: IndexManifest, docs_dir: str, remove_missing: bool = True, root: Optional[str] = None) -> Dict:
+    """
+    Compare docs_dir with the manifest and classify files (by key) as added, changed,
+    removed or unchanged. plan["paths"] maps each current key to its file.
+    root names the docs directory in the keys (default: the directory's name).
+    """
+    root = root or docs_root_name(docs_dir)
+    paths = {file_key(path, docs_dir, root): path for path in iter_source_files(docs_dir)}
+    current = {key: hash_file(path) for key, path in paths.items()}
+    migrated = _migrate_legacy_keys(manifest, docs_dir, root, paths, current)
+
+    plan = {"added": [], "changed": [], "removed": [], "unchanged": [], "hashes": current, "paths": paths,
+            "migrated": migrated}
+    for key, file_hash in current.items():
+        entry = manifest.files.get(key)
+        if entry is None:
+            plan["added"].append(key)
+        elif entry["hash"] != file_hash:
+            plan["changed"].append(key)
+        else:
+            plan["unchanged"].append(key)
+
+    if remove_missing:
+        plan["removed"] = sorted(key for key in manifest.files if key not in current)
+    return plan
+
+def print_plan(plan: Dict):
+    print(f"Index plan: {len(plan['added'])} added, {len(plan['changed'])} changed, "
+          f"{len(plan['removed'])} removed, {len(plan['unchanged'])} unchanged")
+    for label in ("added", "changed", "removed"):
+        for key in plan[label]:
+            print(f"  {label:>8}: {key}")
+
+def sync_documents(docs_dir: str, persist_directory: str = "./chroma_db", remove_missing: bool = True,
+                   dry_run: bool = False, batch_size: int = 500, rebuild: bool = False, workers: int = None,
+                   embed_workers: int = 2, queue_size: int = 4, root_name: Optional[str] = None) -> Dict:
+    """
+    Bring the Chroma store in persist_directory in line with the files in docs_dir.
+    rebuild=True first deletes every stored vector (e.g. a store built before the manifest existed).
+    workers sets the number of parsing processes (default: INDEX_LOADER_WORKERS or all cores),
+    embed_workers the number of batches embedded concurrently, queue_size the bound of each
+    inter-stage queue (in batches). root_name names docs_dir in the manifest keys (default:
+    the directory's name); give it when two docs directories share a name.
+    Returns counts of files and chunks added/removed.
+    """
+    from langchain_community.vectorstores import Chroma
+
+    os.makedirs(persist_directory, exist_ok=True)
+    manifest = IndexManifest(persist_directory)
+    vectordb = Chroma(persist_directory=persist_directory, embedding_function=get_embeddings())
+
+    stored_ids = vectordb.get(include=[])["ids"]
+    if rebuild and not dry_run:
+        for i in range(0, len(stored_ids), 5000):
+            vectordb.delete(ids=stored_ids[i:i + 5000])
+        print(f"🗑️ Rebuild: deleted {len(stored_ids)} stored chunks")
+        manifest.files = {}
+        manifest.save()
+    elif not manifest.files and stored_ids:
+        print(f"⚠️ {len(stored_ids)} chunks in {persist_directory} are not tracked by a manifest; "
+              f"run with --rebuild once to avoid duplicates")
+
+    plan = plan_sync(manifest, docs_dir, remove_missing, root_name)
+    print_plan(plan)
+    if plan["migrated"] and not dry_run:
+        manifest.save()
+
+    summary = {
+        "files_added": len(plan["added"]),
+        "files_changed": len(plan["changed"]),
+        "files_removed": len(plan["removed"]),
+        "files_unchanged": len(plan["unchanged"]),
+        "chunks_embedded": 0,
+        "chunks_deleted": 0
+    }
+    if dry_run:
+        return summary
+    if not (plan["added"] or plan["changed"] or plan["removed"]):
+        if not os.path.exists(os.path.join(persist_directory, BM25_INDEX_FILE)):
+            build_bm25_index(persist_directory)
+        return summary
+
+    # Removed files: drop their chunks, then forget them
+    for key in plan["removed"]:
+        ids = manifest.files[key]["chunks"]
+        if ids:
+            vectordb.delete(ids=ids)
+        summary["chunks_deleted"] += len(ids)
+        del manifest.files[key]
+        manifest.save()
+
+    # New and changed files go through the parse -> embed -> write pipeline
+    if plan["added"] or plan["changed"]:
+        _run_pipeline(
+            vectordb, manifest, plan, summary,
+            batch_size=batch_size,
+            parse_workers=workers,
+            embed_workers=embed_workers,
+            queue_size=queue_size
+        )
+
+    mark_index_updated(persist_directory)
+    build_bm25_index(persist_directory)
+    print(f"✅ Index synced: {summary['chunks_embedded']} chunks embedded, {summary['chunks_deleted']} chunks deleted")
+    return summary
+
+_DONE = object()
+
+class _StageStats:
+    """Throughput and downstream queue depth of one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.chunks = 0
+        self.busy_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, chunks: int, seconds: float, out_queue: "queue.Queue" = None):
+        with self._lock:
+            self.batches += 1
+            self.chunks += chunks
+            self.busy_seconds += seconds
+            if out_queue is not None:
+                depth = out_queue.qsize()
+                self.depth_samples += 1
+                self.depth_total += depth
+                self.max_depth = max(self.max_depth, depth)
+
+    def report(self, wall_seconds: float) -> str:
+        rate = self.chunks / wall_seconds if wall_seconds else 0.0
+        depth = f", out queue avg {self.depth_total / self.depth_samples:.1f} / max {self.max_depth}" if self.depth_samples else ""
+        return (f"  {self.name:>6}: {self.batches} batches, {self.chunks} chunks, "
+                f"{rate:.1f} chunks/s, busy {self.busy_seconds:.1f}s{depth}")
+
+def _run_pipeline(vectordb, manifest: IndexManifest, plan: Dict, summary: Dict, batch_size: int,
+                  parse_workers: int, embed_workers: int, queue_size: int):
+    embeddings = get_embeddings()
+    embed_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    stats = {name: _StageStats(name) for name in ("parse", "embed", "write")}
+
+    def put(q, item):
+        # Bounded put that gives up once the pipeline is stopping
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def parse_stage():
+        try:
+            batch = {"files": [], "chunks": [], "ids": []}
+            started = time.perf_counter()
+            keys = {plan["paths"][key]: key for key in plan["added"] + plan["changed"]}
+            for path, chunks in iter_split_files(list(keys), max_workers=parse_workers):
+                if stop.is_set():
+                    return
+                ids = chunk_ids(keys[path], chunks)
+                batch["files"].append((keys[path], ids))
+                batch["chunks"].extend(chunks)
+                batch["ids"].extend(ids)
+                if len(batch["chunks"]) >= batch_size:
+                    stats["parse"].record(len(batch["chunks"]), time.perf_counter() - started, embed_queue)
+                    if not put(embed_queue, batch):
+                        return
+                    batch = {"files": [], "chunks": [], "ids": []}
+                    started = time.perf_counter()
+            if batch["files"]:
+                stats["parse"].record(len(batch["chunks"]), time.perf_counter() - started, embed_queue)
+                put(embed_queue, batch)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for _ in range(embed_workers):
+                put(embed_queue, _DONE)
+
+    def embed_stage():
+        try:
+            while not stop.is_set():
+                try:
+                    batch = embed_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if batch is _DONE:
+                    break
+                started = time.perf_counter()
+                # Chunks stored by an interrupted run are not embedded again
+                existing = existing_ids(vectordb._collection, batch["ids"])
+                batch["new"] = [i for i, chunk_id in enumerate(batch["ids"]) if chunk_id not in existing]
+                texts = [batch["chunks"][i].page_content for i in batch["new"]]
+                batch["vectors"] = embeddings.embed_documents(texts) if texts else []
+                stats["embed"].record(len(texts), time.perf_counter() - started, write_queue)
+                if not put(write_queue, batch):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(write_queue, _DONE)
+
+    threads = [threading.Thread(target=parse_stage, name="index-parse", daemon=True)]
+    threads += [threading.Thread(target=embed_stage, name=f"index-embed-{i}", daemon=True) for i in range(embed_workers)]
+    wall_started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Single writer: Chroma inserts and manifest updates happen on this thread only
+    finished_embedders = 0
+    try:
+        while finished_embedders < embed_workers:
+            try:
+                batch = write_queue.get(timeout=0.5)
+            except queue.Empty:
+                if stop.is_set() and not any(thread.is_alive() for thread in threads[1:]):
+                    break
+                continue
+            if batch is _DONE:
+                finished_embedders += 1
+                continue
+
+            started = time.perf_counter()
+            if batch["new"]:
+                new_chunks = [batch["chunks"][i] for i in batch["new"]]
+                upsert_embeddings(
+                    vectordb._collection,
+                    ids=[batch["ids"][i] for i in batch["new"]],
+                    embeddings=batch["vectors"],
+                    documents=[chunk.page_content for chunk in new_chunks],
+                    metadatas=[chunk.metadata for chunk in new_chunks]
+                )
+                summary["chunks_embedded"] += len(new_chunks)
+
+            for key, ids in batch["files"]:
+                previous = manifest.files.get(key, {}).get("chunks", [])
+                stale = sorted(set(previous) - set(ids))
+                if stale:
+                    vectordb.delete(ids=stale)
+                    summary["chunks_deleted"] += len(stale)
+                manifest.files[key] = {"hash": plan["hashes"][key], "chunks": ids}
+            manifest.save()
+            stats["write"].record(len(batch["new"]), time.perf_counter() - started)
+
+            print(f"  indexed {len(batch['files'])} files ({summary['chunks_embedded']} chunks embedded so far)")
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=5)
+
+    wall_seconds = time.perf_counter() - wall_started
+    print(f"Pipeline finished in {wall_seconds:.1f}s")
+    for stage in stats.values():
+        print(stage.report(wall_seconds))
+    if getattr(embeddings, "vector_cache", None) is not None:
+        print(f"  vector cache: {embeddings.vector_cache_stats()}")
+
+    if errors:
+        raise errors[0]
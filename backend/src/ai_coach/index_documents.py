@@ -1,7 +1,7 @@
 # index_documents.py
 import os
 import argparse
-from src.ai_coach.embeddings import load_and_split_documents, initialize_vector_db
+from src.ai_coach.incremental_index import sync_documents
 
 def main():
     parser = argparse.ArgumentParser(description='Index RLC methodology documents')
@@ -14,17 +14,10 @@ def main():
         print(f"Error: Documents directory '{args.docs_dir}' does not exist")
         return
     
-    # Create the database directory if it doesn't exist
-    os.makedirs(args.db_dir, exist_ok=True)
-    
-    print(f"Loading documents from {args.docs_dir}...")
-    chunks = load_and_split_documents(args.docs_dir)
-    print(f"Loaded {len(chunks)} document chunks")
-    
-    print(f"Initializing vector database in {args.db_dir}...")
-    vectordb = initialize_vector_db(chunks, args.db_dir)
-    vectordb.persist()
+    # Incremental: only new or changed files are embedded, removed files are dropped
+    print(f"Syncing documents from {args.docs_dir} into {args.db_dir}...")
+    sync_documents(args.docs_dir, args.db_dir)
     print("Vector database created and persisted successfully")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
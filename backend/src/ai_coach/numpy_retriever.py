@@ -0,0 +1,160 @@
+"""
+Exact in-process vector search for the small methodology corpus.
+
+All vectors of a Chroma store are loaded once into a contiguous, L2-normalised float32
+matrix; a query is one matrix-vector product plus argpartition for the top k. The
+index reloads itself when the store's index version marker changes.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+_COMPARISONS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand
+}
+
+def _validate_where(where: Dict):
+    """
+    Raise ValueError for any operator _matches does not implement; ignoring it would
+    return unfiltered hits where Chroma would have applied the filter.
+    """
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                _validate_where(clause)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        elif isinstance(condition, dict):
+            for op in condition:
+                if op not in _COMPARISONS:
+                    raise ValueError(f"Unsupported where operator for {key!r}: {op}")
+
+def _matches(metadata: Optional[Dict], where: Dict) -> bool:
+    """Chroma's metadata where syntax: equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, and $and/$or."""
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                try:
+                    if not _COMPARISONS[op](value, operand):
+                        return False
+                except TypeError:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+class NumpyVectorIndex:
+    """Normalised embedding matrix plus documents and metadata of one Chroma collection."""
+
+    def __init__(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Optional[Dict]], version=None):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if len(ids):
+            matrix = np.ascontiguousarray(matrix.reshape(len(ids), -1))
+        else:
+            # Empty collection: keep the dimension if known; search returns no hits
+            matrix = np.zeros((0, matrix.shape[-1] if matrix.ndim == 2 else 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.version = version
+        self._masks: Dict[str, np.ndarray] = {}
+        self._masks_lock = threading.Lock()
+
+    @classmethod
+    def from_collection(cls, collection, version=None) -> "NumpyVectorIndex":
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = data["embeddings"] if data["embeddings"] is not None and len(data["ids"]) else np.zeros((0, 0))
+        return cls(data["ids"], embeddings, data["documents"], data["metadatas"], version)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _mask(self, where: Dict) -> np.ndarray:
+        key = json.dumps(where, sort_keys=True, default=str)
+        with self._masks_lock:
+            mask = self._masks.get(key)
+            if mask is None:
+                mask = np.fromiter((_matches(metadata, where) for metadata in self.metadatas), dtype=bool, count=len(self.ids))
+                if len(self._masks) >= 64:
+                    self._masks.clear()
+                self._masks[key] = mask
+            return mask
+
+    def search(self, query_vectors, k: int = 4, where: Optional[Dict] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k (row, cosine similarity) pairs for each query vector, best first.
+        Accepts a single vector or a (n_queries, dim) matrix.
+        """
+        if where:
+            _validate_where(where)
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if not len(self.ids):
+            return [[] for _ in range(len(queries))]
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (queries / norms) @ self.matrix.T
+
+        if where:
+            scores[:, ~self._mask(where)] = -np.inf
+
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(int(i), float(scores[row, i])) for i in ordered if np.isfinite(scores[row, i])])
+        return results
+
+    def to_documents(self, hits: List[Tuple[int, float]]) -> List[Document]:
+        return [Document(page_content=self.documents[i], metadata=self.metadatas[i] or {}) for i, _ in hits]
+
+class NumpyRetriever(BaseRetriever):
+    """LangChain retriever over a NumpyVectorIndex (exact cosine search)."""
+
+    index: Any
+    embeddings: Embeddings
+    k: int = 4
+    filter: Optional[Dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        hits = self.index.search(self.embeddings.embed_query(query), k=self.k, where=self.filter)[0]
+        return self.index.to_documents(hits)
+
+    def retrieve_many(self, queries: List[str], k: Optional[int] = None) -> List[List[Document]]:
+        """Top-k documents for every query: one batched embedding call and one matrix-matrix product."""
+        if not queries:
+            return []
+        if hasattr(self.embeddings, "embed_queries"):
+            vectors = self.embeddings.embed_queries(queries)
+        else:
+            vectors = [self.embeddings.embed_query(query) for query in queries]
+        results = self.index.search(vectors, k=k or self.k, where=self.filter)
+        return [self.index.to_documents(hits) for hits in results]
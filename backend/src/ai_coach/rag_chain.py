@@ -1,8 +1,12 @@
 from langchain.chains import ConversationalRetrievalChain
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain_core.prompts import format_document
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from .bedrock_llm import get_bedrock_llm
+from .bedrock_llm import get_bedrock_llm, get_condense_llm
+from .condense_policy import CondenseQuestionChain, get_chat_history_with_metrics, get_condense_policy
 from .embeddings import get_retriever
+from .context_packing import wrap_with_context_packing
 
 # Custom prompt for the RLC Coach
 CONDENSE_QUESTION_PROMPT = PromptTemplate.from_template("""
@@ -92,21 +96,43 @@ Question: {question}
 Answer:
 """)
 
-def create_rag_chain(persist_directory="./chroma_db", model_id=None):
-    """Create a RAG chain for answering RLC methodology questions."""
-    # Initialize retriever
+def create_conversation_memory(chat_memory=None):
+    """
+    Create the per-conversation memory object (the only state kept per conversation).
+    Pass a chat_memory (e.g. a StoredChatMessageHistory) to back it with a shared store.
+    """
+    if chat_memory is None:
+        return ConversationBufferMemory(
+            memory_key="chat_history",
+            output_key="answer",
+            return_messages=True
+        )
+    return ConversationBufferMemory(
+        chat_memory=chat_memory,
+        memory_key="chat_history",
+        output_key="answer",
+        return_messages=True
+    )
+
+def create_rag_chain(persist_directory="./chroma_db", model_id=None, memory=None):
+    """
+    Create a RAG chain for answering RLC methodology questions.
+    The retriever and LLM are process-wide shared clients; only the memory belongs to the chain.
+    """
+    # Initialize retriever (shared vector store)
     retriever = get_retriever(persist_directory=persist_directory)
     
     if not retriever:
         raise ValueError("Vector database could not be initialized")
     
+    # Merge adjacent chunks, drop near-duplicates and pack to the context token budget
+    retriever = wrap_with_context_packing(retriever)
+    
     # Initialize memory
-    memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True
-    )
+    if memory is None:
+        memory = create_conversation_memory()
     
-    # Initialize LLM
+    # Shared LLM client
     llm = get_bedrock_llm(model_id)
     
     # Create the conversational chain
@@ -115,7 +141,57 @@ def create_rag_chain(persist_directory="./chroma_db", model_id=None):
         retriever=retriever,
         memory=memory,
         condense_question_prompt=CONDENSE_QUESTION_PROMPT,
-        combine_docs_chain_kwargs={"prompt": QA_PROMPT}
+        condense_question_llm=get_condense_llm(),
+        combine_docs_chain_kwargs={"prompt": QA_PROMPT},
+        return_source_documents=True,
+        get_chat_history=get_chat_history_with_metrics
     )
     
-    return chain
\ No newline at end of file
+    # Only condense follow-ups that need it (AI_COACH_CONDENSE_POLICY)
+    chain.question_generator = CondenseQuestionChain(
+        llm_chain=chain.question_generator,
+        policy=get_condense_policy()
+    )
+    
+    return chain
+
+def stream_rag_chain(chain, question):
+    """
+    Run a conversational RAG chain step by step, streaming the answer.
+    Uses the chain's own memory, question generator, retriever and QA prompt, so the
+    result matches chain({"question": ...}). Yields, in order:
+        ("sources", documents) once retrieval is done,
+        ("token", text) for each streamed chunk,
+        ("answer", full_answer) after the turn has been saved to memory.
+    """
+    # Condense the follow-up into a standalone question (per the condense policy; skipped for a new conversation)
+    chat_history = chain.memory.load_memory_variables({})[chain.memory.memory_key]
+    get_chat_history = chain.get_chat_history or _get_chat_history
+    chat_history_str = get_chat_history(chat_history)
+    if chat_history_str:
+        new_question = chain.question_generator.run(question=question, chat_history=chat_history_str)
+    else:
+        new_question = question
+    
+    docs = chain.retriever.invoke(new_question)
+    yield "sources", docs
+    
+    # Build the same "stuff" prompt the combine_docs_chain would send
+    combine_docs_chain = chain.combine_docs_chain
+    context = combine_docs_chain.document_separator.join(
+        format_document(doc, combine_docs_chain.document_prompt) for doc in docs
+    )
+    prompt_value = combine_docs_chain.llm_chain.prompt.format_prompt(**{
+        combine_docs_chain.document_variable_name: context,
+        "question": new_question if chain.rephrase_question else question
+    })
+    
+    answer_parts = []
+    for chunk in combine_docs_chain.llm_chain.llm.stream(prompt_value):
+        if chunk.content:
+            answer_parts.append(chunk.content)
+            yield "token", chunk.content
+    
+    answer = "".join(answer_parts)
+    chain.memory.save_context({"question": question}, {"answer": answer})
+    yield "answer", answer
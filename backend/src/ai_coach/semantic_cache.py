@@ -0,0 +1,150 @@
+"""
+Semantic answer cache for first-turn AI Coach questions.
+
+Answers are keyed by the question embedding: a new question whose cosine similarity
+to a cached one is above the threshold (within the TTL) reuses that answer instead of
+running retrieval and a full LLM call. Entries are scoped per tenant and tagged with
+the methodology index version, so re-indexing the Chroma store invalidates them.
+The cache lives in the worker process; each worker warms its own copy.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+class SemanticAnswerCache:
+    """Bounded per-scope cache of (question embedding -> answer) with similarity lookup."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        threshold: float = 0.95,
+        ttl_seconds: Optional[float] = 86400,
+        max_entries_per_scope: int = 500
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+
+        # scope -> list of entries, oldest first
+        self._entries: Dict[str, List[Dict]] = defaultdict(list)
+        self._index_version = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "tokens_saved": 0}
+        )
+        self._invalidations = 0
+
+    def lookup(self, scope: str, embedding: List[float], index_version=None) -> Optional[Dict]:
+        """Return the most similar live entry for scope above the threshold, or None."""
+        query = _normalize(embedding)
+        with self._lock:
+            self._check_index_version(index_version)
+            entries = self._purge_expired(scope)
+
+            best_entry, best_score = None, -1.0
+            if entries:
+                matrix = np.vstack([entry["embedding"] for entry in entries])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                best_entry, best_score = entries[best], float(scores[best])
+
+            if best_entry is None or best_score < self.threshold:
+                self._stats[scope]["misses"] += 1
+                return None
+
+            self._stats[scope]["hits"] += 1
+            return {
+                "question": best_entry["question"],
+                "answer": best_entry["answer"],
+                "sources": best_entry["sources"],
+                "similarity": round(best_score, 4)
+            }
+
+    def add(self, scope: str, embedding: List[float], question: str, answer: str, sources: List[Dict], index_version=None):
+        """Cache an answer for scope, dropping the oldest entries beyond the per-scope limit."""
+        with self._lock:
+            self._check_index_version(index_version)
+            entries = self._entries[scope]
+            entries.append({
+                "embedding": _normalize(embedding),
+                "question": question,
+                "answer": answer,
+                "sources": sources,
+                "created_at": time.monotonic()
+            })
+            if len(entries) > self.max_entries_per_scope:
+                del entries[:len(entries) - self.max_entries_per_scope]
+
+    def record_tokens_saved(self, scope: str, tokens: int):
+        """Credit scope with the tokens a cache hit avoided."""
+        with self._lock:
+            self._stats[scope]["tokens_saved"] += tokens
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self, scope: Optional[str] = None) -> Dict:
+        """Hit rate and tokens saved per scope (or for one scope)."""
+        with self._lock:
+            scopes = [scope] if scope is not None else sorted(set(self._stats) | set(self._entries))
+            per_scope = {}
+            for name in scopes:
+                counts = self._stats.get(name, {"hits": 0, "misses": 0, "tokens_saved": 0})
+                lookups = counts["hits"] + counts["misses"]
+                per_scope[name] = {
+                    "entries": len(self._entries.get(name, [])),
+                    "hits": counts["hits"],
+                    "misses": counts["misses"],
+                    "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+                    "tokens_saved": counts["tokens_saved"]
+                }
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries_per_scope": self.max_entries_per_scope,
+                "index_version": self._index_version,
+                "invalidations": self._invalidations,
+                "scopes": per_scope
+            }
+
+    # Internal helpers (caller holds the lock)
+
+    def _check_index_version(self, index_version):
+        if index_version != self._index_version:
+            if self._entries:
+                print("🔄 Methodology index changed, clearing semantic answer cache")
+                self._invalidations += 1
+            self._entries.clear()
+            self._index_version = index_version
+
+    def _purge_expired(self, scope: str) -> List[Dict]:
+        entries = self._entries.get(scope, [])
+        if self.ttl_seconds is not None and entries:
+            cutoff = time.monotonic() - self.ttl_seconds
+            entries[:] = [entry for entry in entries if entry["created_at"] >= cutoff]
+        return entries
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def get_semantic_answer_cache() -> SemanticAnswerCache:
+    """Build the cache from AI_COACH_SEMANTIC_CACHE* settings (disabled unless opted in)."""
+    ttl = float(os.getenv("AI_COACH_SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+    return SemanticAnswerCache(
+        enabled=os.getenv("AI_COACH_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes"),
+        threshold=float(os.getenv("AI_COACH_SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        ttl_seconds=ttl if ttl > 0 else None,
+        max_entries_per_scope=int(os.getenv("AI_COACH_SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+    )
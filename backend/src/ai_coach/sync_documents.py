@@ -0,0 +1,39 @@
+# sync_documents.py
+import os
+import argparse
+from src.ai_coach.incremental_index import sync_documents
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally sync RLC methodology documents into the vector database')
+    parser.add_argument('--docs_dir', type=str, required=True, help='Directory containing RLC documents')
+    parser.add_argument('--db_dir', type=str, default='./chroma_db', help='Directory to store the vector database')
+    parser.add_argument('--root_name', type=str, default=None, help='Name of docs_dir in the index manifest (default: the directory name)')
+    parser.add_argument('--keep_missing', action='store_true', help='Keep chunks of files that are no longer in docs_dir')
+    parser.add_argument('--batch_size', type=int, default=500, help='Chunks per embedding/write batch')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel document parsing processes (default: all cores)')
+    parser.add_argument('--embed_workers', type=int, default=2, help='Chunk batches embedded concurrently')
+    parser.add_argument('--queue_size', type=int, default=4, help='Batches buffered between pipeline stages')
+    parser.add_argument('--rebuild', action='store_true', help='Delete every stored chunk and re-index from scratch')
+    parser.add_argument('--dry_run', action='store_true', help='Only print the plan')
+    args = parser.parse_args()
+    
+    # Check if the documents directory exists
+    if not os.path.exists(args.docs_dir):
+        print(f"Error: Documents directory '{args.docs_dir}' does not exist")
+        return
+    
+    sync_documents(
+        args.docs_dir,
+        args.db_dir,
+        remove_missing=not args.keep_missing,
+        dry_run=args.dry_run,
+        batch_size=args.batch_size,
+        rebuild=args.rebuild,
+        workers=args.workers,
+        embed_workers=args.embed_workers,
+        queue_size=args.queue_size,
+        root_name=args.root_name
+    )
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,13 @@ LLAMA_MODEL_KWARGS = {
     "max_tokens": 4000
 }
 
+# Model configuration for condensing follow-up questions (short output)
+CONDENSE_MODEL_KWARGS = {
+    "temperature": 0,
+    "top_p": 0.9,
+    "max_tokens": 256
+}
+
 # Model configuration for Cohere embeddings
 COHERE_EMBEDDING_KWARGS = {
     "input_type": "search_document",  # For document indexing
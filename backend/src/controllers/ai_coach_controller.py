@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, status
-from typing import Optional
-from src.services.ai_coach_service import ask_ai_coach, clear_conversation_memory, get_active_conversations
+from fastapi.responses import StreamingResponse
+from typing import Optional, List
+from src.services.ai_coach_service import ask_ai_coach, stream_ai_coach, clear_conversation_memory, get_active_conversations, record_semantic_cache_savings, get_semantic_cache_stats
 from src.utils.auth import get_current_user
+from src.utils.metrics import metrics
+from src.ai_coach.embeddings import get_embeddings
+from src.utils.cross_account_client import CrossAccountClient
+from src.utils.sse import format_sse, SSE_HEADERS
 from src.services.token_usage_service import token_logger
 from src.config.model_constants import LLM_MODEL
 from pydantic import BaseModel
@@ -19,6 +24,8 @@ class AICoachResponse(BaseModel):
     conversation_id: str
     model_used: str  # Always shows the standardized model
     token_info: Optional[dict] = None  # Token usage info
+    sources: Optional[List[dict]] = None  # Metadata of the retrieved documents
+    cache_hit: bool = False  # Answer served from the semantic answer cache
 
 class ClearConversationRequest(BaseModel):
     conversation_id: str
@@ -95,7 +102,18 @@ async def ask_question(
         
         # Enhanced token logging for tenant users with accurate counting
         token_info = None
-        if user_tenant_id:
+        if response.get("cache_hit"):
+            # No LLM call was made: nothing to bill, credit the tokens saved instead
+            tokens_saved = token_logger.estimate_tokens(data.question) + token_logger.estimate_tokens(response["answer"])
+            record_semantic_cache_savings(user_tenant_id, tokens_saved)
+            token_info = {
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+                "tokens_saved": tokens_saved,
+                "cache_similarity": response.get("cache_similarity")
+            }
+        elif user_tenant_id:
             # Use enhanced logging method with precise token counting
             token_info = await token_logger.log_llm_usage_from_texts(
                 tenant_id=user_tenant_id,
@@ -129,7 +147,9 @@ async def ask_question(
             answer=response["answer"],
             conversation_id=response.get("conversation_id", data.conversation_id or "default"),
             model_used=standardized_model,
-            token_info=token_info  # 🎯 Now clean of ObjectIds
+            token_info=token_info,  # 🎯 Now clean of ObjectIds
+            sources=response.get("sources"),
+            cache_hit=response.get("cache_hit", False)
         )
         
     except HTTPException:
@@ -140,6 +160,129 @@ async def ask_question(
             detail=f"Error processing AI Coach request: {str(e)}"
         )
 
+@router.post("/ask/stream")
+async def ask_question_stream(
+    data: AICoachQuestion,
+    current_user = Depends(get_current_user)
+):
+    """
+    Streaming variant of /ask (Server-Sent Events).
+    Emits a "sources" event with the retrieved documents' metadata, then "token" events
+    as the answer is generated, and a final "done" event with the full answer, timings
+    and token usage. Errors after the stream has started arrive as an "error" event.
+    Same tenant isolation and quota enforcement as /ask.
+    """
+    user_tenant_id = current_user.tenant_id
+    
+    # For non-super admin users, tenant_id is MANDATORY
+    if current_user.role != "super_admin" and not user_tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": "Tenant assignment required",
+                "message": "AI Coach access requires tenant assignment. Please contact your administrator.",
+                "user_role": current_user.role,
+                "isolation_enforced": True
+            }
+        )
+    
+    # Check quota before streaming starts (only for tenant users)
+    if user_tenant_id:
+        from src.services.tenant_quota_service import quota_manager
+        
+        estimated_tokens = token_logger.estimate_tokens(data.question) * 2  # Question + expected response
+        
+        quota_check = await quota_manager.check_token_quota(user_tenant_id, estimated_tokens)
+        
+        if not quota_check["allowed"]:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Token quota exceeded",
+                    "message": quota_check["message"],
+                    "current_usage": quota_check["current_usage"],
+                    "limit": quota_check["limit"]
+                }
+            )
+    
+    if user_tenant_id:
+        print(f"🔒 AI Coach stream request from tenant {user_tenant_id}: {data.conversation_id}")
+    else:
+        print(f"🔓 AI Coach stream request from super admin: {current_user.username}")
+    
+    async def event_stream():
+        try:
+            async for event in stream_ai_coach(
+                question=data.question,
+                conversation_id=data.conversation_id,
+                tenant_id=user_tenant_id,  # ENFORCED: Pass tenant_id for isolation
+                user_email=current_user.username  # ENFORCED: Pass user_email for complete isolation
+            ):
+                if event["event"] == "done":
+                    # Token accounting once the full answer is known
+                    token_info = None
+                    if user_tenant_id:
+                        token_info = await token_logger.log_llm_usage_from_texts(
+                            tenant_id=user_tenant_id,
+                            user_email=current_user.username,
+                            endpoint="/ai-coach/ask/stream",
+                            input_text=data.question,
+                            output_text=event["data"]["answer"],
+                            model=LLM_MODEL
+                        )
+                        token_info["isolation_confirmed"] = True
+                        token_info["tenant_id"] = user_tenant_id
+                    event["data"]["token_info"] = token_info
+                
+                yield format_sse(event["event"], event["data"])
+                
+        except Exception as e:
+            print(f"Error in AI Coach stream: {e}")
+            yield format_sse("error", {
+                "error": "An error occurred while processing your question.",
+                "details": str(e)
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/semantic-cache/stats")
+async def get_semantic_cache_statistics(current_user = Depends(get_current_user)):
+    """
+    Semantic answer cache hit rate and tokens saved.
+    Super admins see every tenant; tenant users see only their own tenant.
+    """
+    user_tenant_id = current_user.tenant_id
+    
+    if current_user.role != "super_admin" and not user_tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Tenant assignment required"
+        )
+    
+    return get_semantic_cache_stats(None if current_user.role == "super_admin" else user_tenant_id)
+
+@router.get("/metrics")
+async def get_ai_coach_metrics(current_user = Depends(get_current_user)):
+    """
+    Get in-process AI Coach metrics for this worker (super_admin only):
+    counters, latency percentiles such as streaming time-to-first-token,
+    query embedding cache hit/miss counters, and the cached tenant AWS sessions.
+    """
+    if current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can view AI Coach metrics"
+        )
+    
+    snapshot = metrics.snapshot()
+    snapshot["query_embedding_cache"] = get_embeddings().query_cache_stats()
+    snapshot["tenant_client_cache"] = CrossAccountClient.get_client_cache_stats()
+    return snapshot
+
 @router.post("/clear")
 async def clear_conversation(
     data: ClearConversationRequest,
@@ -252,7 +395,8 @@ async def get_conversation_history(
         # Get conversation history with ENFORCED tenant isolation
         history = get_conversation_history(
             conversation_id=conversation_id,
-            tenant_id=user_tenant_id  # ENFORCED: Pass tenant_id for isolation
+            tenant_id=user_tenant_id,  # ENFORCED: Pass tenant_id for isolation
+            user_email=current_user.username  # ENFORCED: Same user-scoped key as /ask
         )
         
         return {
@@ -7,8 +7,8 @@ Maintains API compatibility while adding complete tenant isolation.
 
 import os
 import tempfile
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
 from typing import List, Dict
 from pydantic import BaseModel
 
@@ -25,6 +25,7 @@ from src.services.archive_service import (
     search_archive
 )
 from src.utils.auth import get_current_user
+from src.utils.s3_transfer import iter_s3_body
 
 router = APIRouter()
 
@@ -123,15 +124,23 @@ async def upload_document(
             detail=f"Upload failed: {str(e)}"
         )
 
+# Documents at least this large are redirected to a presigned S3 URL (0 = always stream)
+VIEW_REDIRECT_MIN_BYTES = int(float(os.getenv("ARCHIVE_VIEW_REDIRECT_MIN_MB", "0")) * 1024 * 1024)
+
 @router.get("/projects/{project_id}/documents/{document_id}/view", status_code=status.HTTP_200_OK)
 async def view_document(
     project_id: str,
     document_id: str,
+    request: Request,
+    redirect: bool = False,
     current_user = Depends(get_current_user)
 ):
     """
     Get a document file for viewing.
     NOW TENANT-SCOPED: Only retrieves documents from tenant's S3 bucket.
+    The file is streamed from S3 in chunks and honours a single HTTP Range, so PDF
+    viewers can fetch pages on demand. With redirect=true (or for files above
+    ARCHIVE_VIEW_REDIRECT_MIN_MB) the response redirects to a short-lived presigned URL.
     """
     try:
         if not current_user.tenant_id:
@@ -140,39 +149,57 @@ async def view_document(
                 detail="User must be assigned to a tenant to view documents"
             )
         
-        # Get document content from tenant's S3 bucket
-        content = await tenant_archive_service.get_document_content(
+        # Document record (filename, S3 location) from the tenant's project
+        document = tenant_archive_service.get_document_record(
             project_id, 
             document_id, 
             current_user.tenant_id
         )
         
-        if content is None:
+        if document is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Document not found or access denied"
             )
         
-        # Get document metadata for filename
-        projects = await get_all_projects(tenant_id=current_user.tenant_id)
-        document_filename = "document"
+        document_filename = document.get("filename", "document")
         
-        for project in projects:
-            if str(project.get("_id")) == project_id:
-                for doc in project.get("documents", []):
-                    if doc.get("_id") == document_id:
-                        document_filename = doc.get("filename", "document")
-                        break
-                break
+        file_size = document.get("file_size") or 0
+        if redirect or (VIEW_REDIRECT_MIN_BYTES and file_size >= VIEW_REDIRECT_MIN_BYTES):
+            url = tenant_archive_service.get_document_download_url(document)
+            if url:
+                return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
         
-        # Return document as streaming response
-        def iter_content():
-            yield content
+        # Open the S3 object (or the requested byte range) without reading it
+        stream = await tenant_archive_service.open_document_stream(document, request.headers.get("range"))
         
+        if stream is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found or access denied"
+            )
+        
+        if stream.get("range_not_satisfiable"):
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{file_size}"} if file_size else None
+            )
+        
+        headers = {
+            "Content-Disposition": f"inline; filename={document_filename}",
+            "Accept-Ranges": "bytes"
+        }
+        if stream["content_length"] is not None:
+            headers["Content-Length"] = str(stream["content_length"])
+        if stream["partial"]:
+            headers["Content-Range"] = stream["content_range"]
+        
+        # Return document as streaming response
         return StreamingResponse(
-            iter_content(),
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"inline; filename={document_filename}"}
+            iter_s3_body(stream["body"]),
+            status_code=status.HTTP_206_PARTIAL_CONTENT if stream["partial"] else status.HTTP_200_OK,
+            media_type=stream["content_type"],
+            headers=headers
         )
         
     except HTTPException:
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Body, HTTPException, status
+from fastapi.responses import StreamingResponse
 from src.utils.auth import get_current_user
-from src.services.report_ai_service import process_kg_message, evaluate_kg_report, process_kd_message, evaluate_kd_report
+from src.services.report_ai_service import process_kg_message, evaluate_kg_report, process_kd_message, evaluate_kd_report, stream_report_message, stream_report_evaluation
 from src.services.archive_service import search_archive, get_all_projects
 from src.ai_coach.bedrock_llm import get_bedrock_llm
 from src.utils.quota_decorator import log_tokens_manually
+from src.utils.llm_executor import run_llm_call
+from src.utils.sse import format_sse, SSE_HEADERS
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -261,6 +264,219 @@ async def evaluate_report_endpoint(
     return result
     
 
+@router.post("/message/stream")
+async def process_report_message_stream(
+    data: ReportMessageRequest, 
+    current_user = Depends(get_current_user)
+):
+    """
+    Streaming variant of /message (Server-Sent Events).
+    Emits "token" events as the answer is generated and a final "done" event with the
+    full answer, session info and token usage. The assistant message is appended to the
+    report session and tokens are logged once the stream completes.
+    Same tenant isolation and quota enforcement as /message.
+    """
+    user_tenant_id = current_user.tenant_id
+    
+    # For non-super admin users, tenant_id is MANDATORY
+    if current_user.role != "super_admin" and not user_tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": "Tenant assignment required",
+                "message": "Report Writer access requires tenant assignment. Please contact your administrator.",
+                "user_role": current_user.role,
+                "isolation_enforced": True
+            }
+        )
+    
+    # Check quota before streaming starts (only for tenant users)
+    if user_tenant_id:
+        from src.services.tenant_quota_service import quota_manager
+        
+        estimated_tokens = token_logger.estimate_tokens(data.message) * 2  # Message + expected response
+        
+        quota_check = await quota_manager.check_token_quota(user_tenant_id, estimated_tokens)
+        
+        if not quota_check["allowed"]:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Token quota exceeded",
+                    "message": quota_check["message"],
+                    "current_usage": quota_check["current_usage"],
+                    "limit": quota_check["limit"]
+                }
+            )
+    
+    print(f"🔍 Report AI stream request: tenant={user_tenant_id}, type={data.report_type}, session={data.session_id}")
+    
+    from src.services.report_session_service import get_report_session, update_report_session
+    
+    # Get or create the session for this report with complete isolation
+    session = get_report_session(
+        session_id=data.session_id,
+        report_id=data.report_id,
+        report_type=data.report_type,
+        tenant_id=user_tenant_id,  # ENFORCED: Pass tenant_id for isolation
+        user_email=current_user.username  # ENFORCED: Pass user_email for complete isolation
+    )
+    
+    # Add the user message to the session history
+    session["messages"].append({
+        "role": "user",
+        "content": data.message,
+        "timestamp": datetime.utcnow().isoformat(),
+        "tenant_id": user_tenant_id  # Add tenant info for audit
+    })
+    
+    # Update the context if provided
+    if data.report_context:
+        session["context"] = data.report_context
+    
+    # Force standardized model (ignore data.model_id)
+    standardized_model = LLM_MODEL  # Always use Llama 3.3
+    
+    async def event_stream():
+        answer_parts = []
+        try:
+            async for text in stream_report_message(
+                data.message,
+                report_type="kd" if data.report_type == "kd" else "kg",
+                report_id=data.report_id,
+                report_context=data.report_context,
+                model_id=standardized_model,
+                session_id=data.session_id
+            ):
+                answer_parts.append(text)
+                yield format_sse("token", {"text": text})
+        except Exception as e:
+            print(f"Error in report assistant stream: {e}")
+            yield format_sse("error", {
+                "error": "An error occurred while processing your question.",
+                "details": str(e)
+            })
+            return
+        
+        answer = "".join(answer_parts)
+        
+        # Add the complete AI response to session history
+        session["messages"].append({
+            "role": "assistant",
+            "content": answer,
+            "timestamp": datetime.utcnow().isoformat(),
+            "tenant_id": user_tenant_id,  # Add tenant info for audit
+            "model_used": standardized_model
+        })
+        update_report_session(
+            session_id=data.session_id or f"{data.report_type}_{data.report_id or 'default'}",
+            data=session,
+            tenant_id=user_tenant_id,  # ENFORCED: Pass tenant_id for isolation
+            user_email=current_user.username  # ENFORCED: Pass user_email for complete isolation
+        )
+        
+        token_info = None
+        if user_tenant_id:  # Only log for tenant users
+            try:
+                token_info = await token_logger.log_llm_usage_from_texts(
+                    tenant_id=user_tenant_id,
+                    user_email=current_user.username,
+                    endpoint="/report-ai/message/stream",
+                    input_text=data.message,
+                    output_text=answer,
+                    model=standardized_model
+                )
+            except Exception as e:
+                # Don't fail the stream if logging fails, but log the error
+                print(f"⚠️ Token logging failed for tenant {user_tenant_id}: {str(e)}")
+        
+        yield format_sse("done", {
+            "answer": answer,
+            "success": True,
+            "token_info": token_info,
+            "session_info": {
+                "session_id": session.get("scoped_session_id"),
+                "tenant_id": user_tenant_id,
+                "isolation_confirmed": user_tenant_id is not None,
+                "report_type": data.report_type,
+                "model_used": standardized_model
+            }
+        })
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/evaluate/stream")
+async def evaluate_report_stream(
+    data: ReportEvaluationRequest,
+    current_user = Depends(get_current_user)
+):
+    """
+    Streaming variant of /evaluate (Server-Sent Events).
+    Emits "token" events as the evaluation is generated and a final "done" event with
+    the full evaluation and token usage.
+    """
+    # Check quota before streaming starts (only for tenant users)
+    if current_user.tenant_id:
+        from src.services.tenant_quota_service import quota_manager
+        
+        estimated_tokens = token_logger.estimate_tokens(str(data.report_data)) + 1000  # Report + evaluation response
+        
+        quota_check = await quota_manager.check_token_quota(current_user.tenant_id, estimated_tokens)
+        
+        if not quota_check["allowed"]:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Token quota exceeded",
+                    "message": quota_check["message"],
+                    "current_usage": quota_check["current_usage"],
+                    "limit": quota_check["limit"]
+                }
+            )
+    
+    # Force standardized model
+    standardized_model = LLM_MODEL  # Always use Llama 3.3
+    
+    async def event_stream():
+        evaluation_parts = []
+        try:
+            async for text in stream_report_evaluation(
+                data.report_data,
+                report_type="kd" if data.report_type == "kd" else "kg",
+                model_id=standardized_model
+            ):
+                evaluation_parts.append(text)
+                yield format_sse("token", {"text": text})
+        except Exception as e:
+            print(f"Error in report evaluation stream: {e}")
+            yield format_sse("error", {
+                "error": "An error occurred while evaluating your report.",
+                "details": str(e)
+            })
+            return
+        
+        evaluation = "".join(evaluation_parts)
+        
+        token_info = None
+        if current_user.tenant_id:
+            token_info = await token_logger.log_llm_usage_from_texts(
+                tenant_id=current_user.tenant_id,
+                user_email=current_user.username,
+                endpoint="/report-ai/evaluate/stream",
+                input_text=str(data.report_data),
+                output_text=evaluation,
+                model=standardized_model
+            )
+        
+        yield format_sse("done", {
+            "evaluation": evaluation,
+            "success": True,
+            "model_used": standardized_model,
+            "token_info": token_info
+        })
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/check-archive")
 async def check_archive_endpoint(
     data: ArchiveSearchRequest,
@@ -346,7 +562,7 @@ async def check_archive_endpoint(
             {"role": "user", "content": prompt}
         ]
         
-        response = llm.invoke(messages)
+        response = await run_llm_call(llm.invoke, messages)
         
         # Enhanced token logging for tenant users
         if current_user.tenant_id:
@@ -25,6 +25,7 @@ from src.utils.db import db
 from src.services.tenant_aws_service import tenant_aws_service
 from src.services.tenant_resource_service import tenant_resource_service  # Phase 3.1
 from src.services.knowledge_base_service import knowledge_base_service      # NEW Phase 3.2
+from src.services.kb_ingestion_scheduler import kb_ingestion_scheduler
 
 router = APIRouter()
 
@@ -343,6 +344,7 @@ async def get_knowledge_base_status(
     
     try:
         result = await knowledge_base_service.get_knowledge_base_status(tenant_id)
+        result["ingestion_queue"] = kb_ingestion_scheduler.get_status(tenant_id)
         return result
         
     except Exception as e:
@@ -367,7 +369,7 @@ async def start_knowledge_base_sync(
         )
     
     try:
-        result = await knowledge_base_service.start_ingestion_job(tenant_id)
+        result = await kb_ingestion_scheduler.sync_now(tenant_id)
         return result
         
     except Exception as e:
@@ -34,6 +34,10 @@ async def startup_event():
     logger.info(f"AWS_REGION: {os.getenv('AWS_REGION', 'NOT SET')}")
     logger.info(f"AWS credentials available: {'Yes' if os.getenv('AWS_ACCESS_KEY_ID') and os.getenv('AWS_SECRET_ACCESS_KEY') else 'No'}")
 
+    # Keep following Knowledge Base ingestion jobs that were running before a restart
+    from src.services.kb_ingestion_poller import ingestion_job_poller
+    await ingestion_job_poller.resume()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
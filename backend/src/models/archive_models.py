@@ -27,7 +27,10 @@ class DocumentModel(BaseModel):
     uploaded_at: str  # ISO format datetime
     file_size: Optional[int] = None  # NEW: File size in bytes
     file_type: Optional[str] = None  # NEW: File extension
+    content_sha256: Optional[str] = None  # SHA-256 of the uploaded content
     kb_indexed: Optional[bool] = False  # NEW: Knowledge Base indexing status
+    kb_indexed_at: Optional[str] = None  # When the ingestion job that indexed it finished
+    kb_ingestion_job_id: Optional[str] = None  # Ingestion job that indexed the document
 
 # Enhanced Project models with tenant isolation
 class ProjectBase(BaseModel):
@@ -1,18 +1,33 @@
-from src.ai_coach.rag_chain import create_rag_chain
+from src.ai_coach.rag_chain import create_rag_chain, create_conversation_memory, stream_rag_chain
+from src.ai_coach.conversation_store import get_conversation_store, StoredChatMessageHistory
+from src.ai_coach.conversation_memory import SummaryBufferChatMessageHistory
+from src.ai_coach.bedrock_llm import get_condense_llm
+from src.ai_coach.semantic_cache import get_semantic_answer_cache
+from src.ai_coach.embeddings import get_embeddings, get_index_version
 from src.config.model_constants import LLM_MODEL
+from src.utils.llm_executor import run_llm_call, iterate_llm_stream
+from src.utils.metrics import metrics
+import asyncio
 import os
+import time
 from datetime import datetime
 
-# Tenant-scoped conversation storage for Phase 2 (preparing for Phase 5 isolation)
-_rag_chains = {}
+# Tenant-scoped conversation history for Phase 2 (preparing for Phase 5 isolation).
+# History lives in a shared store (MongoDB, or a bounded in-process fallback), so any
+# worker can continue any conversation. The vector store, embeddings and LLM clients are
+# shared process-wide, so a chain is a cheap wrapper built per request around the store.
+_conversation_store = get_conversation_store()
 
-def get_rag_chain(conversation_id=None, tenant_id=None, user_email=None):
+# Opt-in cache of first-turn answers, matched by question embedding (AI_COACH_SEMANTIC_CACHE=true)
+_semantic_cache = get_semantic_answer_cache()
+
+CHROMA_DB_PATH = os.path.join(os.path.dirname(__file__), "../../chroma_db")
+
+def _build_chain_key(conversation_id, tenant_id=None, user_email=None):
     """
-    Get or create the RAG chain for a specific conversation with tenant+user scoping.
-    Model is now standardized to Llama 3.3 - no model selection needed.
+    Build the tenant+user scoped key for a conversation.
+    Format: tenant_{tenant_id}_user_{user_email}_{conversation_id} or global_{conversation_id}
     """
-    global _rag_chains
-    
     # VALIDATION: For tenant users, user_email is mandatory for isolation
     if tenant_id and not user_email:
         raise ValueError(
@@ -20,40 +35,47 @@ def get_rag_chain(conversation_id=None, tenant_id=None, user_email=None):
             f"This ensures complete conversation isolation between users."
         )
     
-    # Use default conversation if none provided
-    if not conversation_id:
-        conversation_id = "default"
-    
     # Create session key with CONSISTENT format (no fallbacks to old format)
     if tenant_id and user_email:
         # Full isolation: tenant + user + conversation
-        chain_key = f"tenant_{tenant_id}_user_{user_email}_{conversation_id}"
+        return f"tenant_{tenant_id}_user_{user_email}_{conversation_id}"
     elif not tenant_id:  # Super admin only
-        chain_key = f"global_{conversation_id}"
+        return f"global_{conversation_id}"
     else:
         # This should never happen due to validation above
         raise ValueError("Invalid session parameters: tenant_id provided without user_email")
+
+def get_rag_chain(conversation_id=None, tenant_id=None, user_email=None):
+    """
+    Get or create the RAG chain for a specific conversation with tenant+user scoping.
+    Model is now standardized to Llama 3.3 - no model selection needed.
+    """
+    # Use default conversation if none provided
+    if not conversation_id:
+        conversation_id = "default"
     
-    # Create chain if it doesn't exist
-    if chain_key not in _rag_chains:
-        chroma_db_path = os.path.join(os.path.dirname(__file__), "../../chroma_db")
-        
-        # Always use standardized Llama 3.3 model (no model selection)
-        _rag_chains[chain_key] = create_rag_chain(
-            persist_directory=chroma_db_path, 
-            model_id=LLM_MODEL  # Force Llama 3.3 70B
-        )
-        
-        print(f"✅ Created new RAG chain: {chain_key} using {LLM_MODEL}")
+    chain_key = _build_chain_key(conversation_id, tenant_id, user_email)
+    
+    # Memory reads the last N turns from the store and appends one turn per answer.
+    # With AI_COACH_MEMORY_SUMMARY (default on), older turns are replaced by a rolling
+    # summary and the history is kept within AI_COACH_MEMORY_MAX_TOKENS.
+    if os.getenv("AI_COACH_MEMORY_SUMMARY", "true").lower() == "true":
+        chat_memory = SummaryBufferChatMessageHistory(_conversation_store, chain_key, llm=get_condense_llm())
+    else:
+        chat_memory = StoredChatMessageHistory(_conversation_store, chain_key)
+    memory = create_conversation_memory(chat_memory=chat_memory)
     
-    return _rag_chains[chain_key]
+    # Always use standardized Llama 3.3 model (no model selection)
+    return create_rag_chain(
+        persist_directory=CHROMA_DB_PATH, 
+        model_id=LLM_MODEL,  # Force Llama 3.3 70B
+        memory=memory
+    )
 
 def clear_conversation_memory(conversation_id, tenant_id=None, user_email=None):
     """
     Clear the memory for a specific conversation with tenant+user scoping.
     """
-    global _rag_chains
-    
     # VALIDATION: Apply same validation as get_rag_chain
     if tenant_id and not user_email:
         raise ValueError(
@@ -62,18 +84,10 @@ def clear_conversation_memory(conversation_id, tenant_id=None, user_email=None):
         )
     
     # Create the same key format as get_rag_chain
-    if tenant_id and user_email:
-        # Full isolation: tenant + user + conversation
-        chain_key = f"tenant_{tenant_id}_user_{user_email}_{conversation_id}"
-    elif not tenant_id:  # Super admin only
-        chain_key = f"global_{conversation_id}"
-    else:
-        # This should never happen due to validation above
-        raise ValueError("Invalid session parameters: tenant_id provided without user_email")
+    chain_key = _build_chain_key(conversation_id, tenant_id, user_email)
     
-    # Remove the specific chain
-    if chain_key in _rag_chains:
-        del _rag_chains[chain_key]
+    # Remove the specific conversation history
+    if _conversation_store.clear(chain_key):
         print(f"✅ Cleared memory for conversation chain: {chain_key}")
         return True
     else:
@@ -83,28 +97,20 @@ def clear_conversation_memory(conversation_id, tenant_id=None, user_email=None):
 def get_conversation_history(conversation_id: str, tenant_id=None, user_email=None):
     """
     Get conversation history for a specific conversation with tenant+user scoping.
+    Reads straight from the conversation store; no RAG chain is created.
     """
     try:
         # FIX: Pass all three parameters to maintain session key consistency
-        chain = get_rag_chain(conversation_id, tenant_id, user_email)
-        
-        # Extract conversation history from the chain's memory
-        if hasattr(chain, 'memory') and hasattr(chain.memory, 'chat_memory'):
-            messages = chain.memory.chat_memory.messages
-            
-            # Convert to a more readable format
-            history = []
-            for i in range(0, len(messages), 2):
-                if i + 1 < len(messages):
-                    history.append({
-                        "question": messages[i].content,
-                        "answer": messages[i + 1].content,
-                        "timestamp": getattr(messages[i], 'timestamp', None)
-                    })
-            
-            return history
+        chain_key = _build_chain_key(conversation_id or "default", tenant_id, user_email)
         
-        return []
+        return [
+            {
+                "question": turn["question"],
+                "answer": turn["answer"],
+                "timestamp": turn["timestamp"].isoformat() if turn.get("timestamp") else None
+            }
+            for turn in _conversation_store.load_turns(chain_key)
+        ]
         
     except Exception as e:
         print(f"❌ Error getting conversation history: {e}")
@@ -126,11 +132,41 @@ async def ask_ai_coach(question: str, conversation_id: str = None, model_id: str
         if not conversation_id:
             conversation_id = "default"
         
+        # Semantic cache: only for first-turn questions, whose answer doesn't depend on history
+        cache_scope = tenant_id or "global"
+        query_embedding = None
+        if _semantic_cache.enabled:
+            chain_key = _build_chain_key(conversation_id, tenant_id, user_email)
+            # History reads and writes are blocking pymongo calls; keep them off the event loop
+            if not await asyncio.to_thread(_conversation_store.load_turns, chain_key, 1):
+                index_version = get_index_version(CHROMA_DB_PATH)
+                query_embedding = await run_llm_call(get_embeddings().embed_query, question)
+                cached = _semantic_cache.lookup(cache_scope, query_embedding, index_version)
+                if cached:
+                    metrics.increment("ai_coach.semantic_cache.hits")
+                    # Keep the conversation consistent for follow-up questions
+                    await asyncio.to_thread(_conversation_store.append_turn, chain_key, question, cached["answer"])
+                    return {
+                        "answer": cached["answer"],
+                        "conversation_id": conversation_id,
+                        "model_used": LLM_MODEL,
+                        "tenant_id": tenant_id,
+                        "user_email": user_email,
+                        "sources": cached["sources"],
+                        "cache_hit": True,
+                        "cache_similarity": cached["similarity"]
+                    }
+                metrics.increment("ai_coach.semantic_cache.misses")
+        
         # Get RAG chain with tenant+user scoping (model is standardized)
         chain = get_rag_chain(conversation_id, tenant_id, user_email)
         
-        # Process the question
-        result = chain({"question": question})
+        # Process the question on the bounded LLM pool so the event loop stays free
+        result = await run_llm_call(chain, {"question": question})
+        sources = [doc.metadata for doc in result.get("source_documents", [])]
+        
+        if query_embedding is not None:
+            _semantic_cache.add(cache_scope, query_embedding, question, result["answer"], sources, index_version)
         
         return {
             "answer": result["answer"],
@@ -138,7 +174,8 @@ async def ask_ai_coach(question: str, conversation_id: str = None, model_id: str
             "model_used": LLM_MODEL,  # Always Llama 3.3
             "tenant_id": tenant_id,
             "user_email": user_email,  # Add user tracking
-            "sources": result.get("source_documents", [])
+            "sources": sources,
+            "cache_hit": False
         }
         
     except Exception as e:
@@ -152,40 +189,101 @@ async def ask_ai_coach(question: str, conversation_id: str = None, model_id: str
             "user_email": user_email
         }
 
+async def stream_ai_coach(question: str, conversation_id: str = None, tenant_id: str = None, user_email: str = None):
+    """
+    Streaming variant of ask_ai_coach with the same tenant+user scoping.
+    
+    Yields event dicts: one "sources" event with the retrieved documents' metadata,
+    "token" events as the answer is generated, then a "done" event with the full
+    answer and timings. Time-to-first-token is recorded in the metrics registry.
+    """
+    if not conversation_id:
+        conversation_id = "default"
+    
+    chain = get_rag_chain(conversation_id, tenant_id, user_email)
+    
+    started = time.perf_counter()
+    first_token_ms = None
+    answer = ""
+    
+    async for kind, payload in iterate_llm_stream(lambda: stream_rag_chain(chain, question)):
+        if kind == "sources":
+            yield {
+                "event": "sources",
+                "data": {
+                    "conversation_id": conversation_id,
+                    "sources": [doc.metadata for doc in payload]
+                }
+            }
+        elif kind == "token":
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - started) * 1000
+                metrics.observe("ai_coach.stream.time_to_first_token_ms", first_token_ms)
+            yield {"event": "token", "data": {"text": payload}}
+        elif kind == "answer":
+            answer = payload
+    
+    total_ms = (time.perf_counter() - started) * 1000
+    metrics.observe("ai_coach.stream.total_ms", total_ms)
+    metrics.increment("ai_coach.stream.completed")
+    
+    yield {
+        "event": "done",
+        "data": {
+            "answer": answer,
+            "conversation_id": conversation_id,
+            "model_used": LLM_MODEL,  # Always Llama 3.3
+            "timing": {
+                "time_to_first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                "total_ms": round(total_ms, 1)
+            }
+        }
+    }
+
+def record_semantic_cache_savings(tenant_id, tokens):
+    """Credit a tenant with the LLM tokens a semantic cache hit avoided."""
+    _semantic_cache.record_tokens_saved(tenant_id or "global", tokens)
+
+def get_semantic_cache_stats(tenant_id=None):
+    """Semantic cache statistics: all scopes for super admin (None), otherwise the tenant's own."""
+    if tenant_id is None:
+        return _semantic_cache.stats()
+    return _semantic_cache.stats(scope=tenant_id)
+
 def clear_all_conversations(tenant_id=None):
     """
     Clear all conversations for a specific tenant (or all global conversations).
     Useful for testing or admin operations.
     """
-    global _rag_chains
-    
     if tenant_id:
         # Clear all conversations for a specific tenant
         prefix = f"tenant_{tenant_id}_"
-        keys_to_remove = [key for key in _rag_chains.keys() if key.startswith(prefix)]
     else:
         # Clear all global conversations
-        keys_to_remove = [key for key in _rag_chains.keys() if key.startswith("global_")]
+        prefix = "global_"
     
-    for key in keys_to_remove:
-        del _rag_chains[key]
+    removed = _conversation_store.clear_prefix(prefix)
     
-    print(f"Cleared {len(keys_to_remove)} conversation chains for tenant: {tenant_id or 'global'}")
+    print(f"Cleared {removed} conversation chains for tenant: {tenant_id or 'global'}")
 
 def get_active_conversations(requesting_tenant_id=None):
     """
     Get list of active conversations with optional tenant filtering.
     Enhanced to handle new session key format: tenant_{tenant_id}_user_{user_email}_{conversation_id}
     """
-    global _rag_chains
+    chain_keys = _conversation_store.list_keys()
     
     conversations = {
-        "total_chains": len(_rag_chains),
+        "total_chains": len(chain_keys),
         "conversations": [],
         "requesting_tenant": requesting_tenant_id
     }
     
-    for chain_key in _rag_chains.keys():
+    # Store statistics are operational data for super admins only
+    if requesting_tenant_id is None:
+        conversations["cache_stats"] = _conversation_store.stats()
+    
+    for chain_key in chain_keys:
         include_conversation = False
         conversation_info = None
         
@@ -29,6 +29,7 @@ from src.models.archive_models import (
 from src.utils.db import db
 from src.utils.document_processor import extract_text_from_file
 from src.utils.cross_account_client import CrossAccountClient
+from src.utils.s3_transfer import iter_s3_body, normalize_range_header, run_s3_call, stream_upload_to_s3
 
 # Collection references
 projects_collection = db["archive_projects"]
@@ -152,23 +153,21 @@ class TenantArchiveService:
             # Get tenant's S3 client
             s3_client = CrossAccountClient.get_tenant_s3_client(aws_account_id)
             
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
-            
-            # Upload to tenant's S3 bucket
-            s3_client.put_object(
-                Bucket=s3_bucket,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=file.content_type or "application/octet-stream",
-                Metadata={
+            # Stream the file to the tenant's S3 bucket in parts (multipart upload for large files)
+            upload = await stream_upload_to_s3(
+                s3_client,
+                file,
+                bucket=s3_bucket,
+                key=s3_key,
+                content_type=file.content_type,
+                metadata={
                     'original-filename': original_filename,
                     'tenant-id': tenant_id,
                     'project-id': project_id,
                     'uploaded-by': 'archive-service'
                 }
             )
+            file_size = upload["size"]
             
             # Create document metadata
             document = {
@@ -181,6 +180,7 @@ class TenantArchiveService:
                 "tenant_id": tenant_id,  # NEW: Tenant isolation
                 "uploaded_at": datetime.utcnow().isoformat(),
                 "file_size": file_size,
+                "content_sha256": upload["sha256"],
                 "file_type": file_extension[1:] if file_extension else "unknown",
                 "kb_indexed": False  # Will be updated after KB sync
             }
@@ -409,9 +409,89 @@ class TenantArchiveService:
                 "error": f"Project deletion failed: {str(e)}"
             }
 
+    def get_document_record(self, project_id: str, document_id: str, tenant_id: str) -> Optional[Dict]:
+        """
+        Find one document of a tenant's project (only that document is read from MongoDB).
+        
+        Returns:
+            The document record or None if not found
+        """
+        try:
+            project = self.projects_collection.find_one(
+                {"_id": ObjectId(project_id), "tenant_id": tenant_id},
+                {"documents": {"$elemMatch": {"_id": document_id}}}
+            )
+        except Exception as e:
+            print(f"Error finding document {document_id}: {str(e)}")
+            return None
+        
+        documents = (project or {}).get("documents") or []
+        return documents[0] if documents else None
+
+    async def open_document_stream(self, document: Dict, range_header: Optional[str] = None) -> Optional[Dict]:
+        """
+        Open a document's S3 object for streaming, optionally a single byte range.
+        
+        Args:
+            document: Record returned by get_document_record
+            range_header: HTTP Range header from the client
+            
+        Returns:
+            Dict with the S3 body and response headers, {"range_not_satisfiable": True}
+            for an invalid range, or None if the object cannot be read
+        """
+        aws_account_id = document.get("aws_account_id")
+        s3_bucket = document.get("s3_bucket")
+        s3_key = document.get("s3_key")
+        if not all([aws_account_id, s3_bucket, s3_key]):
+            return None
+        
+        request = {"Bucket": s3_bucket, "Key": s3_key}
+        s3_range = normalize_range_header(range_header)
+        if s3_range:
+            request["Range"] = s3_range
+        
+        try:
+            s3_client = CrossAccountClient.get_tenant_s3_client(aws_account_id)
+            response = await run_s3_call(s3_client.get_object, **request)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'InvalidRange':
+                return {"range_not_satisfiable": True}
+            print(f"Error opening document {document.get('_id')}: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Error opening document {document.get('_id')}: {str(e)}")
+            return None
+        
+        return {
+            "body": response['Body'],
+            "content_length": response.get('ContentLength'),
+            "content_range": response.get('ContentRange'),
+            "content_type": response.get('ContentType') or "application/octet-stream",
+            "partial": "ContentRange" in response
+        }
+
+    def get_document_download_url(self, document: Dict, expires_in: int = 300) -> Optional[str]:
+        """Presigned GET URL for a document, valid for expires_in seconds."""
+        try:
+            s3_client = CrossAccountClient.get_tenant_s3_client(document["aws_account_id"])
+            return s3_client.generate_presigned_url(
+                'get_object',
+                Params={
+                    'Bucket': document["s3_bucket"],
+                    'Key': document["s3_key"],
+                    'ResponseContentDisposition': f'inline; filename="{document.get("filename", "document")}"'
+                },
+                ExpiresIn=expires_in
+            )
+        except Exception as e:
+            print(f"Error creating download URL for document {document.get('_id')}: {str(e)}")
+            return None
+
     async def get_document_content(self, project_id: str, document_id: str, tenant_id: str) -> Optional[bytes]:
         """
         Get document content from tenant's S3 bucket.
+        Reads the whole object into memory; view endpoints use open_document_stream instead.
         
         Args:
             project_id: Project ID
@@ -422,36 +502,15 @@ class TenantArchiveService:
             Document content bytes or None if not found
         """
         try:
-            # Verify project belongs to tenant
-            project = self.projects_collection.find_one({
-                "_id": ObjectId(project_id), 
-                "tenant_id": tenant_id
-            })
-            if not project:
-                return None
-            
-            # Find the document
-            document = None
-            for doc in project.get("documents", []):
-                if doc.get("_id") == document_id:
-                    document = doc
-                    break
-            
+            document = self.get_document_record(project_id, document_id, tenant_id)
             if not document:
                 return None
             
-            # Get document from tenant's S3 bucket
-            aws_account_id = document.get("aws_account_id")
-            s3_bucket = document.get("s3_bucket")
-            s3_key = document.get("s3_key")
-            
-            if not all([aws_account_id, s3_bucket, s3_key]):
+            stream = await self.open_document_stream(document)
+            if not stream or "body" not in stream:
                 return None
             
-            s3_client = CrossAccountClient.get_tenant_s3_client(aws_account_id)
-            response = s3_client.get_object(Bucket=s3_bucket, Key=s3_key)
-            
-            return response['Body'].read()
+            return b"".join([chunk async for chunk in iter_s3_body(stream["body"])])
             
         except Exception as e:
             print(f"Error getting document content: {str(e)}")
@@ -459,20 +518,17 @@ class TenantArchiveService:
 
     async def _trigger_knowledge_base_sync(self, tenant_id: str):
         """
-        Trigger Knowledge Base sync to index new/updated documents.
+        Ask for a Knowledge Base sync to index new/updated documents.
+        Requests are debounced and coalesced per tenant by the ingestion scheduler.
         
         Args:
             tenant_id: Tenant ID
         """
         try:
-            from src.services.knowledge_base_service import knowledge_base_service
-            
-            # Start async ingestion job
-            result = await knowledge_base_service.start_ingestion_job(tenant_id)
-            if result["success"]:
-                print(f"Triggered Knowledge Base sync for tenant {tenant_id}")
-            else:
-                print(f"Failed to trigger KB sync for tenant {tenant_id}: {result['error']}")
+            from src.services.kb_ingestion_scheduler import kb_ingestion_scheduler
+            
+            queue = kb_ingestion_scheduler.request_sync(tenant_id)
+            print(f"Queued Knowledge Base sync for tenant {tenant_id} ({queue['state']}, {queue['pending_requests']} pending)")
                 
         except Exception as e:
             print(f"Error triggering Knowledge Base sync: {str(e)}")
@@ -0,0 +1,239 @@
+"""
+Follows Knowledge Base ingestion jobs to completion and marks archive documents indexed.
+
+A single background loop checks every tracked job (of every tenant) with
+get_ingestion_job. Each job is first checked after KB_INGESTION_POLL_SECONDS, and the
+interval grows by KB_INGESTION_POLL_BACKOFF up to KB_INGESTION_POLL_MAX_SECONDS, since
+ingestion usually takes minutes. When a job completes:
+  - its statistics (scanned, indexed, failed, deleted) are saved in kb_ingestion_jobs,
+  - documents of the tenant uploaded before the job started are set kb_indexed=True in
+    archive_projects with one update, except those the Knowledge Base reports as failed.
+
+Jobs are saved when they start, so jobs still running when the process stopped are
+picked up again by resume() at startup. Status checks and database updates are
+blocking boto3 / pymongo calls and run on a small thread pool, never on the event loop.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from src.services.knowledge_base_service import knowledge_base_service
+from src.utils.db import db
+from src.utils.metrics import metrics
+
+POLL_SECONDS = float(os.getenv("KB_INGESTION_POLL_SECONDS", "10"))
+POLL_MAX_SECONDS = float(os.getenv("KB_INGESTION_POLL_MAX_SECONDS", "60"))
+POLL_BACKOFF = float(os.getenv("KB_INGESTION_POLL_BACKOFF", "1.5"))
+
+FINISHED_JOB_STATUSES = ("COMPLETE", "FAILED", "STOPPED")
+
+# Consecutive status-check errors after which a job is given up on
+MAX_POLL_ERRORS = 10
+
+ingestion_jobs_collection = db["kb_ingestion_jobs"]
+projects_collection = db["archive_projects"]
+
+_kb_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("KB_INGESTION_WORKERS", "4")),
+    thread_name_prefix="kb-ingestion"
+)
+
+async def run_kb_call(func, *args, **kwargs):
+    """Run a blocking Knowledge Base or MongoDB call on the ingestion thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_kb_executor, functools.partial(func, *args, **kwargs))
+
+def summarize_statistics(statistics: Dict) -> Dict:
+    """Bedrock ingestion statistics reduced to scanned / indexed / failed / deleted counts."""
+    return {
+        "scanned": statistics.get("numberOfDocumentsScanned", 0),
+        "indexed": statistics.get("numberOfNewDocumentsIndexed", 0) + statistics.get("numberOfModifiedDocumentsIndexed", 0),
+        "failed": statistics.get("numberOfDocumentsFailed", 0),
+        "deleted": statistics.get("numberOfDocumentsDeleted", 0)
+    }
+
+def mark_documents_indexed(tenant_id: str, job_id: str, uploaded_before: str, failed_keys: List[str]) -> int:
+    """Set kb_indexed on the tenant's documents uploaded before uploaded_before; returns the number of projects updated."""
+    document_filter = {"kb_indexed": {"$ne": True}, "uploaded_at": {"$lte": uploaded_before}}
+    result = projects_collection.update_many(
+        {"tenant_id": tenant_id, "documents": {"$elemMatch": document_filter}},
+        {"$set": {
+            "documents.$[doc].kb_indexed": True,
+            "documents.$[doc].kb_indexed_at": datetime.utcnow().isoformat(),
+            "documents.$[doc].kb_ingestion_job_id": job_id
+        }},
+        array_filters=[{
+            "doc.kb_indexed": {"$ne": True},
+            "doc.uploaded_at": {"$lte": uploaded_before},
+            "doc.s3_key": {"$nin": failed_keys}
+        }]
+    )
+    return result.modified_count
+
+def _save_job(job_id: str, update: Dict, upsert: bool = False):
+    try:
+        ingestion_jobs_collection.update_one({"job_id": job_id}, update, upsert=upsert)
+    except Exception as e:
+        print(f"⚠️ Could not save ingestion job {job_id}: {e}")
+
+def _record_finished_job(job: Dict, result: Dict, statistics: Dict) -> int:
+    """Set kb_indexed for a completed job and save its outcome; returns the number of projects updated."""
+    projects_updated = 0
+    if result["status"] == "COMPLETE":
+        failed_keys = []
+        if statistics["failed"]:
+            listing = knowledge_base_service.list_failed_documents(job["tenant_id"], job["data_source_id"])
+            # Without the list of failures no document can be known to be indexed
+            failed_keys = listing["failed_keys"] if listing["success"] else None
+        if failed_keys is not None:
+            try:
+                projects_updated = mark_documents_indexed(job["tenant_id"], job["job_id"], job["started_at"], failed_keys)
+            except Exception as e:
+                print(f"⚠️ Could not set kb_indexed for ingestion job {job['job_id']}: {e}")
+
+    _save_job(job["job_id"], {"$set": {
+        "status": result["status"],
+        "statistics": statistics,
+        "failure_reasons": result.get("failure_reasons", []),
+        "projects_updated": projects_updated,
+        "finished_at": datetime.utcnow().isoformat()
+    }})
+    return projects_updated
+
+class IngestionJobPoller:
+    """One loop that follows every tracked ingestion job, backing off per job."""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS, max_poll_seconds: float = POLL_MAX_SECONDS,
+                 backoff: float = POLL_BACKOFF):
+        self.poll_seconds = poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.backoff = backoff
+        self._jobs: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def track(self, tenant_id: str, job_id: str, data_source_id: Optional[str], started_at: str,
+              on_finished: Optional[Callable[[str, str, Dict], None]] = None, save: bool = True):
+        """Follow a job until it finishes; on_finished(tenant_id, job_id, job) is called at the end."""
+        self._jobs[job_id] = {
+            "tenant_id": tenant_id,
+            "job_id": job_id,
+            "data_source_id": data_source_id,
+            "started_at": started_at,
+            "status": "STARTING",
+            "interval": self.poll_seconds,
+            "next_check": time.monotonic() + self.poll_seconds,
+            "errors": 0,
+            "on_finished": on_finished
+        }
+        if save:
+            # $setOnInsert: never overwrites the outcome if the job finishes first
+            _kb_executor.submit(_save_job, job_id, {"$setOnInsert": {
+                "tenant_id": tenant_id, "data_source_id": data_source_id, "status": "STARTING", "started_at": started_at
+            }}, True)
+        self._ensure_running()
+
+    def check_now(self, tenant_id: Optional[str] = None):
+        """Check the tracked jobs (of one tenant, or all) on the next loop iteration instead of waiting."""
+        for job in self._jobs.values():
+            if tenant_id is None or job["tenant_id"] == tenant_id:
+                job["next_check"] = 0
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def job_status(self, job_id: str) -> Optional[str]:
+        job = self._jobs.get(job_id)
+        return job["status"] if job else None
+
+    def tracked_jobs(self) -> int:
+        return len(self._jobs)
+
+    async def resume(self):
+        """Track again the jobs saved as unfinished (e.g. after a restart)."""
+        try:
+            unfinished = await run_kb_call(
+                lambda: list(ingestion_jobs_collection.find({"status": {"$nin": list(FINISHED_JOB_STATUSES) + ["UNKNOWN"]}}))
+            )
+        except Exception as e:
+            print(f"⚠️ Could not load unfinished ingestion jobs: {e}")
+            return
+        for record in unfinished:
+            if record["job_id"] not in self._jobs:
+                self.track(record["tenant_id"], record["job_id"], record.get("data_source_id"), record["started_at"], save=False)
+        if unfinished:
+            print(f"🔄 Resumed tracking of {len(unfinished)} Knowledge Base ingestion jobs")
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self):
+        while self._jobs:
+            now = time.monotonic()
+            for job in [job for job in self._jobs.values() if job["next_check"] <= now]:
+                try:
+                    await self._check(job)
+                except Exception as e:
+                    print(f"⚠️ Error checking ingestion job {job['job_id']}: {e}")
+                    self._schedule_next(job)
+            if not self._jobs:
+                break
+
+            delay = max(0.0, min(job["next_check"] for job in self._jobs.values()) - time.monotonic())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _schedule_next(self, job: Dict):
+        job["next_check"] = time.monotonic() + job["interval"]
+        job["interval"] = min(self.max_poll_seconds, job["interval"] * self.backoff)
+
+    async def _check(self, job: Dict):
+        result = await run_kb_call(knowledge_base_service.get_ingestion_job, job["tenant_id"], job["job_id"], job["data_source_id"])
+        metrics.increment("kb_ingestion.status_checks")
+        if not result["success"]:
+            job["errors"] += 1
+            if job["errors"] >= MAX_POLL_ERRORS:
+                await self._finish(job, {"status": "UNKNOWN", "statistics": {}, "error": result["error"]})
+            else:
+                self._schedule_next(job)
+            return
+
+        job["errors"] = 0
+        job["status"] = result["status"]
+        if result["status"] in FINISHED_JOB_STATUSES:
+            await self._finish(job, result)
+        else:
+            self._schedule_next(job)
+
+    async def _finish(self, job: Dict, result: Dict):
+        self._jobs.pop(job["job_id"], None)
+        statistics = summarize_statistics(result.get("statistics", {}))
+
+        try:
+            projects_updated = await run_kb_call(_record_finished_job, job, result, statistics)
+        except Exception as e:
+            # The scheduler must still hear that the job finished
+            print(f"⚠️ Could not record ingestion job {job['job_id']}: {e}")
+            projects_updated = 0
+
+        metrics.increment("kb_ingestion.documents_scanned", statistics["scanned"])
+        metrics.increment("kb_ingestion.documents_indexed", statistics["indexed"])
+        metrics.increment("kb_ingestion.documents_failed", statistics["failed"])
+        print(f"📚 Ingestion job {job['job_id']} {result['status']}: {statistics}, kb_indexed set in {projects_updated} projects")
+
+        if job["on_finished"]:
+            job["on_finished"](job["tenant_id"], job["job_id"], {**result, "statistics": statistics})
+
+# Global poller instance
+ingestion_job_poller = IngestionJobPoller()
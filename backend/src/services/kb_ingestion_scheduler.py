@@ -0,0 +1,210 @@
+"""
+Per-tenant scheduling of Knowledge Base ingestion jobs.
+
+Every archive upload or delete asks for its tenant's Knowledge Base to be synced. Each
+request used to start its own ingestion job, so a bulk upload started one job per file
+(most were rejected because a job was already running). Requests now go through
+request_sync, which:
+  - debounces them for KB_SYNC_DEBOUNCE_SECONDS after the latest one, but never delays
+    more than KB_SYNC_MAX_DELAY_SECONDS after the first,
+  - coalesces them into a single ingestion job and tracks its job id,
+  - while that job runs, queues exactly one follow-up job, started (debounced again)
+    once the running job has finished.
+Running jobs are followed by the ingestion job poller, which also marks the documents
+indexed.
+
+State lives in the process and is only touched on the event loop. A job rejected
+because another one is already running (started by another worker or by hand) is
+retried like a follow-up.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.services.kb_ingestion_poller import ingestion_job_poller, run_kb_call
+from src.services.knowledge_base_service import knowledge_base_service
+from src.utils.metrics import metrics
+
+SYNC_DEBOUNCE_SECONDS = float(os.getenv("KB_SYNC_DEBOUNCE_SECONDS", "20"))
+SYNC_MAX_DELAY_SECONDS = float(os.getenv("KB_SYNC_MAX_DELAY_SECONDS", "120"))
+CONFLICT_RETRY_SECONDS = float(os.getenv("KB_SYNC_CONFLICT_RETRY_SECONDS", "30"))
+
+class _TenantSyncState:
+    """Scheduling state of one tenant."""
+
+    def __init__(self):
+        self.pending_requests = 0
+        self.first_requested_at: Optional[float] = None
+        self.start_at: Optional[float] = None
+        self.timer: Optional[asyncio.Task] = None
+        self.starting = False
+        self.running_job: Optional[Dict] = None
+        self.last_job: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def busy(self) -> bool:
+        return self.starting or self.running_job is not None
+
+class KnowledgeBaseIngestionScheduler:
+    """Debounces and coalesces Knowledge Base sync requests into one ingestion job per tenant at a time."""
+
+    def __init__(self, debounce_seconds: float = SYNC_DEBOUNCE_SECONDS, max_delay_seconds: float = SYNC_MAX_DELAY_SECONDS,
+                 retry_seconds: float = CONFLICT_RETRY_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.retry_seconds = retry_seconds
+        self._tenants: Dict[str, _TenantSyncState] = {}
+
+    def _state(self, tenant_id: str) -> _TenantSyncState:
+        if tenant_id not in self._tenants:
+            self._tenants[tenant_id] = _TenantSyncState()
+        return self._tenants[tenant_id]
+
+    def request_sync(self, tenant_id: str) -> Dict:
+        """Ask for the tenant's Knowledge Base to be synced; returns the tenant's queue state."""
+        state = self._state(tenant_id)
+        now = time.monotonic()
+        state.pending_requests += 1
+        if state.first_requested_at is None:
+            state.first_requested_at = now
+        metrics.increment("kb_ingestion.sync_requests")
+
+        # While a job is starting or running the requests wait for it to finish
+        if not state.busy:
+            self._arm_timer(tenant_id, state)
+        return self.get_status(tenant_id)
+
+    async def sync_now(self, tenant_id: str) -> Dict:
+        """Start an ingestion job right away, or queue the follow-up if one is already running."""
+        state = self._state(tenant_id)
+        if state.busy:
+            self.request_sync(tenant_id)
+            return {
+                "success": True,
+                "queued": True,
+                "job_id": state.running_job["job_id"] if state.running_job else None,
+                "message": "Ingestion job already running; a follow-up job is queued"
+            }
+
+        if state.timer and not state.timer.done():
+            state.timer.cancel()
+        state.pending_requests += 1
+        return await self._start_job(tenant_id)
+
+    def _arm_timer(self, tenant_id: str, state: _TenantSyncState, delay: Optional[float] = None):
+        """(Re)start the debounce timer; the job starts when it fires."""
+        if state.timer and not state.timer.done():
+            state.timer.cancel()
+        if delay is None:
+            deadline = state.first_requested_at + self.max_delay_seconds
+            delay = max(0.0, min(self.debounce_seconds, deadline - time.monotonic()))
+        state.start_at = time.monotonic() + delay
+        state.timer = asyncio.ensure_future(self._start_after(tenant_id, delay))
+
+    async def _start_after(self, tenant_id: str, delay: float):
+        await asyncio.sleep(delay)
+        await self._start_job(tenant_id)
+
+    async def _start_job(self, tenant_id: str) -> Dict:
+        state = self._state(tenant_id)
+        coalesced = state.pending_requests
+        state.pending_requests = 0
+        state.first_requested_at = None
+        state.start_at = None
+        state.starting = True
+        # Taken before the job starts: documents uploaded up to now are in its scan
+        started_at = datetime.utcnow().isoformat()
+        try:
+            # Tenant lookup and STS/Bedrock calls block; keep them off the event loop
+            result = await run_kb_call(knowledge_base_service.start_ingestion_job_sync, tenant_id)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finally:
+            state.starting = False
+
+        if not result["success"]:
+            state.last_error = result["error"]
+            metrics.increment("kb_ingestion.start_failures")
+            if "ConflictException" in result["error"]:
+                # Another ingestion job is running; try again once it has had time to finish
+                state.pending_requests += coalesced
+                state.first_requested_at = state.first_requested_at or time.monotonic()
+                self._arm_timer(tenant_id, state, self.retry_seconds)
+            else:
+                print(f"Failed to trigger KB sync for tenant {tenant_id}: {result['error']}")
+            return result
+
+        state.last_error = None
+        state.running_job = {
+            "job_id": result["job_id"],
+            "data_source_id": result.get("data_source_id"),
+            "status": result["status"],
+            "coalesced_requests": coalesced,
+            "started_at": started_at
+        }
+        metrics.increment("kb_ingestion.jobs_started")
+        metrics.increment("kb_ingestion.requests_coalesced", coalesced)
+        print(f"🔄 Started KB ingestion job {result['job_id']} for tenant {tenant_id} ({coalesced} sync requests coalesced)")
+
+        ingestion_job_poller.track(tenant_id, result["job_id"], result.get("data_source_id"), started_at, self.job_finished)
+        return result
+
+    def job_finished(self, tenant_id: str, job_id: str, job: Dict):
+        """Record a finished job and start the queued follow-up, if any."""
+        state = self._state(tenant_id)
+        if not state.running_job or state.running_job["job_id"] != job_id:
+            return
+
+        state.last_job = {
+            **state.running_job,
+            "status": job.get("status"),
+            "statistics": job.get("statistics", {}),
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        state.running_job = None
+        metrics.increment(f"kb_ingestion.jobs_{str(job.get('status')).lower()}")
+        print(f"✅ KB ingestion job {job_id} for tenant {tenant_id} finished with status {job.get('status')}")
+
+        if state.pending_requests:
+            metrics.increment("kb_ingestion.follow_up_jobs")
+            self._arm_timer(tenant_id, state)
+
+    def get_status(self, tenant_id: str) -> Dict:
+        """Queue state of a tenant, for the Knowledge Base status endpoint."""
+        state = self._tenants.get(tenant_id) or _TenantSyncState()
+        if state.starting:
+            phase = "starting"
+        elif state.running_job:
+            phase = "running"
+        elif state.timer and not state.timer.done():
+            phase = "debouncing"
+        else:
+            phase = "idle"
+
+        next_start = None
+        if phase == "debouncing" and state.start_at is not None:
+            next_start = round(max(0.0, state.start_at - time.monotonic()), 1)
+
+        running_job = None
+        if state.running_job:
+            running_job = dict(state.running_job)
+            running_job["status"] = ingestion_job_poller.job_status(running_job["job_id"]) or running_job["status"]
+
+        return {
+            "state": phase,
+            "pending_requests": state.pending_requests,
+            "follow_up_queued": state.busy and state.pending_requests > 0,
+            "next_start_in_seconds": next_start,
+            "running_job": running_job,
+            "last_job": state.last_job,
+            "last_error": state.last_error,
+            "debounce_seconds": self.debounce_seconds,
+            "max_delay_seconds": self.max_delay_seconds
+        }
+
+# Global scheduler instance
+kb_ingestion_scheduler = KnowledgeBaseIngestionScheduler()
@@ -4,7 +4,6 @@ Handles Knowledge Base creation in tenant accounts with Cohere embeddings.
 Uses standardized models from Phase 2 and cross-account framework from existing infrastructure.
 """
 
-import boto3
 import json
 import time
 from datetime import datetime
@@ -257,15 +256,7 @@ class KnowledgeBaseService:
             print(f"Creating Bedrock Knowledge Base for tenant: {tenant_name}")
             
             # Get Bedrock Agent client for tenant account
-            credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock-agent")
-            
-            bedrock_agent_client = boto3.client(
-                'bedrock-agent',
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken'],
-                region_name='us-east-1'
-            )
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(aws_account_id)
             
             # Generate safe name for Knowledge Base
             safe_name = self._generate_safe_name(tenant_name)
@@ -339,15 +330,7 @@ class KnowledgeBaseService:
             print(f"Creating data source for Knowledge Base: {knowledge_base_id}")
             
             # Get Bedrock Agent client for tenant account
-            credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock-agent")
-            
-            bedrock_agent_client = boto3.client(
-                'bedrock-agent',
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken'],
-                region_name='us-east-1'
-            )
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(aws_account_id)
             
             # Generate safe name for data source
             safe_name = self._generate_safe_name(tenant_name)
@@ -436,15 +419,7 @@ class KnowledgeBaseService:
             aws_account_id = tenant.get("aws_account_id")
             
             # Get Bedrock Agent client for tenant account
-            credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock-agent")
-            
-            bedrock_agent_client = boto3.client(
-                'bedrock-agent',
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken'],
-                region_name='us-east-1'
-            )
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(aws_account_id)
             
             # Get Knowledge Base details
             response = bedrock_agent_client.get_knowledge_base(knowledgeBaseId=kb_id)
@@ -470,6 +445,18 @@ class KnowledgeBaseService:
         """
         Start an ingestion job to index documents in the Knowledge Base.
         
+        Args:
+            tenant_id: Database ID of the tenant
+            
+        Returns:
+            Dict with ingestion job result
+        """
+        return self.start_ingestion_job_sync(tenant_id)
+    
+    def start_ingestion_job_sync(self, tenant_id: str) -> Dict:
+        """
+        Blocking version of start_ingestion_job, for callers that run it on a worker thread.
+        
         Args:
             tenant_id: Database ID of the tenant
             
@@ -495,15 +482,7 @@ class KnowledgeBaseService:
                 }
             
             # Get Bedrock Agent client for tenant account
-            credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock-agent")
-            
-            bedrock_agent_client = boto3.client(
-                'bedrock-agent',
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken'],
-                region_name='us-east-1'
-            )
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(aws_account_id)
             
             # List data sources to get the first one
             ds_response = bedrock_agent_client.list_data_sources(knowledgeBaseId=kb_id)
@@ -529,6 +508,8 @@ class KnowledgeBaseService:
             return {
                 "success": True,
                 "job_id": job_id,
+                "kb_id": kb_id,
+                "data_source_id": data_source_id,
                 "status": "STARTING",
                 "message": "Document ingestion started"
             }
@@ -540,6 +521,115 @@ class KnowledgeBaseService:
                 "error": f"Ingestion job failed to start: {str(e)}"
             }
     
+    def get_ingestion_job(self, tenant_id: str, job_id: str, data_source_id: Optional[str] = None) -> Dict:
+        """
+        Get the status and statistics of an ingestion job.
+        
+        Args:
+            tenant_id: Database ID of the tenant
+            job_id: Ingestion job ID returned by start_ingestion_job
+            data_source_id: Data source of the job (looked up when not given)
+            
+        Returns:
+            Dict with the job status, statistics and failure reasons
+        """
+        try:
+            tenant = self.tenants_collection.find_one({"_id": ObjectId(tenant_id)})
+            if not tenant or not tenant.get("bedrock_kb_id"):
+                return {
+                    "success": False,
+                    "error": "No Knowledge Base configured for tenant"
+                }
+            
+            kb_id = tenant["bedrock_kb_id"]
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(tenant.get("aws_account_id"))
+            
+            if not data_source_id:
+                ds_response = bedrock_agent_client.list_data_sources(knowledgeBaseId=kb_id)
+                if not ds_response['dataSourceSummaries']:
+                    return {
+                        "success": False,
+                        "error": "No data sources configured for Knowledge Base"
+                    }
+                data_source_id = ds_response['dataSourceSummaries'][0]['dataSourceId']
+            
+            response = bedrock_agent_client.get_ingestion_job(
+                knowledgeBaseId=kb_id,
+                dataSourceId=data_source_id,
+                ingestionJobId=job_id
+            )
+            job = response['ingestionJob']
+            
+            return {
+                "success": True,
+                "job_id": job_id,
+                "status": job['status'],
+                "statistics": job.get('statistics', {}),
+                "failure_reasons": job.get('failureReasons', []),
+                "started_at": job.get('startedAt'),
+                "updated_at": job.get('updatedAt')
+            }
+            
+        except Exception as e:
+            print(f"Error getting ingestion job {job_id}: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Ingestion job status check failed: {str(e)}"
+            }
+    
+    def list_failed_documents(self, tenant_id: str, data_source_id: str) -> Dict:
+        """
+        List the documents of a data source that the Knowledge Base could not index.
+        
+        Args:
+            tenant_id: Database ID of the tenant
+            data_source_id: Data source to list
+            
+        Returns:
+            Dict with the S3 keys of the failed documents, and any failed entries whose
+            URI has no S3 key (skipped: they cannot match an archive document)
+        """
+        try:
+            tenant = self.tenants_collection.find_one({"_id": ObjectId(tenant_id)})
+            if not tenant or not tenant.get("bedrock_kb_id"):
+                return {
+                    "success": False,
+                    "error": "No Knowledge Base configured for tenant"
+                }
+            
+            bedrock_agent_client = CrossAccountClient.get_tenant_bedrock_agent_client(tenant.get("aws_account_id"))
+            paginator = bedrock_agent_client.get_paginator('list_knowledge_base_documents')
+            
+            failed_keys = []
+            malformed_uris = []
+            for page in paginator.paginate(knowledgeBaseId=tenant["bedrock_kb_id"], dataSourceId=data_source_id):
+                for document in page.get('documentDetails', []):
+                    if document.get('status') not in ('FAILED', 'PARTIALLY_INDEXED'):
+                        continue
+                    uri = document.get('identifier', {}).get('s3', {}).get('uri', '')
+                    # s3://bucket/key; split rather than urlparse, which would cut keys at '?' or '#'
+                    parts = uri.split('/', 3) if uri.startswith('s3://') else []
+                    if len(parts) < 4 or not parts[2] or not parts[3]:
+                        malformed_uris.append(uri)
+                        continue
+                    failed_keys.append(parts[3])
+            
+            if malformed_uris:
+                print(f"⚠️ Skipped {len(malformed_uris)} failed Knowledge Base documents without an S3 key: {malformed_uris[:5]}")
+            
+            return {
+                "success": True,
+                "failed_keys": failed_keys,
+                "malformed_uris": malformed_uris
+            }
+            
+        except Exception as e:
+            print(f"Error listing Knowledge Base documents: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Knowledge Base document listing failed: {str(e)}"
+            }
+    
     def _generate_safe_name(self, tenant_name: str) -> str:
         """
         Generate AWS-safe name from tenant name (matching existing pattern).
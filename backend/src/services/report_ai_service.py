@@ -1,4 +1,5 @@
 from src.ai_coach.bedrock_llm import get_bedrock_llm
+from src.utils.llm_executor import run_llm_call, iterate_llm_stream
 from fastapi import HTTPException, status
 
 KG_SYSTEM_PROMPT = """
@@ -479,41 +480,74 @@ Don't give much context: go to the point.
 - In Conclusion: ...
 """
 
+def _build_assistant_messages(report_type, user_message, report_id=None, report_context=None, session_id=None):
+    """Build the chat messages for a report assistant turn (system prompt, recent session history, context, user message)"""
+    messages = [
+        {"role": "system", "content": KD_SYSTEM_PROMPT if report_type == "kd" else KG_SYSTEM_PROMPT},
+    ]
+    
+    # Get previous conversation history from session if available
+    if session_id:
+        from src.services.report_session_service import get_report_session
+        session = get_report_session(session_id, report_id, report_type)
+        
+        # Add previous messages to the conversation context
+        prev_messages = session.get("messages", [])
+        if prev_messages:
+            # Only include the last few messages to keep context manageable
+            recent_messages = prev_messages[-6:]  # Last 6 messages
+            for msg in recent_messages:
+                if msg["role"] in ["user", "assistant"]:
+                    messages.append({"role": msg["role"], "content": msg["content"]})
+    
+    # Add report context if available
+    if report_context:
+        messages.append({
+            "role": "system", 
+            "content": f"Current report context: {report_context}"
+        })
+        
+    # Add user message
+    messages.append({"role": "user", "content": user_message})
+    
+    return messages
+
+def _build_evaluation_messages(report_type, report_data):
+    """Build the chat messages for a report evaluation"""
+    # Format report data as a structured prompt
+    if report_type == "kd":
+        system_prompt = KD_EVALUATION_PROMPT
+        report_text = f"""
+        The Key Decision: {report_data.get('description', 'Not provided')}
+        The Purpose: {report_data.get('purpose', 'Not provided')}
+        What We Have Done: {report_data.get('what_we_have_done', 'Not provided')}
+        What We Have Learned: {report_data.get('what_we_have_learned', 'Not provided')}
+        What We Recommend / What We Have Decided: {report_data.get('recommendations', 'Not provided')}
+        """
+    else:
+        system_prompt = KG_EVALUATION_PROMPT
+        report_text = f"""
+        Question to Answer: {report_data.get('description', 'Not provided')}
+        Purpose: {report_data.get('purpose', 'Not provided')}
+        What We Have Done: {report_data.get('what_we_have_done', 'Not provided')}
+        What We Have Learned: {report_data.get('what_we_have_learned', 'Not provided')}
+        Recommendations: {report_data.get('recommendations', 'Not provided')}
+        """
+    
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": report_text}
+    ]
+
 ### CLEAR CONVERSATION MEMORY
 async def process_kg_message(user_message, report_id=None, report_context=None, model_id=None, session_id=None):
     """Process a user message for Knowledge Gap report assistance"""
     try:
         llm = get_bedrock_llm(model_id)
         
-        messages = [
-            {"role": "system", "content": KG_SYSTEM_PROMPT},
-        ]
-        
-        # Get previous conversation history from session if available
-        if session_id:
-            from src.services.report_session_service import get_report_session
-            session = get_report_session(session_id, report_id, 'kg')
-            
-            # Add previous messages to the conversation context
-            prev_messages = session.get("messages", [])
-            if prev_messages:
-                # Only include the last few messages to keep context manageable
-                recent_messages = prev_messages[-6:]  # Last 6 messages
-                for msg in recent_messages:
-                    if msg["role"] in ["user", "assistant"]:
-                        messages.append({"role": msg["role"], "content": msg["content"]})
+        messages = _build_assistant_messages('kg', user_message, report_id, report_context, session_id)
         
-        # Add report context if available
-        if report_context:
-            messages.append({
-                "role": "system", 
-                "content": f"Current report context: {report_context}"
-            })
-            
-        # Add user message
-        messages.append({"role": "user", "content": user_message})
-        
-        response = llm.invoke(messages)
+        response = await run_llm_call(llm.invoke, messages)
         
         return {
             "answer": response.content,
@@ -533,21 +567,9 @@ async def evaluate_kg_report(report_data, model_id=None):
     try:
         llm = get_bedrock_llm(model_id)
         
-        # Format report data as a structured prompt
-        report_text = f"""
-        Question to Answer: {report_data.get('description', 'Not provided')}
-        Purpose: {report_data.get('purpose', 'Not provided')}
-        What We Have Done: {report_data.get('what_we_have_done', 'Not provided')}
-        What We Have Learned: {report_data.get('what_we_have_learned', 'Not provided')}
-        Recommendations: {report_data.get('recommendations', 'Not provided')}
-        """
-        
-        messages = [
-            {"role": "system", "content": KG_EVALUATION_PROMPT},
-            {"role": "user", "content": report_text}
-        ]
+        messages = _build_evaluation_messages('kg', report_data)
         
-        response = llm.invoke(messages)
+        response = await run_llm_call(llm.invoke, messages)
         
         return {
             "evaluation": response.content,
@@ -567,35 +589,9 @@ async def process_kd_message(user_message, report_id=None, report_context=None,
     try:
         llm = get_bedrock_llm(model_id)
         
-        messages = [
-            {"role": "system", "content": KD_SYSTEM_PROMPT},
-        ]
+        messages = _build_assistant_messages('kd', user_message, report_id, report_context, session_id)
         
-        # Get previous conversation history from session if available
-        if session_id:
-            from src.services.report_session_service import get_report_session
-            session = get_report_session(session_id, report_id, 'kd')
-            
-            # Add previous messages to the conversation context
-            prev_messages = session.get("messages", [])
-            if prev_messages:
-                # Only include the last few messages to keep context manageable
-                recent_messages = prev_messages[-6:]  # Last 6 messages
-                for msg in recent_messages:
-                    if msg["role"] in ["user", "assistant"]:
-                        messages.append({"role": msg["role"], "content": msg["content"]})
-        
-        # Add report context if available
-        if report_context:
-            messages.append({
-                "role": "system", 
-                "content": f"Current report context: {report_context}"
-            })
-            
-        # Add user message
-        messages.append({"role": "user", "content": user_message})
-        
-        response = llm.invoke(messages)
+        response = await run_llm_call(llm.invoke, messages)
         
         return {
             "answer": response.content,
@@ -615,21 +611,9 @@ async def evaluate_kd_report(report_data, model_id=None):
     try:
         llm = get_bedrock_llm(model_id)
         
-        # Format report data as a structured prompt
-        report_text = f"""
-        The Key Decision: {report_data.get('description', 'Not provided')}
-        The Purpose: {report_data.get('purpose', 'Not provided')}
-        What We Have Done: {report_data.get('what_we_have_done', 'Not provided')}
-        What We Have Learned: {report_data.get('what_we_have_learned', 'Not provided')}
-        What We Recommend / What We Have Decided: {report_data.get('recommendations', 'Not provided')}
-        """
+        messages = _build_evaluation_messages('kd', report_data)
         
-        messages = [
-            {"role": "system", "content": KD_EVALUATION_PROMPT},
-            {"role": "user", "content": report_text}
-        ]
-        
-        response = llm.invoke(messages)
+        response = await run_llm_call(llm.invoke, messages)
         
         return {
             "evaluation": response.content,
@@ -641,4 +625,28 @@ async def evaluate_kd_report(report_data, model_id=None):
             "error": "An error occurred while evaluating your report.",
             "details": str(e),
             "success": False
-        }
\ No newline at end of file
+        }
+
+async def stream_report_message(user_message, report_type="kg", report_id=None, report_context=None, model_id=None, session_id=None):
+    """
+    Streaming variant of process_kg_message / process_kd_message.
+    Yields the answer text chunk by chunk as the model generates it.
+    """
+    llm = get_bedrock_llm(model_id)
+    messages = _build_assistant_messages(report_type, user_message, report_id, report_context, session_id)
+    
+    async for chunk in iterate_llm_stream(lambda: llm.stream(messages)):
+        if chunk.content:
+            yield chunk.content
+
+async def stream_report_evaluation(report_data, report_type="kg", model_id=None):
+    """
+    Streaming variant of evaluate_kg_report / evaluate_kd_report.
+    Yields the evaluation text chunk by chunk as the model generates it.
+    """
+    llm = get_bedrock_llm(model_id)
+    messages = _build_evaluation_messages(report_type, report_data)
+    
+    async for chunk in iterate_llm_stream(lambda: llm.stream(messages)):
+        if chunk.content:
+            yield chunk.content
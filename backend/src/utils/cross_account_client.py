@@ -5,10 +5,150 @@ Now includes Bedrock Agent client for Knowledge Base management.
 Handles role assumption and client creation for tenant accounts.
 """
 
+import os
+import threading
 import boto3
-from datetime import datetime
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
+from src.utils.metrics import metrics
+
+# Assumed-role credentials are reused until this many seconds before they expire...
+CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.getenv("TENANT_CREDENTIAL_REFRESH_MARGIN_SECONDS", "300"))
+# ...and renewed in the background once they are inside this window
+CREDENTIAL_EARLY_REFRESH_SECONDS = int(os.getenv("TENANT_CREDENTIAL_EARLY_REFRESH_SECONDS", "900"))
+
+class TenantClientCache:
+    """
+    Thread-safe cache of assumed-role credentials and boto3 clients per (tenant account, service).
+
+    A cache hit returns the existing client with no STS call. When the credentials come
+    within early_refresh seconds of expiry, a background thread assumes the role again
+    and swaps in new clients while callers keep using the old ones; only an entry that
+    is missing or within refresh_margin of expiry is renewed on the caller's thread
+    (one STS call per key even under concurrency).
+    """
+
+    def __init__(self, assume_role, refresh_margin: int = CREDENTIAL_REFRESH_MARGIN_SECONDS,
+                 early_refresh: int = CREDENTIAL_EARLY_REFRESH_SECONDS):
+        self._assume_role = assume_role
+        self.refresh_margin = refresh_margin
+        self.early_refresh = max(early_refresh, refresh_margin)
+        self._entries: Dict[tuple, Dict] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sts-refresh")
+
+    def get_client(self, aws_account_id: str, service_name: str, session_name_suffix: str, region_name: str = "us-east-1"):
+        """Cached boto3 client for a tenant account, created from the cached role session."""
+        entry = self._get_entry(aws_account_id, session_name_suffix)
+        client_key = (service_name, region_name)
+        client = entry["clients"].get(client_key)
+        if client is None:
+            with entry["lock"]:
+                client = entry["clients"].get(client_key)
+                if client is None:
+                    client = entry["session"].client(service_name, region_name=region_name)
+                    entry["clients"][client_key] = client
+        return client
+
+    def get_credentials(self, aws_account_id: str, session_name_suffix: str) -> Dict[str, Any]:
+        """Cached assumed-role credentials (same dict shape as STS returns)."""
+        return self._get_entry(aws_account_id, session_name_suffix)["credentials"]
+
+    def invalidate(self, aws_account_id: Optional[str] = None):
+        """Drop cached credentials and clients for one account, or for all accounts."""
+        with self._lock:
+            for key in [key for key in self._entries if aws_account_id is None or key[0] == aws_account_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached sessions and their remaining lifetime, for monitoring."""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {
+            "entries": len(entries),
+            "sessions": [
+                {
+                    "account_id": key[0],
+                    "session": key[1],
+                    "clients": len(entry["clients"]),
+                    "expires_in_seconds": int(self._remaining(entry))
+                }
+                for key, entry in entries
+            ]
+        }
+
+    @staticmethod
+    def _remaining(entry: Optional[Dict]) -> float:
+        if entry is None:
+            return float("-inf")
+        return (entry["expiration"] - datetime.now(timezone.utc)).total_seconds()
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get_entry(self, aws_account_id: str, session_name_suffix: str) -> Dict:
+        key = (aws_account_id, session_name_suffix)
+        entry = self._entries.get(key)
+        remaining = self._remaining(entry)
+        if remaining > self.refresh_margin:
+            metrics.increment("aws.tenant_credentials.hits")
+            if remaining < self.early_refresh:
+                self._schedule_refresh(key)
+            return entry
+
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if self._remaining(entry) > self.refresh_margin:
+                metrics.increment("aws.tenant_credentials.hits")
+                return entry
+            metrics.increment("aws.tenant_credentials.misses")
+            return self._refresh(key)
+
+    def _refresh(self, key: tuple) -> Dict:
+        """Assume the role and build a fresh entry. Caller holds the key lock."""
+        credentials = self._assume_role(*key)
+        expiration = credentials["Expiration"]
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        entry = {
+            "credentials": credentials,
+            "expiration": expiration,
+            "session": boto3.session.Session(
+                aws_access_key_id=credentials['AccessKeyId'],
+                aws_secret_access_key=credentials['SecretAccessKey'],
+                aws_session_token=credentials['SessionToken']
+            ),
+            "clients": {},
+            "lock": threading.Lock()
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _schedule_refresh(self, key: tuple):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._background_refresh, key)
+
+    def _background_refresh(self, key: tuple):
+        try:
+            with self._key_lock(key):
+                if self._remaining(self._entries.get(key)) < self.early_refresh:
+                    self._refresh(key)
+                    metrics.increment("aws.tenant_credentials.background_refreshes")
+        except Exception as e:
+            metrics.increment("aws.tenant_credentials.refresh_errors")
+            print(f"⚠️ Background credential refresh failed for account {key[0]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
 
 class CrossAccountClient:
     """Helper class for managing cross-account AWS operations."""
@@ -64,17 +204,9 @@ class CrossAccountClient:
             aws_account_id: Target tenant AWS account ID
             
         Returns:
-            boto3 S3 client with tenant account access
+            boto3 S3 client with tenant account access (cached until its credentials near expiry)
         """
-        credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "s3")
-        
-        return boto3.client(
-            's3',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-            region_name='us-east-1'
-        )
+        return _tenant_clients.get_client(aws_account_id, 's3', "s3")
     
     @staticmethod
     def get_tenant_bedrock_client(aws_account_id: str):
@@ -85,17 +217,9 @@ class CrossAccountClient:
             aws_account_id: Target tenant AWS account ID
             
         Returns:
-            boto3 Bedrock client with tenant account access
+            boto3 Bedrock client with tenant account access (cached until its credentials near expiry)
         """
-        credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock")
-        
-        return boto3.client(
-            'bedrock-agent-runtime',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-            region_name='us-east-1'
-        )
+        return _tenant_clients.get_client(aws_account_id, 'bedrock-agent-runtime', "bedrock")
     
     @staticmethod
     def get_tenant_bedrock_agent_client(aws_account_id: str):
@@ -106,17 +230,9 @@ class CrossAccountClient:
             aws_account_id: Target tenant AWS account ID
             
         Returns:
-            boto3 Bedrock Agent client with tenant account access
+            boto3 Bedrock Agent client with tenant account access (cached until its credentials near expiry)
         """
-        credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "bedrock-agent")
-        
-        return boto3.client(
-            'bedrock-agent',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-            region_name='us-east-1'
-        )
+        return _tenant_clients.get_client(aws_account_id, 'bedrock-agent', "bedrock-agent")
     
     @staticmethod
     def get_tenant_iam_client(aws_account_id: str):
@@ -127,17 +243,14 @@ class CrossAccountClient:
             aws_account_id: Target tenant AWS account ID
             
         Returns:
-            boto3 IAM client with tenant account access
+            boto3 IAM client with tenant account access (cached until its credentials near expiry)
         """
-        credentials = CrossAccountClient.assume_tenant_role(aws_account_id, "iam")
-        
-        return boto3.client(
-            'iam',
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-            region_name='us-east-1'
-        )
+        return _tenant_clients.get_client(aws_account_id, 'iam', "iam")
+    
+    @staticmethod
+    def get_client_cache_stats() -> Dict[str, Any]:
+        """Cached tenant sessions and clients (hit/miss/refresh counters are in the metrics registry)."""
+        return _tenant_clients.stats()
     
     @staticmethod
     def test_tenant_access(aws_account_id: str) -> Dict[str, Any]:
@@ -186,5 +299,8 @@ class CrossAccountClient:
                 "test_timestamp": datetime.utcnow().isoformat()  # NEW
             }
 
+# Shared per-worker cache; test_tenant_access still assumes the role directly
+_tenant_clients = TenantClientCache(CrossAccountClient.assume_tenant_role)
+
 # Global instance for easy import
 cross_account_client = CrossAccountClient()
\ No newline at end of file
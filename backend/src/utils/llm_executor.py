@@ -0,0 +1,61 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Maximum number of blocking Bedrock/LangChain calls running at once in this worker.
+# Extra calls wait in the executor queue instead of blocking the event loop.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+_llm_executor = ThreadPoolExecutor(
+    max_workers=LLM_MAX_CONCURRENCY,
+    thread_name_prefix="bedrock-llm"
+)
+
+async def run_llm_call(func, *args, **kwargs):
+    """
+    Run a blocking LLM call (chain call, llm.invoke, ...) on the bounded LLM thread pool.
+    Async endpoints await this instead of calling the chain directly, so one Bedrock
+    round trip no longer stalls every other request on the worker.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_llm_executor, functools.partial(func, *args, **kwargs))
+
+async def iterate_llm_stream(make_iterator):
+    """
+    Consume a blocking iterator (e.g. llm.stream(...)) on the bounded LLM pool and
+    yield its items to async code as they arrive. If the consumer stops early (client
+    disconnected), the producer thread stops at the next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in make_iterator():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    producer = loop.run_in_executor(_llm_executor, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        await asyncio.shield(producer)
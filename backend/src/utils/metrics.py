@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Optional
+
+class MetricsRegistry:
+    """
+    In-process counters and latency samples for operational monitoring.
+    Timings keep a rolling window per metric so percentiles reflect recent traffic.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._timings = defaultdict(lambda: deque(maxlen=window))
+
+    def increment(self, name: str, value: int = 1):
+        """Add value to a counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record one timing sample (milliseconds by convention)."""
+        with self._lock:
+            self._timings[name].append(value)
+
+    def average(self, name: str) -> Optional[float]:
+        """Mean of the current timing window (None before the first sample)."""
+        with self._lock:
+            values = self._timings.get(name)
+            return sum(values) / len(values) if values else None
+
+    def snapshot(self) -> Dict:
+        """Current counters and percentile summaries of the timing windows."""
+        with self._lock:
+            counters = dict(self._counters)
+            samples = {name: sorted(values) for name, values in self._timings.items() if values}
+
+        timings = {}
+        for name, values in samples.items():
+            timings[name] = {
+                "count": len(values),
+                "avg": round(sum(values) / len(values), 2),
+                "p50": round(values[int(0.50 * (len(values) - 1))], 2),
+                "p95": round(values[int(0.95 * (len(values) - 1))], 2),
+                "p99": round(values[int(0.99 * (len(values) - 1))], 2),
+                "max": round(values[-1], 2)
+            }
+
+        return {"counters": counters, "timings": timings}
+
+# Create global instance
+metrics = MetricsRegistry()
@@ -0,0 +1,141 @@
+"""
+Streaming S3 transfers for archive documents.
+
+Uploads are read from the incoming file in fixed-size parts and sent with S3 multipart
+upload, several parts at a time, so a worker holds at most a few parts in memory
+whatever the file size. The size and SHA-256 of the content are computed as the parts
+go by. Downloads are relayed from the S3 body in small chunks (optionally a byte range),
+so serving a large file never holds it in memory. Blocking boto3 calls run on a
+dedicated thread pool, never on the event loop.
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Optional
+
+from src.utils.metrics import metrics
+
+# S3 requires parts of at least 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+UPLOAD_PART_SIZE = max(MIN_PART_SIZE, int(float(os.getenv("S3_UPLOAD_PART_SIZE_MB", "8")) * 1024 * 1024))
+UPLOAD_PART_CONCURRENCY = max(1, int(os.getenv("S3_UPLOAD_PART_CONCURRENCY", "4")))
+
+# Chunk size used when relaying an S3 body to a client
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("S3_DOWNLOAD_CHUNK_KB", "256")) * 1024
+
+_SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_s3_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("S3_TRANSFER_WORKERS", "16")),
+    thread_name_prefix="s3-transfer"
+)
+
+async def run_s3_call(func, *args, **kwargs):
+    """Run a blocking boto3 S3 call on the S3 transfer pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_s3_executor, functools.partial(func, *args, **kwargs))
+
+async def stream_upload_to_s3(s3_client, file, bucket: str, key: str, content_type: Optional[str] = None,
+                              metadata: Optional[Dict[str, str]] = None, part_size: int = UPLOAD_PART_SIZE,
+                              max_concurrency: int = UPLOAD_PART_CONCURRENCY) -> Dict:
+    """
+    Stream an async-readable file (e.g. FastAPI UploadFile) to s3://bucket/key.
+
+    Files smaller than one part go up with a single put_object; larger files use a
+    multipart upload with up to max_concurrency parts in flight, aborted if any part
+    fails. Returns {"size", "sha256", "parts"}.
+    """
+    part_size = max(MIN_PART_SIZE, part_size)
+    extra_args = {"ContentType": content_type or "application/octet-stream", "Metadata": metadata or {}}
+    digest = hashlib.sha256()
+    size = 0
+
+    first = await file.read(part_size)
+    digest.update(first)
+    size += len(first)
+    if len(first) < part_size:
+        await run_s3_call(s3_client.put_object, Bucket=bucket, Key=key, Body=first, **extra_args)
+        metrics.increment("s3.upload.single_put")
+        return {"size": size, "sha256": digest.hexdigest(), "parts": 1}
+
+    upload_id = (await run_s3_call(s3_client.create_multipart_upload, Bucket=bucket, Key=key, **extra_args))["UploadId"]
+    slots = asyncio.Semaphore(max_concurrency)
+    uploads = []
+
+    async def upload_part(part_number: int, body: bytes) -> Dict:
+        try:
+            response = await run_s3_call(
+                s3_client.upload_part,
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    def raise_if_part_failed():
+        for upload in uploads:
+            if upload.done() and not upload.cancelled() and upload.exception() is not None:
+                raise upload.exception()
+
+    try:
+        part_number, body = 1, first
+        while body:
+            # Stop reading as soon as a part has failed instead of sending the rest of the file
+            raise_if_part_failed()
+            # Wait for a free slot before reading the next part, so memory stays bounded
+            await slots.acquire()
+            # A failed part frees its slot, so it may be what ended the wait
+            raise_if_part_failed()
+            uploads.append(asyncio.ensure_future(upload_part(part_number, body)))
+            body = await file.read(part_size)
+            digest.update(body)
+            size += len(body)
+            part_number += 1
+
+        parts = await asyncio.gather(*uploads)
+        await run_s3_call(
+            s3_client.complete_multipart_upload,
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])}
+        )
+    except BaseException:
+        for upload in uploads:
+            upload.cancel()
+        await asyncio.gather(*uploads, return_exceptions=True)
+        try:
+            await run_s3_call(s3_client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            print(f"⚠️ Could not abort multipart upload {upload_id} for {key}: {e}")
+        metrics.increment("s3.upload.multipart_aborted")
+        raise
+
+    metrics.increment("s3.upload.multipart")
+    metrics.increment("s3.upload.parts", len(parts))
+    return {"size": size, "sha256": digest.hexdigest(), "parts": len(parts)}
+
+def normalize_range_header(range_header: Optional[str]) -> Optional[str]:
+    """
+    The Range header to forward to S3, or None to send the whole object.
+    Only a single byte range is supported; other forms are ignored, which is a valid
+    response to a Range request (the full content with status 200).
+    """
+    if not range_header:
+        return None
+    match = _SINGLE_RANGE.match(range_header.strip().replace(" ", ""))
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    return f"bytes={match.group(1)}-{match.group(2)}"
+
+async def iter_s3_body(body, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a botocore StreamingBody in chunks, reading on the S3 pool; the body is closed at the end."""
+    try:
+        while True:
+            chunk = await run_s3_call(body.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
@@ -0,0 +1,8 @@
+import json
+
+# Headers for text/event-stream responses: no caching, and no proxy buffering (nginx)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def format_sse(event: str, data) -> str:
+    """Serialize one Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
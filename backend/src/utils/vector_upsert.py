@@ -0,0 +1,108 @@
+"""
+Bulk writes of pre-embedded vectors into Chroma collections.
+
+The LangChain Chroma wrapper embeds and writes one add call at a time. These helpers
+take vectors that are already computed (by a separate embedding stage or a cache
+file) and write them with large collection.upsert batches. Ids are derived from
+content hashes, so writing the same chunk twice is a no-op and chunks that are
+already stored never need to be embedded again.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence
+
+# Upper bound per upsert call; Chroma also enforces its own max batch size
+DEFAULT_UPSERT_BATCH_SIZE = 5000
+
+def content_id(text: str, metadata: Optional[Dict] = None, namespace: str = "") -> str:
+    """Deterministic chunk id from its namespace, text and metadata."""
+    payload = json.dumps([namespace, text, metadata or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:40]
+
+def _max_batch_size(collection, batch_size: Optional[int]) -> int:
+    limit = batch_size or DEFAULT_UPSERT_BATCH_SIZE
+    try:
+        limit = min(limit, collection._client.get_max_batch_size())
+    except Exception:
+        pass
+    return max(1, limit)
+
+def upsert_embeddings(
+    collection,
+    ids: Sequence[str],
+    embeddings: Sequence[Sequence[float]],
+    documents: Sequence[str],
+    metadatas: Optional[Sequence[Optional[Dict]]] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Write pre-embedded chunks with as few collection.upsert calls as possible.
+    Duplicate ids within the call keep their last occurrence. Returns the number written.
+    """
+    if metadatas is None:
+        metadatas = [None] * len(ids)
+
+    # Chroma rejects duplicate ids inside one upsert
+    rows = {}
+    for row in zip(ids, embeddings, documents, metadatas):
+        rows[row[0]] = row
+    rows = list(rows.values())
+
+    limit = _max_batch_size(collection, batch_size)
+    for start in range(0, len(rows), limit):
+        batch = rows[start:start + limit]
+        collection.upsert(
+            ids=[row[0] for row in batch],
+            embeddings=[list(row[1]) for row in batch],
+            documents=[row[2] for row in batch],
+            metadatas=[row[3] or None for row in batch]
+        )
+    return len(rows)
+
+def existing_ids(collection, ids: Sequence[str], batch_size: Optional[int] = None) -> set:
+    """Subset of ids already stored in the collection."""
+    found = set()
+    ids = list(ids)
+    limit = _max_batch_size(collection, batch_size)
+    for start in range(0, len(ids), limit):
+        found.update(collection.get(ids=ids[start:start + limit], include=[])["ids"])
+    return found
+
+def upsert_texts(
+    collection,
+    embedding_function,
+    texts: List[str],
+    metadatas: Optional[List[Optional[Dict]]] = None,
+    ids: Optional[List[str]] = None,
+    namespace: str = "",
+    batch_size: Optional[int] = None
+) -> Dict:
+    """
+    Embed and write texts, skipping any whose id is already stored (no Bedrock call for them).
+    Ids default to content hashes. Returns counts of texts embedded and skipped.
+    """
+    if metadatas is None:
+        metadatas = [None] * len(texts)
+    if ids is None:
+        ids = [content_id(text, metadata, namespace) for text, metadata in zip(texts, metadatas)]
+
+    stored = existing_ids(collection, ids, batch_size)
+    new_rows = [
+        (chunk_id, text, metadata)
+        for chunk_id, text, metadata in zip(ids, texts, metadatas)
+        if chunk_id not in stored
+    ]
+
+    if new_rows:
+        vectors = embedding_function.embed_documents([row[1] for row in new_rows])
+        upsert_embeddings(
+            collection,
+            ids=[row[0] for row in new_rows],
+            embeddings=vectors,
+            documents=[row[1] for row in new_rows],
+            metadatas=[row[2] for row in new_rows],
+            batch_size=batch_size
+        )
+
+    return {"embedded": len(new_rows), "skipped": len(texts) - len(new_rows), "ids": ids}
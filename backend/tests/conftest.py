@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run from backend/ or the repository root; src.utils.db reads these at import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB", "rlc_coach_test")
@@ -0,0 +1,117 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from src.ai_coach import conversation_store
+from src.ai_coach.conversation_store import InMemoryConversationStore, MongoConversationStore
+
+
+@pytest.fixture
+def store():
+    db = mongomock.MongoClient().db
+    return MongoConversationStore(db["turns"], active_window_seconds=7200, summaries_collection=db["summaries"])
+
+
+def test_load_turns_returns_last_n_oldest_first(store):
+    for i in range(5):
+        store.append_turn("tenant:user:chat", f"q{i}", f"a{i}")
+    store.append_turn("tenant:user:other", "x", "y")
+
+    turns = store.load_turns("tenant:user:chat", 3)
+    assert [turn["question"] for turn in turns] == ["q2", "q3", "q4"]
+    assert [turn["answer"] for turn in turns] == ["a2", "a3", "a4"]
+    assert len(store.load_turns("tenant:user:chat")) == 5
+    assert store.count_turns("tenant:user:chat") == 5
+
+
+def test_append_turn_is_one_document_per_turn(store):
+    store.append_turn("k", "question", "answer")
+    docs = list(store.collection.find({}, {"_id": 0}))
+    assert len(docs) == 1
+    assert docs[0]["conversation_key"] == "k"
+    assert docs[0]["question"] == "question" and docs[0]["answer"] == "answer"
+    assert isinstance(docs[0]["created_at"], datetime)
+
+
+def test_clear_prefix_removes_turns_and_summaries(store):
+    store.append_turn("t1:u1:a", "q", "a")
+    store.append_turn("t1:u1:b", "q", "a")
+    store.append_turn("t1:u2:a", "q", "a")
+    store.save_summary("t1:u1:a", "summary", 1)
+
+    assert store.clear_prefix("t1:u1:") == 2
+    assert store.list_keys() == ["t1:u2:a"]
+    assert store.load_summary("t1:u1:a") is None
+    assert store.clear_prefix("t1:u1:") == 0
+
+
+def test_clear_prefix_escapes_regex_characters(store):
+    store.append_turn("t.1:u", "q", "a")
+    store.append_turn("tx1:u", "q", "a")
+    assert store.clear_prefix("t.1:") == 1
+    assert store.list_keys() == ["tx1:u"]
+
+
+def test_list_keys_only_returns_active_conversations(store):
+    store.append_turn("recent", "q", "a")
+    store.collection.insert_one({
+        "conversation_key": "stale", "question": "q", "answer": "a",
+        "created_at": datetime.utcnow() - timedelta(hours=3)
+    })
+    assert store.list_keys() == ["recent"]
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="needs time.tzset")
+def test_list_keys_window_ignores_server_timezone(store):
+    store.collection.insert_one({
+        "conversation_key": "stale", "question": "q", "answer": "a",
+        "created_at": datetime.utcnow() - timedelta(hours=3)
+    })
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Tokyo"
+    time.tzset()
+    try:
+        assert store.list_keys() == []
+    finally:
+        if previous is None:
+            os.environ.pop("TZ")
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+
+
+def test_summary_round_trip(store):
+    assert store.load_summary("k") is None
+    store.save_summary("k", "first", 2)
+    store.save_summary("k", "second", 4)
+    assert store.load_summary("k") == {"summary": "second", "turns_summarized": 4}
+
+
+def test_unreachable_mongo_falls_back_to_memory(monkeypatch):
+    monkeypatch.setenv("AI_COACH_MEMORY_BACKEND", "mongo")
+    monkeypatch.setenv("MONGODB_URI", "mongodb://127.0.0.1:1")
+    monkeypatch.setenv("AI_COACH_MONGO_PING_TIMEOUT_MS", "100")
+    assert isinstance(conversation_store.get_conversation_store(), InMemoryConversationStore)
+
+
+def test_reachable_mongo_is_selected(monkeypatch):
+    monkeypatch.setenv("AI_COACH_MEMORY_BACKEND", "mongo")
+    monkeypatch.setattr(conversation_store, "_mongo_reachable", lambda timeout_ms: True)
+    monkeypatch.setattr("src.utils.db.db", mongomock.MongoClient().db)
+    assert isinstance(conversation_store.get_conversation_store(), MongoConversationStore)
+
+
+def test_store_setup_creates_ttl_and_created_at_indexes(monkeypatch):
+    monkeypatch.setenv("AI_COACH_MEMORY_BACKEND", "mongo")
+    monkeypatch.setattr(conversation_store, "_mongo_reachable", lambda timeout_ms: True)
+    monkeypatch.setattr("src.utils.db.db", mongomock.MongoClient().db)
+    store = conversation_store.get_conversation_store()
+
+    turn_indexes = store.collection.index_information()
+    ttl = [index for index in turn_indexes.values() if index["key"] == [("created_at", 1)]]
+    assert ttl and ttl[0]["expireAfterSeconds"] == store.retention_seconds
+    summary_indexes = store.summaries_collection.index_information().values()
+    assert any(index["key"] == [("updated_at", 1)] and "expireAfterSeconds" in index for index in summary_indexes)
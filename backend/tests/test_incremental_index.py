@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("chromadb")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.ai_coach import incremental_index
+from src.ai_coach.incremental_index import IndexManifest, sync_documents
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    monkeypatch.setenv("ANONYMIZED_TELEMETRY", "False")
+    monkeypatch.setattr(incremental_index, "get_embeddings", lambda: DeterministicFakeEmbedding(size=8))
+
+def _write(directory, name, text):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(text)
+
+def _stored_ids(db_dir):
+    from langchain_community.vectorstores import Chroma
+    return set(Chroma(persist_directory=str(db_dir)).get(include=[])["ids"])
+
+def test_same_relative_path_in_two_docs_dirs_keeps_both(tmp_path, fake_embeddings):
+    db_dir = tmp_path / "chroma_db"
+    _write(tmp_path / "coaching", "guide.txt", "Coaching guide: ask open questions.")
+    _write(tmp_path / "leadership", "guide.txt", "Leadership guide: delegate outcomes.")
+
+    sync_documents(str(tmp_path / "coaching"), str(db_dir), workers=1, embed_workers=1)
+    first_ids = set(IndexManifest(str(db_dir)).files["coaching:guide.txt"]["chunks"])
+
+    summary = sync_documents(str(tmp_path / "leadership"), str(db_dir), remove_missing=False, workers=1, embed_workers=1)
+
+    files = IndexManifest(str(db_dir)).files
+    assert summary["files_added"] == 1 and summary["files_changed"] == 0
+    assert summary["chunks_deleted"] == 0
+    assert set(files) == {"coaching:guide.txt", "leadership:guide.txt"}
+    assert first_ids <= _stored_ids(db_dir)
+
+def test_root_name_separates_docs_dirs_with_the_same_name(tmp_path, fake_embeddings):
+    db_dir = tmp_path / "chroma_db"
+    _write(tmp_path / "a" / "docs", "guide.txt", "First guide.")
+    _write(tmp_path / "b" / "docs", "guide.txt", "Second guide.")
+
+    sync_documents(str(tmp_path / "a" / "docs"), str(db_dir), workers=1, embed_workers=1)
+    summary = sync_documents(str(tmp_path / "b" / "docs"), str(db_dir), remove_missing=False,
+                             workers=1, embed_workers=1, root_name="docs-b")
+
+    assert summary["chunks_deleted"] == 0
+    assert set(IndexManifest(str(db_dir)).files) == {"docs:guide.txt", "docs-b:guide.txt"}
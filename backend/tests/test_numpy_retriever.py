@@ -0,0 +1,36 @@
+import pytest
+
+from src.ai_coach.numpy_retriever import NumpyVectorIndex
+
+@pytest.fixture
+def index():
+    return NumpyVectorIndex(
+        ids=["a", "b", "c"],
+        embeddings=[[1.0, 0.0], [0.9, 0.1], [0.8, 0.2]],
+        documents=["first", "second", "third"],
+        metadatas=[{"page": 1, "topic": "coaching"}, {"page": 5, "topic": "coaching"}, {"page": 9}]
+    )
+
+def _rows(index, where):
+    return sorted(row for row, _ in index.search([1.0, 0.0], k=3, where=where)[0])
+
+def test_comparison_operators_filter_like_chroma(index):
+    assert _rows(index, {"page": {"$gt": 1}}) == [1, 2]
+    assert _rows(index, {"page": {"$gte": 5, "$lt": 9}}) == [1]
+    assert _rows(index, {"$and": [{"topic": "coaching"}, {"page": {"$lte": 1}}]}) == [0]
+    # A missing field never satisfies a comparison
+    assert _rows(index, {"topic": {"$gt": "a"}}) == [0, 1]
+
+@pytest.mark.parametrize("where", [
+    {"page": {"$contains": 1}},
+    {"$not": {"page": 1}},
+    {"$or": [{"page": 1}, {"page": {"$regex": "1"}}]}
+])
+def test_unknown_operator_raises_instead_of_matching_everything(index, where):
+    with pytest.raises(ValueError):
+        index.search([1.0, 0.0], k=3, where=where)
+
+def test_unknown_operator_raises_on_empty_index():
+    empty = NumpyVectorIndex([], [], [], [])
+    with pytest.raises(ValueError):
+        empty.search([1.0, 0.0], where={"page": {"$contains": 1}})
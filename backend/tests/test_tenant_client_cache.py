@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pytest
+from botocore.stub import ANY, Stubber
+
+from src.utils import cross_account_client
+from src.utils.cross_account_client import CrossAccountClient, TenantClientCache
+
+ACCOUNT_ID = "123456789012"
+
+
+def credentials_response(expires_in: int, key_id: str = "ASIAEXAMPLE000000000"):
+    return {
+        "Credentials": {
+            "AccessKeyId": key_id,
+            "SecretAccessKey": "secret",
+            "SessionToken": "token",
+            "Expiration": datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+        }
+    }
+
+
+@pytest.fixture
+def sts(monkeypatch):
+    """Stubbed STS client used by CrossAccountClient.assume_tenant_role; no network needed."""
+    client = boto3.client("sts", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    stubber = Stubber(client)
+    real_client = boto3.client
+    monkeypatch.setattr(
+        cross_account_client.boto3, "client",
+        lambda service, *args, **kwargs: client if service == "sts" else real_client(service, *args, **kwargs)
+    )
+    with stubber:
+        yield stubber
+
+
+@pytest.fixture
+def calls():
+    """assume_role wrapper that records the calling thread of every STS call."""
+    record = {"threads": [], "done": threading.Event()}
+
+    def assume_role(aws_account_id, session_name_suffix):
+        record["threads"].append(threading.current_thread().name)
+        try:
+            return CrossAccountClient.assume_tenant_role(aws_account_id, session_name_suffix)
+        finally:
+            record["done"].set()
+
+    record["assume_role"] = assume_role
+    return record
+
+
+def expect_assume_role(stubber, expires_in, key_id="ASIAEXAMPLE000000000"):
+    stubber.add_response(
+        "assume_role",
+        credentials_response(expires_in, key_id),
+        {"RoleArn": f"arn:aws:iam::{ACCOUNT_ID}:role/CoreAppAccess", "RoleSessionName": ANY}
+    )
+
+
+def test_concurrent_callers_share_one_assume_role(sts, calls):
+    expect_assume_role(sts, 3600)
+    cache = TenantClientCache(calls["assume_role"], refresh_margin=300, early_refresh=900)
+
+    start = threading.Barrier(8)
+
+    def get_client(_):
+        start.wait()
+        return cache.get_client(ACCOUNT_ID, "s3", "s3")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(get_client, range(8)))
+
+    assert len(calls["threads"]) == 1
+    assert all(client is clients[0] for client in clients)
+    sts.assert_no_pending_responses()
+
+
+def test_cache_hit_makes_no_sts_call(sts, calls):
+    expect_assume_role(sts, 3600)
+    cache = TenantClientCache(calls["assume_role"], refresh_margin=300, early_refresh=900)
+
+    first = cache.get_client(ACCOUNT_ID, "s3", "s3")
+    # No more responses are queued: any further STS call would raise
+    second = cache.get_client(ACCOUNT_ID, "s3", "s3")
+    credentials = cache.get_credentials(ACCOUNT_ID, "s3")
+
+    assert second is first
+    assert credentials["AccessKeyId"] == "ASIAEXAMPLE000000000"
+    assert len(calls["threads"]) == 1
+
+
+def test_entry_in_early_refresh_window_is_renewed_in_background(sts, calls):
+    expect_assume_role(sts, 600, key_id="ASIAOLD0000000000000")
+    expect_assume_role(sts, 3600, key_id="ASIANEW0000000000000")
+    cache = TenantClientCache(calls["assume_role"], refresh_margin=300, early_refresh=900)
+
+    first = cache.get_client(ACCOUNT_ID, "s3", "s3")
+    calls["done"].clear()
+
+    # Still valid beyond the margin: served from cache while a refresh is scheduled
+    assert cache.get_client(ACCOUNT_ID, "s3", "s3") is first
+    assert calls["done"].wait(5)
+    cache._executor.shutdown(wait=True)
+
+    assert calls["threads"][0] == threading.current_thread().name
+    assert calls["threads"][1].startswith("sts-refresh")
+    assert cache.get_credentials(ACCOUNT_ID, "s3")["AccessKeyId"] == "ASIANEW0000000000000"
+    assert cache.get_client(ACCOUNT_ID, "s3", "s3") is not first
+    sts.assert_no_pending_responses()
+
+
+def test_entry_inside_refresh_margin_is_renewed_on_callers_thread(sts, calls):
+    expect_assume_role(sts, 100, key_id="ASIAOLD0000000000000")
+    expect_assume_role(sts, 3600, key_id="ASIANEW0000000000000")
+    cache = TenantClientCache(calls["assume_role"], refresh_margin=300, early_refresh=900)
+
+    cache.get_client(ACCOUNT_ID, "s3", "s3")
+    assert cache.get_credentials(ACCOUNT_ID, "s3")["AccessKeyId"] == "ASIANEW0000000000000"
+
+    caller = threading.current_thread().name
+    assert calls["threads"] == [caller, caller]
+    sts.assert_no_pending_responses()